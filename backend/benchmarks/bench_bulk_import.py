@@ -0,0 +1,101 @@
+# benchmarks/bench_bulk_import.py
+"""
+Пропускная способность пакетного импорта: распаковка ZIP архива
+и параллельный разбор DOCX файлов в пуле, в документах в секунду.
+Для сравнения измеряется последовательный разбор тех же файлов.
+Сохранение в MongoDB не измеряется.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_bulk_import --files 50 --workers 4
+"""
+import argparse
+import asyncio
+import io
+import logging
+import os
+import tempfile
+import time
+import zipfile
+
+from benchmarks.synthetic import generate_application_docx
+from src.config import settings
+from src.modules.projects import bulk_import, parser_pool as parser_pool_module, utils as projects_utils
+from src.modules.projects.parser_pool import ParserPool
+from src.modules.projects.projects import convert_docx_to_dict
+from src.modules.projects.schemas import ProjectTemplate
+
+
+def build_archive(files: int, scale: int) -> bytes:
+    document = generate_application_docx(
+        team_members=5 * scale,
+        calendar_tasks=6 * scale,
+        expense_records=40 * scale,
+        media_resources=6 * scale,
+    )
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+        for number in range(files):
+            archive.writestr(f"Заявка_{number + 1}.docx", document)
+    return buffer.getvalue()
+
+
+async def run_bulk(pool: ParserPool, archive: bytes) -> float:
+    # Запуск процессов пула не входит в измерение
+    await asyncio.gather(*(pool.run(os.getpid) for _ in range(pool.workers)))
+
+    token = {"user_id": "benchmark"}
+    started = time.perf_counter()
+    members = await bulk_import.parse_archive(io.BytesIO(archive), token, ProjectTemplate.FIZ_LITSO.value)
+    duration = time.perf_counter() - started
+
+    failed = [member for member in members if member["status"] != "created"]
+    if failed:
+        raise SystemExit(f"Не удалось разобрать {len(failed)} файлов: {failed[0].get('error')}")
+    return duration
+
+
+def run_sequential(archive: bytes, directory: str) -> float:
+    with zipfile.ZipFile(io.BytesIO(archive)) as zip_file:
+        paths = [zip_file.extract(info, directory) for info in zip_file.infolist()]
+    started = time.perf_counter()
+    for path in paths:
+        convert_docx_to_dict(path)
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк пакетного импорта заявок")
+    parser.add_argument("--files", type=int, default=50, help="Количество DOCX файлов в архиве")
+    parser.add_argument("--scale", type=int, default=1, help="Множитель размера заявки")
+    parser.add_argument("--workers", type=int, default=4, help="Количество воркеров пула разбора")
+    parser.add_argument("--kind", choices=["process", "thread"], default="process")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    # Измеряется разбор, а не кеш результатов разбора
+    settings.parse_cache_enabled = False
+
+    archive = build_archive(args.files, args.scale)
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Распакованные файлы пишутся во временный каталог, а не в каталог загрузок
+        projects_utils.UPLOAD_DIR = directory
+        pool = ParserPool(kind=args.kind, workers=args.workers, queue_size=args.workers,
+                          job_timeout=600, retry_after=1)
+        parser_pool_module.parser_pool = bulk_import.parser_pool = pool
+        try:
+            bulk_seconds = asyncio.run(run_bulk(pool, archive))
+        finally:
+            pool.shutdown()
+
+        sequential_seconds = run_sequential(archive, directory)
+
+    print(f"Файлов в архиве:            {args.files} ({len(archive) / 1024:.0f} КБ)")
+    print(f"Пул:                        {pool.stats()['kind']}, воркеров: {args.workers}")
+    print(f"Последовательный разбор:    {args.files / sequential_seconds:8.2f} док/с")
+    print(f"Пакетный импорт:            {args.files / bulk_seconds:8.2f} док/с")
+    print(f"Ускорение:                  {sequential_seconds / bulk_seconds:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_extractor.py
+"""
+Сравнение поиска разделов заявки: повторные проходы extract_between_headers
+против однопроходного SectionIndex.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_extractor --repeat 20
+"""
+import argparse
+import logging
+import time
+
+from benchmarks.synthetic import generate_application_lines
+from src.modules.projects.projects import DataExtractor, SectionIndex, extract_between_headers
+
+# Пары (начало, конец) в том порядке, в котором их запрашивает DataExtractor
+GENERAL_FIELDS = [
+    ("Масштаб реализации проекта:", "Дата начала и окончания проекта:"),
+    ("Дата начала и окончания проекта:", 'Блок "Дополнительная информация об авторе проекта"'),
+    ("Опыт автора проекта:", "Описание функционала автора проекта:"),
+    ("Описание функционала автора проекта:", "Адрес регистрации автора проекта:"),
+    ("Адрес регистрации автора проекта:", "Добавить резюме:"),
+    ("Видео-визитка (ссылка на ролик на любом видеохостинге):", 'Вкладка "О проекте"'),
+]
+PROJECT_FIELDS = [
+    ("Краткая информация о проекте:", "Описание проблемы, решению/снижению которой посвящен проект:"),
+    ("Описание проблемы, решению/снижению которой посвящен проект:", "Основные целевые группы, на которые направлен проект:"),
+    ("Основные целевые группы, на которые направлен проект:", "Основная цель проекта:"),
+    ("Основная цель проекта:", "Опыт успешной реализации проекта:"),
+    ("Опыт успешной реализации проекта:", "Перспектива развития и потенциал проекта:"),
+    ("Перспектива развития и потенциал проекта:", 'Блок "Задачи"'),
+]
+TABS = [
+    ('Вкладка "Команда"', 'Вкладка "Результаты"'),
+    ('Вкладка "Календарный план"', 'Вкладка "Медиа"'),
+    ('Вкладка "Медиа"', 'Вкладка "Расходы"'),
+    ('Вкладка "Софинансирование"', 'Вкладка "Доп. Файлы"'),
+    ('Вкладка "Доп. Файлы"', None),
+    ('Вкладка "Расходы"', 'Вкладка "Софинансирование"'),
+    ("Общая сумма расходов:", "Категория"),
+]
+
+
+def legacy_sections(lines):
+    result = []
+    general = extract_between_headers(lines, ['Блок "Общая информация"'], 'Блок "Информация о проекте"')
+    result += [extract_between_headers(general, [start], end) for start, end in GENERAL_FIELDS]
+    project = extract_between_headers(lines, ['Блок "Информация о проекте"'], 'Вкладка "Команда')
+    result += [extract_between_headers(project, [start], end) for start, end in PROJECT_FIELDS]
+    results = extract_between_headers(lines, ['Вкладка "Результаты"'], 'Вкладка "Календарный план"')
+    result.append(extract_between_headers(results, ['Социальный эффект:'], 'Вкладка "Календарный план"'))
+    result += [extract_between_headers(lines, [start], end) for start, end in TABS]
+    return result
+
+
+def indexed_sections(lines):
+    index = SectionIndex(lines)
+    result = []
+    general = index.section(['Блок "Общая информация"'], 'Блок "Информация о проекте"')
+    result += [index.section([start], end, within=general).to_list() for start, end in GENERAL_FIELDS]
+    project = index.section(['Блок "Информация о проекте"'], 'Вкладка "Команда')
+    result += [index.section([start], end, within=project).to_list() for start, end in PROJECT_FIELDS]
+    results = index.section(['Вкладка "Результаты"'], 'Вкладка "Календарный план"')
+    result.append(index.section(['Социальный эффект:'], 'Вкладка "Календарный план"', within=results).to_list())
+    result += [index.section([start], end).to_list() for start, end in TABS]
+    return result
+
+
+def measure(func, lines, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(lines)
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк поиска разделов заявки")
+    parser.add_argument("--scale", type=int, default=1, help="Множитель размера заявки")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+
+    lines = generate_application_lines(
+        team_members=10 * args.scale,
+        calendar_tasks=10 * args.scale,
+        events_per_task=6,
+        expense_records=120 * args.scale,
+        media_resources=12 * args.scale,
+    )
+
+    if legacy_sections(lines) != indexed_sections(lines):
+        raise SystemExit("Результаты SectionIndex расходятся с extract_between_headers")
+
+    legacy_ms = measure(legacy_sections, lines, args.repeat)
+    indexed_ms = measure(indexed_sections, lines, args.repeat)
+    full_ms = measure(lambda l: DataExtractor().extract_from_paragraphs(l), lines, args.repeat)
+
+    print(f"Строк в заявке:            {len(lines)}")
+    print(f"extract_between_headers:   {legacy_ms:8.2f} мс")
+    print(f"SectionIndex:              {indexed_ms:8.2f} мс")
+    print(f"Ускорение поиска разделов: {legacy_ms / indexed_ms:8.1f}x")
+    print(f"Полное извлечение данных:  {full_ms:8.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+# benchmarks/bench_importer.py
+"""
+Бенчмарк и регрессионный корпус импорта DOCX заявок.
+
+Для каждого профиля генерируется синтетическая заявка, полный импорт
+(convert_docx_to_dict + валидация ProjectData) выполняется repeat раз.
+Выводятся p50/p95 по этапам, пиковый RSS процесса и объем выделенной
+памяти по этапам (tracemalloc, отдельным прогоном).
+
+Эталонные результаты лежат в benchmarks/golden: <профиль>.json с результатом
+разбора (UUID заменены на "<uuid>") и baseline.json с p50 полного импорта.
+Расхождение с эталоном или замедление больше --max-slowdown завершает
+бенчмарк с ошибкой.
+
+Запуск из каталога backend:
+    python -m benchmarks.bench_importer --repeat 30
+    python -m benchmarks.bench_importer --profile large --repeat 10
+    python -m benchmarks.bench_importer --team-members 50 --expense-records 500
+    python -m benchmarks.bench_importer --update-golden
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+from benchmarks.synthetic import generate_application_docx
+from src.metrics import percentile
+from src.modules.projects.projects import (
+    REQUIRED_PHRASES,
+    DataExtractor,
+    DocxConverter,
+    DocxTable,
+    convert_docx_to_dict,
+)
+from src.modules.projects.schemas import ProjectData
+from src.modules.projects.utils import process_project_data
+
+GOLDEN_DIR = os.path.join(os.path.dirname(__file__), "golden")
+BASELINE_FILE = os.path.join(GOLDEN_DIR, "baseline.json")
+
+# Профили заявок для корпуса: размеры блоков передаются в generate_application_docx
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "minimal": dict(team_members=0, calendar_tasks=0, expense_records=0,
+                    media_resources=0, partners=0, additional_files=0),
+    "typical": dict(),
+    "tables": dict(tables=True),
+    "large": dict(team_members=20, calendar_tasks=20, events_per_task=6,
+                  expense_records=200, media_resources=24, partners=5, additional_files=10),
+}
+
+STAGES = ("docx load", "text conversion", "structure check", "extraction", "validation")
+
+UUID_PATTERN = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+
+
+def normalize(data: Any) -> Any:
+    """Заменяет случайные UUID записей, чтобы результат можно было сравнить с эталоном."""
+    if isinstance(data, dict):
+        return {key: normalize(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [normalize(item) for item in data]
+    if isinstance(data, str) and UUID_PATTERN.match(data):
+        return "<uuid>"
+    return data
+
+
+def check_structure(lines: List[str]):
+    missing_phrases = [phrase for phrase in REQUIRED_PHRASES if not any(phrase in line for line in lines)]
+    DocxConverter.check_structure(missing_phrases)
+
+
+def validate(data: Dict[str, Any]) -> Dict[str, Any]:
+    # Та же валидация, что и в create_project_from_file
+    return process_project_data(ProjectData(**data))
+
+
+def run_stages(docx_filepath: str, measure: Callable[[str, Callable[[], Any]], Any]) -> Dict[str, Any]:
+    """
+    Выполняет импорт по этапам. Извлечение в DataExtractor само проверяет
+    структуру в том же проходе, отдельный этап показывает цену этой проверки.
+    """
+    converter = DocxConverter(docx_filepath)
+    document = measure("docx load", converter.load)
+    blocks = measure("text conversion", lambda: list(converter.iter_blocks(document)))
+    lines = [line for block in blocks for line in (block.lines() if isinstance(block, DocxTable) else (block,))]
+    measure("structure check", lambda: check_structure(lines))
+    data = measure("extraction", lambda: DataExtractor().extract_from_blocks(blocks))
+    measure("validation", lambda: validate(data))
+    return data
+
+
+def time_stages(docx_filepath: str, repeat: int) -> Tuple[Dict[str, List[float]], List[float]]:
+    timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+
+    def measure(stage: str, func: Callable[[], Any]) -> Any:
+        started = time.perf_counter()
+        result = func()
+        timings[stage].append((time.perf_counter() - started) * 1000)
+        return result
+
+    total = []
+    for _ in range(repeat):
+        run_stages(docx_filepath, measure)
+        # Полный импорт одним вызовом, как его выполняет пул разбора
+        started = time.perf_counter()
+        validate(convert_docx_to_dict(docx_filepath))
+        total.append((time.perf_counter() - started) * 1000)
+    return timings, total
+
+
+def trace_allocations(docx_filepath: str) -> Dict[str, Tuple[float, int]]:
+    """Пик памяти (КБ) и число выделенных блоков на каждом этапе."""
+    allocations: Dict[str, Tuple[float, int]] = {}
+
+    def measure(stage: str, func: Callable[[], Any]) -> Any:
+        before = tracemalloc.take_snapshot()
+        tracemalloc.reset_peak()
+        start_size, _ = tracemalloc.get_traced_memory()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        blocks = sum(stat.count_diff for stat in tracemalloc.take_snapshot().compare_to(before, "filename")
+                     if stat.count_diff > 0)
+        allocations[stage] = ((peak - start_size) / 1024, blocks)
+        return result
+
+    tracemalloc.start()
+    try:
+        run_stages(docx_filepath, measure)
+    finally:
+        tracemalloc.stop()
+    return allocations
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux возвращает килобайты, macOS - байты
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def golden_path(profile: str) -> str:
+    return os.path.join(GOLDEN_DIR, f"{profile}.json")
+
+
+def check_golden(profile: str, data: Dict[str, Any], update: bool) -> bool:
+    normalized = normalize(data)
+    path = golden_path(profile)
+    if update:
+        os.makedirs(GOLDEN_DIR, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as golden_file:
+            json.dump(normalized, golden_file, ensure_ascii=False, indent=2)
+            golden_file.write("\n")
+        return True
+    if not os.path.exists(path):
+        print(f"  эталон {path} не найден, запустите с --update-golden")
+        return True
+    with open(path, encoding="utf-8") as golden_file:
+        if json.load(golden_file) == normalized:
+            return True
+    print(f"  РЕЗУЛЬТАТ РАЗБОРА ОТЛИЧАЕТСЯ ОТ ЭТАЛОНА {path}")
+    return False
+
+
+def run_profile(name: str, options: Dict[str, Any], repeat: int, directory: str) -> Tuple[Dict[str, Any], float]:
+    docx_filepath = os.path.join(directory, f"{name}.docx")
+    with open(docx_filepath, "wb") as docx_file:
+        docx_file.write(generate_application_docx(**options))
+
+    data = convert_docx_to_dict(docx_filepath)
+    timings, total = time_stages(docx_filepath, repeat)
+    allocations = trace_allocations(docx_filepath)
+    p50 = percentile(total, 0.5)
+
+    print(f"\n{name}: {os.path.getsize(docx_filepath) / 1024:.0f} КБ, повторов: {repeat}")
+    print(f"  {'этап':<18}{'p50, мс':>10}{'p95, мс':>10}{'пик, КБ':>12}{'блоков':>10}")
+    for stage in STAGES:
+        peak_kb, blocks = allocations[stage]
+        print(f"  {stage:<18}{percentile(timings[stage], 0.5):>10.2f}{percentile(timings[stage], 0.95):>10.2f}"
+              f"{peak_kb:>12.0f}{blocks:>10}")
+    print(f"  {'полный импорт':<18}{p50:>10.2f}{percentile(total, 0.95):>10.2f}")
+    print(f"  пиковый RSS процесса: {peak_rss_mb():.1f} МБ")
+    return data, p50
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк и регрессионный корпус импорта DOCX заявок")
+    parser.add_argument("--profile", action="append", choices=sorted(PROFILES),
+                        help="Профиль заявки (по умолчанию все)")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--update-golden", action="store_true", help="Перезаписать эталоны и baseline")
+    parser.add_argument("--max-slowdown", type=float, default=1.5,
+                        help="Допустимое замедление полного импорта относительно baseline")
+    # Произвольный размер заявки: результат не сравнивается с эталоном
+    for option in ("team-members", "calendar-tasks", "events-per-task", "expense-records", "media-resources"):
+        parser.add_argument(f"--{option}", type=int)
+    parser.add_argument("--tables", action="store_true", help="Команда, план и расходы таблицами")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    custom = {
+        key: value for key, value in vars(args).items()
+        if key in ("team_members", "calendar_tasks", "events_per_task", "expense_records", "media_resources")
+        and value is not None
+    }
+    if custom or args.tables:
+        profiles = {"custom": dict(custom, tables=args.tables)}
+    else:
+        profiles = {name: PROFILES[name] for name in (args.profile or PROFILES)}
+
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        for name, options in profiles.items():
+            data, p50 = run_profile(name, options, args.repeat, directory)
+            if name == "custom":
+                continue
+
+            if not check_golden(name, data, args.update_golden):
+                failed = True
+
+            if args.update_golden:
+                baseline[name] = round(p50, 2)
+            elif name in baseline and p50 > baseline[name] * args.max_slowdown:
+                print(f"  ЗАМЕДЛЕНИЕ: p50 {p50:.2f} мс при baseline {baseline[name]:.2f} мс")
+                failed = True
+
+    if args.update_golden:
+        with open(BASELINE_FILE, "w", encoding="utf-8") as baseline_file:
+            json.dump(baseline, baseline_file, ensure_ascii=False, indent=2)
+            baseline_file.write("\n")
+
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# benchmarks/bench_pagination.py
+"""
+Бенчмарк пагинации: skip/limit против курсора по ключу сортировки.
+
+В отдельную базу MongoDB записываются --documents небольших документов, затем
+страницы с номерами из --pages читаются двумя способами с той же сортировкой
+по _id: через skip((page - 1) * limit) и через keyset_filter от курсора
+предыдущей страницы (как в src.pagination.find_page). Время skip растет
+с номером страницы, время курсора от номера страницы не зависит.
+
+Запуск из каталога backend (нужен доступный MongoDB):
+    python -m benchmarks.bench_pagination
+    python -m benchmarks.bench_pagination --documents 200000 --pages 1 10 100 1000 5000
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+from pymongo import ASCENDING, MongoClient
+
+from src.config import settings
+from src.metrics import percentile
+from src.pagination import decode_cursor, encode_cursor, keyset_filter
+
+SORT = [("_id", ASCENDING)]
+
+
+def populate(collection, count: int, batch_size: int = 1000):
+    collection.drop()
+    batch: List[Dict[str, Any]] = []
+    for number in range(count):
+        batch.append({"project_name": f"Проект {number}", "author_name": f"Автор {number}",
+                      "update_date": datetime.utcnow()})
+        if len(batch) == batch_size:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+
+def cursor_before_page(collection, page: int, limit: int) -> str:
+    # Курсор, который клиент получил бы вместе с предыдущей страницей
+    last = collection.find({}, {"_id": 1}).sort(SORT).skip((page - 1) * limit - 1).limit(1).next()
+    return encode_cursor(last, SORT)
+
+
+def measure(collection, page: int, limit: int, repeats: int) -> Dict[str, float]:
+    skip_timings, keyset_timings = [], []
+    cursor = cursor_before_page(collection, page, limit) if page > 1 else None
+    for _ in range(repeats):
+        started = time.perf_counter()
+        list(collection.find({}).sort(SORT).skip((page - 1) * limit).limit(limit))
+        skip_timings.append((time.perf_counter() - started) * 1000)
+
+        started = time.perf_counter()
+        query = keyset_filter({}, SORT, decode_cursor(cursor, SORT)) if cursor else {}
+        list(collection.find(query).sort(SORT).limit(limit))
+        keyset_timings.append((time.perf_counter() - started) * 1000)
+    return {"skip": percentile(skip_timings, 0.5), "keyset": percentile(keyset_timings, 0.5)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк пагинации skip/limit и курсором")
+    parser.add_argument("--mongodb-url", default=settings.mongodb_url)
+    parser.add_argument("--database", default="bench_pagination")
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000, 5000])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--keep", action="store_true", help="Не удалять тестовую базу после замера")
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongodb_url)
+    collection = client[args.database]["projects_data"]
+    try:
+        print(f"Заполнение {args.documents} документов...")
+        populate(collection, args.documents)
+
+        pages = [page for page in args.pages if (page - 1) * args.limit < args.documents]
+        print(f"\nдокументов: {args.documents}, страница: {args.limit}, повторов: {args.repeats}")
+        print(f"  {'страница':>10}{'skip p50, мс':>16}{'курсор p50, мс':>18}")
+        for page in pages:
+            result = measure(collection, page, args.limit, args.repeats)
+            print(f"  {page:>10}{result['skip']:>16.2f}{result['keyset']:>18.2f}")
+    finally:
+        if not args.keep:
+            client.drop_database(args.database)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+# benchmarks/bench_project_listing.py
+"""
+Бенчмарк списков проектов: полный документ против SUMMARY_PROJECTION.
+
+В отдельную базу MongoDB записываются --projects проектов, собранных из синтетической
+заявки так же, как create_project_from_file. Затем одни и те же страницы списка
+читаются целиком и с проекцией; для каждого режима выводятся p50/p95 времени
+страницы и объем документов, полученных от сервера (размер BSON).
+
+Запуск из каталога backend (нужен доступный MongoDB):
+    python -m benchmarks.bench_project_listing
+    python -m benchmarks.bench_project_listing --projects 10000 --pages 300 --page-size 20
+"""
+import argparse
+import logging
+import random
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from bson.raw_bson import RawBSONDocument
+from pymongo import MongoClient
+
+from benchmarks.bench_importer import validate
+from benchmarks.synthetic import generate_application_paragraphs
+from src.config import settings
+from src.metrics import percentile
+from src.modules.projects.projects import DataExtractor
+from src.modules.projects.schemas import ProjectFICPerson
+from src.modules.projects.utils import SUMMARY_PROJECTION
+
+
+def build_project(processed: Dict[str, Any], number: int) -> Dict[str, Any]:
+    project = ProjectFICPerson(
+        create_date=datetime.utcnow(),
+        update_date=datetime.utcnow(),
+        assigned_event_id=None,
+        author_id=str(ObjectId()),
+        author_name=f"{processed.get('author_name')} {number}",
+        project_name=f"{processed.get('project_name')} {number}",
+        project_template="ФИЗ_ЛИЦО",
+        region=processed.get("region"),
+        logo=None,
+        contacts=processed.get("contacts"),
+        project_data_tabs=processed.get("project_data_tabs", {}),
+        reviews=[]
+    ).dict()
+    return project
+
+
+def populate(collection, count: int, batch_size: int = 500):
+    lines = [text + "\n" for text in generate_application_paragraphs()]
+    processed = validate(DataExtractor().extract_from_paragraphs(lines))
+
+    collection.drop()
+    batch: List[Dict[str, Any]] = []
+    for number in range(count):
+        batch.append(build_project(processed, number))
+        if len(batch) == batch_size:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+
+
+def measure(collection, pages: List[int], page_size: int, projection: Optional[Dict[str, int]]) -> Dict[str, Any]:
+    timings = []
+    sizes = []
+    for page in pages:
+        started = time.perf_counter()
+        documents = list(collection.find({}, projection).skip(page * page_size).limit(page_size))
+        timings.append((time.perf_counter() - started) * 1000)
+        sizes.append(sum(len(document.raw) for document in documents))
+    return {
+        "p50": percentile(timings, 0.5),
+        "p95": percentile(timings, 0.95),
+        "bytes_per_page": sum(sizes) / len(sizes),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк проекции списков проектов")
+    parser.add_argument("--mongodb-url", default=settings.mongodb_url)
+    parser.add_argument("--database", default="bench_project_listing")
+    parser.add_argument("--projects", type=int, default=10000)
+    parser.add_argument("--page-size", type=int, default=10)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--keep", action="store_true", help="Не удалять тестовую базу после замера")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    client = MongoClient(args.mongodb_url, document_class=RawBSONDocument)
+    collection = client[args.database]["projects_data"]
+    try:
+        print(f"Заполнение {args.projects} проектов...")
+        populate(collection, args.projects)
+
+        last_page = max(1, args.projects // args.page_size)
+        pages = [random.randrange(last_page) for _ in range(args.pages)]
+        # Прогрев кеша сервера, чтобы оба режима читали из памяти
+        measure(collection, pages, args.page_size, None)
+
+        results = {
+            "полный документ": measure(collection, pages, args.page_size, None),
+            "SUMMARY_PROJECTION": measure(collection, pages, args.page_size, SUMMARY_PROJECTION),
+        }
+        print(f"\nпроектов: {args.projects}, страница: {args.page_size}, страниц: {args.pages}")
+        print(f"  {'режим':<22}{'p50, мс':>10}{'p95, мс':>10}{'КБ/страница':>14}")
+        for mode, result in results.items():
+            print(f"  {mode:<22}{result['p50']:>10.2f}{result['p95']:>10.2f}{result['bytes_per_page'] / 1024:>14.1f}")
+
+        full, summary = results["полный документ"], results["SUMMARY_PROJECTION"]
+        print(f"  объем меньше в {full['bytes_per_page'] / summary['bytes_per_page']:.1f} раза, "
+              f"p50 меньше в {full['p50'] / summary['p50']:.1f} раза")
+    finally:
+        if not args.keep:
+            client.drop_database(args.database)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+# benchmarks/bench_search.py
+"""
+Бенчмарк поиска по ФИО: регулярное выражение против поисковых токенов src/search.py.
+
+В отдельную базу MongoDB записываются --documents профилей со случайными ФИО
+и токенами search_fields, создается индекс по search_tokens.full_name. Затем
+одни и те же запросы (начала фамилий и имен) выполняются тремя способами:
+$regex без учета регистра (как раньше), фильтр по токенам и фильтр по токенам
+с сортировкой по релевантности, как в find_page. Выводятся p50/p95 времени
+получения первой страницы.
+
+Запуск из каталога backend (нужен доступный MongoDB):
+    python -m benchmarks.bench_search
+    python -m benchmarks.bench_search --documents 100000 --queries 200
+"""
+import argparse
+import random
+import time
+from typing import Any, Dict, List
+
+from pymongo import ASCENDING, DESCENDING, MongoClient
+
+from src.config import settings
+from src.metrics import percentile
+from src.search import SCORE_FIELD, SearchQuery, search_fields
+
+LAST_NAMES = ["Иванов", "Петров", "Сидоров", "Ёлкин", "Смирнов", "Кузнецов", "Попов", "Васильев",
+              "Соколов", "Михайлов", "Новиков", "Фёдоров", "Морозов", "Волков", "Алексеев", "Лебедев"]
+FIRST_NAMES = ["Иван", "Пётр", "Алексей", "Сергей", "Дмитрий", "Андрей", "Михаил", "Артём", "Никита"]
+MIDDLE_NAMES = ["Иванович", "Петрович", "Сергеевич", "Андреевич", "Михайлович", "Алексеевич"]
+
+
+def populate(collection, count: int, batch_size: int = 1000):
+    collection.drop()
+    batch: List[Dict[str, Any]] = []
+    for number in range(count):
+        profile = {"user_id": str(number),
+                   "full_name": f"{random.choice(LAST_NAMES)}{number % 997} {random.choice(FIRST_NAMES)} "
+                                f"{random.choice(MIDDLE_NAMES)}"}
+        profile.update(search_fields("profile_data", profile))
+        batch.append(profile)
+        if len(batch) == batch_size:
+            collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+    collection.create_index([("search_tokens.full_name", ASCENDING)])
+
+
+def timed(run) -> float:
+    started = time.perf_counter()
+    run()
+    return (time.perf_counter() - started) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк поиска по ФИО")
+    parser.add_argument("--mongodb-url", default=settings.mongodb_url)
+    parser.add_argument("--database", default="bench_search")
+    parser.add_argument("--documents", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--keep", action="store_true", help="Не удалять тестовую базу после замера")
+    args = parser.parse_args()
+
+    client = MongoClient(args.mongodb_url)
+    collection = client[args.database]["profile_data"]
+    try:
+        print(f"Заполнение {args.documents} профилей...")
+        populate(collection, args.documents)
+
+        queries = [f"{random.choice(LAST_NAMES)}{random.randrange(997)} {random.choice(FIRST_NAMES)[:3]}"
+                   for _ in range(args.queries)]
+        timings: Dict[str, List[float]] = {"$regex": [], "токены": [], "токены + релевантность": []}
+        for text in queries:
+            search = SearchQuery("profile_data").add("full_name", text)
+            pattern = ".*".join(text.split())
+            timings["$regex"].append(timed(lambda: list(
+                collection.find({"full_name": {"$regex": pattern, "$options": "i"}}).sort("_id", ASCENDING)
+                .limit(args.limit))))
+            timings["токены"].append(timed(lambda: list(
+                collection.find(search.filter()).sort("_id", ASCENDING).limit(args.limit))))
+            timings["токены + релевантность"].append(timed(lambda: list(collection.aggregate([
+                {"$match": search.filter()},
+                {"$addFields": {SCORE_FIELD: search.score()}},
+                {"$sort": {SCORE_FIELD: DESCENDING, "_id": ASCENDING}},
+                {"$limit": args.limit},
+            ]))))
+
+        print(f"\nпрофилей: {args.documents}, запросов: {args.queries}, страница: {args.limit}")
+        print(f"  {'способ':<26}{'p50, мс':>10}{'p95, мс':>10}")
+        for mode, values in timings.items():
+            print(f"  {mode:<26}{percentile(values, 0.5):>10.2f}{percentile(values, 0.95):>10.2f}")
+    finally:
+        if not args.keep:
+            client.drop_database(args.database)
+        client.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+# benchmarks/synthetic.py
+"""
+Генератор синтетических заявок в текстовом формате шаблона "ФИЗ_ЛИЦО".
+Строки совпадают с тем, что DocxConverter пишет в TXT (по абзацу на строку).
+"""
+import io
+from typing import Dict, List
+
+from docx import Document
+
+EXPENSE_CATEGORIES = [
+    "Сайт / приложение",
+    "Расходы на связь",
+    "Канцелярия и расходные материалы",
+    "Полиграфическая продукция",
+    "Подарки, сувенирная продукция",
+    "Проживание и питание",
+    "Транспортные расходы",
+    "Аренда помещений",
+    "Аренда оборудования",
+    "Информационные услуги",
+    "Закупка оборудования",
+    "Дополнительные услуги и товары для проекта",
+    "Расходы на ПО",
+]
+
+FILLER = (
+    "Проект направлен на развитие управленческих компетенций руководителей "
+    "студенческих отрядов и формирование кадрового резерва движения."
+)
+
+
+def paragraph(sentences: int = 3) -> str:
+    return " ".join([FILLER] * sentences)
+
+
+def generate_application_paragraphs(
+    team_members: int = 5,
+    calendar_tasks: int = 6,
+    events_per_task: int = 4,
+    expense_records: int = 40,
+    media_resources: int = 6,
+    partners: int = 2,
+    additional_files: int = 3,
+) -> List[str]:
+    """Возвращает абзацы заявки (без символов перевода строки)."""
+    p: List[str] = []
+
+    p += [
+        'Вкладка "Общее"',
+        'Блок "Общая информация"',
+        "ФИО: Иванов Иван Иванович",
+        "Контакты: +7 (900) 000-00-00, ivanov@example.com",
+        "Регион проекта: Санкт-Петербург город",
+        "Название проекта: Школа командных составов студенческих отрядов",
+        "Масштаб реализации проекта:",
+        "Региональный",
+        "Дата начала и окончания проекта:",
+        "01.2024 - 06.2024",
+        'Блок "Дополнительная информация об авторе проекта"',
+        "Опыт автора проекта:",
+        paragraph(8),
+        "Описание функционала автора проекта:",
+        paragraph(6),
+        "Адрес регистрации автора проекта:",
+        "Санкт-Петербург, наб. Обводного канала, дом 57",
+        "Добавить резюме:",
+        "resume.pdf",
+        "Видео-визитка (ссылка на ролик на любом видеохостинге):",
+        "https://rutube.ru/video/private/example/",
+        "",
+    ]
+
+    task_names = [f"Задача проекта № {t + 1}" for t in range(calendar_tasks)]
+    p += [
+        'Вкладка "О проекте"',
+        'Блок "Информация о проекте"',
+        "Краткая информация о проекте:",
+        paragraph(5),
+        "Описание проблемы, решению/снижению которой посвящен проект:",
+        paragraph(10),
+        "Основные целевые группы, на которые направлен проект:",
+        paragraph(4),
+        "Основная цель проекта:",
+        paragraph(3),
+        "Опыт успешной реализации проекта:",
+        paragraph(6),
+        "Перспектива развития и потенциал проекта:",
+        paragraph(6),
+        'Блок "Задачи"',
+    ]
+    p += [f"Поставленная задача: {name}" for name in task_names]
+    p += [
+        'Блок "География проекта"',
+        "Выберите регион или федеральный округ: Санкт-Петербург город",
+        "Адрес: Санкт-Петербург, Невский проспект, дом 1",
+    ]
+
+    p.append('Вкладка "Команда"')
+    for m in range(team_members):
+        p += [
+            f"ФИО наставника: Петров Пётр Петрович {m + 1}",
+            f"E-mail наставника: mentor{m + 1}@example.com",
+            "Роль в проекте: Консультант",
+            "Компетенции, опыт, подтверждающие возможность участника выполнять роль в команде: " + paragraph(2),
+        ]
+
+    p += [
+        'Вкладка "Результаты"',
+        "Дата плановых значений: 30.06.2024",
+        f"Количество мероприятий: {calendar_tasks * events_per_task}",
+        "Дата итоговых значений: 30.06.2024",
+        "Количество участников: 570",
+        "Количество публикаций: 11",
+        "Количество просмотров: 14000",
+        "Социальный эффект:",
+        paragraph(5),
+    ]
+
+    p.append('Вкладка "Календарный план"')
+    for name in task_names:
+        p.append(f"Поставленная задача: {name}")
+        for e in range(events_per_task):
+            p += [
+                f"Название мероприятия: Мероприятие {e + 1}",
+                "Крайняя дата выполнения: 31.01.2024",
+                "Описание мероприятия: " + paragraph(3),
+                "Количество уникальных участников: 10",
+                "Количество повторяющихся участников: 5",
+                "Количество публикаций: 1",
+                "Количество просмотров: 2000",
+                "Дополнительная информация: " + paragraph(2),
+                paragraph(1),
+            ]
+
+    p.append('Вкладка "Медиа"')
+    for r in range(media_resources):
+        p += [
+            "Вид ресурса: Социальные сети",
+            f"Месяц публикации: {r % 12 + 1:02d}.2024",
+            "Планируемое количество просмотров: 10000",
+            "Ссылки на ресурсы: https://vk.com/example",
+            "https://t.me/example",
+            "Почему выбран такой формат медиа: " + paragraph(3),
+        ]
+
+    p += [
+        'Вкладка "Расходы"',
+        "Общая сумма расходов:",
+        "793 200,00 руб.",
+    ]
+    per_category = max(1, expense_records // len(EXPENSE_CATEGORIES))
+    written = 0
+    for category in EXPENSE_CATEGORIES:
+        if written >= expense_records:
+            break
+        p += [f'Категория "{category}"', 'Тип "Товар"']
+        for r in range(min(per_category, expense_records - written)):
+            written += 1
+            p += [
+                f"Запись № {written}",
+                f"Название: Позиция {written}",
+                "Описание: " + paragraph(1),
+                "Количество: 10",
+                "Цена: 100",
+                "Сумма: 1000",
+            ]
+
+    p += [
+        'Вкладка "Софинансирование"',
+        'Блок "Собственные средства"',
+        "Перечень расходов: " + paragraph(2),
+        "Добавить:",
+        "Сумма, руб.: 130000",
+        "Файл:",
+    ]
+    for n in range(partners):
+        p += [
+            'Блок "Партнер"',
+            f"Название партнера: Партнёр {n + 1}",
+            "Тип поддержки: Организационная",
+            "Перечень расходов: " + paragraph(1),
+            "Сумма, руб.: 50000",
+        ]
+
+    p.append('Вкладка "Доп. Файлы"')
+    for f in range(additional_files):
+        p += [
+            f"Описание файла: Дополнительный файл {f + 1}",
+            f"Выберете файл: file_{f + 1}.pdf",
+        ]
+
+    return p
+
+
+def generate_application_lines(**kwargs) -> List[str]:
+    """Строки в том виде, в котором их возвращает readlines() для TXT файла."""
+    return [text + "\n" for text in generate_application_paragraphs(**kwargs)]
+
+
+def generate_block_tables(
+    team_members: int = 5,
+    calendar_tasks: int = 6,
+    events_per_task: int = 4,
+    expense_records: int = 40,
+    **kwargs,
+) -> Dict[str, List[List[str]]]:
+    """Таблицы команды, календарного плана и расходов с теми же данными, что и в абзацах."""
+    team = [["ФИО наставника", "E-mail наставника", "Роль в проекте",
+             "Компетенции, опыт, подтверждающие возможность участника выполнять роль в команде"]]
+    team += [
+        [f"Петров Пётр Петрович {m + 1}", f"mentor{m + 1}@example.com", "Консультант", paragraph(2)]
+        for m in range(team_members)
+    ]
+
+    calendar = [["Поставленная задача", "Название мероприятия", "Крайняя дата выполнения",
+                 "Описание мероприятия", "Количество уникальных участников",
+                 "Количество повторяющихся участников", "Количество публикаций", "Количество просмотров"]]
+    calendar += [
+        [f"Задача проекта № {t + 1}", f"Мероприятие {e + 1}", "31.01.2024", paragraph(3), "10", "5", "1", "2000"]
+        for t in range(calendar_tasks)
+        for e in range(events_per_task)
+    ]
+
+    expenses = [["Категория", "Тип", "Название", "Описание", "Количество", "Цена", "Сумма"]]
+    expenses += [
+        [EXPENSE_CATEGORIES[r % len(EXPENSE_CATEGORIES)], "Товар", f"Позиция {r + 1}", paragraph(1), "10", "100", "1000"]
+        for r in range(expense_records)
+    ]
+
+    return {'Вкладка "Команда"': team, 'Вкладка "Календарный план"': calendar, "793 200,00 руб.": expenses}
+
+
+def generate_application_docx(tables: bool = False, **kwargs) -> bytes:
+    """
+    DOCX файл заявки, собранный из синтетических абзацев.
+    При tables=True команда, календарный план и расходы записываются таблицами.
+    """
+    document = Document()
+    if not tables:
+        for text in generate_application_paragraphs(**kwargs):
+            document.add_paragraph(text)
+    else:
+        # Абзацы блоков заменяются таблицами, остальные абзацы те же
+        empty_blocks = dict(kwargs, team_members=0, calendar_tasks=0, expense_records=0)
+        block_tables = generate_block_tables(**kwargs)
+        for text in generate_application_paragraphs(**empty_blocks):
+            document.add_paragraph(text)
+            rows = block_tables.get(text)
+            if rows is not None and len(rows) > 1:
+                table = document.add_table(rows=len(rows), cols=len(rows[0]))
+                for cells, row in zip(table.rows, rows):
+                    for cell, value in zip(cells.cells, row):
+                        cell.text = value
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
@@ -1,4 +1,5 @@
 # src/config.py
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -12,6 +13,77 @@ class Settings(BaseSettings):
     access_token_expire_minutes: int
     refresh_token_expire_days: int
 
+    # Яндекс OAuth
+    yandex_oauth_url: str = "https://login.yandex.ru"  # Адрес сервера OAuth (можно указать локальный мок)
+    yandex_connect_timeout: float = 3.0  # Таймаут подключения в секундах
+    yandex_read_timeout: float = 5.0  # Таймаут чтения ответа в секундах
+    yandex_retries: int = 2  # Количество повторов при сетевой ошибке или ответе 5xx
+    yandex_retry_backoff: float = 0.2  # Базовая задержка между повторами в секундах
+    yandex_user_info_ttl: int = 3600  # Максимальное время хранения данных пользователя по токену в секундах
+    yandex_user_info_fallback_ttl: int = 60  # Время хранения, если срок действия токена неизвестен
+    yandex_user_info_cache_size: int = 10000  # Максимальное количество токенов в кеше
+
+    # Хеширование паролей
+    bcrypt_rounds: int = 12  # Число раундов bcrypt; хеши с другим значением пересчитываются при входе
+    password_hasher_workers: int = 2  # Количество потоков для bcrypt
+    password_hasher_queue_size: int = 32  # Сколько операций может ждать свободного потока
+    password_hasher_timeout: float = 5.0  # Максимальное время ожидания и выполнения одной операции в секундах
+    password_hasher_retry_after: int = 2  # Значение заголовка Retry-After при перегрузке
+
+    # Кеш расшифрованных access токенов
+    token_cache_size: int = 10000  # Максимальное количество токенов в кеше (0 - кеш выключен)
+
+    # Сессии пользователей
+    session_cache_size: int = 10000  # Максимальное количество сессий в кеше
+    session_stats_interval: float = 300.0  # Интервал сбора статистики коллекции сессий в секундах
+    session_cache_ttl: float = 30.0  # Через сколько секунд сессия из кеша перечитывается из MongoDB
+
+    # Кеш разрешений ролей
+    role_permissions_ttl: int = 60  # Время жизни записи кеша в секундах
+    role_permissions_poll_interval: float = 2.0  # Интервал проверки версии ролей без change stream
+
+    # Клиент MongoDB
+    mongodb_max_pool_size: int = 100  # Максимальное количество соединений в пуле
+    mongodb_min_pool_size: int = 10  # Соединения, открываемые при старте и удерживаемые в пуле
+    mongodb_max_idle_time_ms: int = 300000  # Время простоя, после которого соединение закрывается
+    mongodb_wait_queue_timeout_ms: int = 5000  # Максимальное ожидание свободного соединения
+    mongodb_connect_timeout_ms: int = 5000  # Таймаут подключения
+    mongodb_server_selection_timeout_ms: int = 10000  # Таймаут выбора сервера
+    mongodb_socket_timeout_ms: int = 30000  # Таймаут операции на сокете
+    mongodb_compressors: Literal["", "zlib"] = ""  # Сжатие трафика: "zlib" или пусто (без сжатия)
+    mongodb_read_preference: str = "primary"
+    mongodb_read_concern: str = ""  # Уровень read concern ("local", "majority"); пусто - по умолчанию сервера
+    mongodb_write_concern: str = "1"  # Значение w: число узлов или "majority"
+    mongodb_journal: Optional[bool] = None  # Подтверждать запись только после записи в журнал
+
+    # Пул разбора DOCX файлов
+    parser_pool_kind: str = "process"  # "process" или "thread"
+    parser_pool_workers: int = 2  # Количество воркеров пула
+    parser_pool_queue_size: int = 8  # Сколько файлов может ждать свободного воркера
+    parser_job_timeout: int = 120  # Максимальное время разбора одного файла в секундах
+    parser_retry_after: int = 10  # Значение заголовка Retry-After при переполнении очереди
+    parser_debug_artifacts: bool = False  # Сохранять TXT и JSON промежуточные файлы для отладки
+    parse_cache_enabled: bool = True  # Кешировать результаты разбора по хешу содержимого файла
+
+    # Загрузка файлов заявок
+    upload_max_size: int = 20 * 1024 * 1024  # Максимальный размер загружаемого DOCX файла в байтах (и файла из архива)
+
+    # Фоновый импорт проектов из файлов
+    import_workers: int = 2  # Количество одновременно обрабатываемых задач импорта
+    import_poll_interval: float = 2.0  # Интервал опроса очереди задач в секундах
+    import_job_max_attempts: int = 3  # Максимальное число попыток обработки задачи
+
+    # Пакетный импорт проектов из ZIP архива
+    bulk_import_max_archive_size: int = 500 * 1024 * 1024  # Максимальный размер архива в байтах
+    bulk_import_max_files: int = 500  # Максимальное количество DOCX файлов в архиве
+    bulk_import_max_total_size: int = 1024 * 1024 * 1024  # Максимальный суммарный размер распакованных DOCX файлов в байтах
+    bulk_import_batch_size: int = 100  # Размер пачки для insert_many
+
+    # Общее количество документов в списках (X-Total-Count)
+    count_cache_ttl: float = 15.0  # Время жизни подсчета по фильтру в секундах
+    count_cache_size: int = 1000  # Максимальное количество фильтров в кеше (0 - кеш выключен)
+    count_approximate_limit: int = 10000  # Предел подсчета в приблизительном режиме
+
     class Config:
         env_file = ".env"
 
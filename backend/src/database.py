@@ -1,11 +1,107 @@
 # src/database.py
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Dict, List, Tuple
 
-from motor.motor_asyncio import AsyncIOMotorClient
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo import monitoring
 from .config import settings
+from .metrics import register_metrics, percentile
 
-# Создаем асинхронный клиент для подключения к MongoDB
-# Здесь указываем адрес и порт сервера MongoDB
-client = AsyncIOMotorClient(settings.mongodb_url)
+logger = logging.getLogger(__name__)
+
+
+class ConnectionPoolMonitor(monitoring.ConnectionPoolListener):
+    """
+    Статистика пула соединений MongoDB: время ожидания свободного соединения,
+    число выданных соединений и ошибок выдачи. События приходят из потоков
+    драйвера, поэтому используются только атомарные операции над deque и счетчиками.
+    """
+
+    def __init__(self):
+        self._checkout_waits = deque(maxlen=5000)
+        self._counters = {"created": 0, "closed": 0, "checked_out": 0, "checked_in": 0, "checkout_failed": 0}
+
+    def connection_checked_out(self, event):
+        self._counters["checked_out"] += 1
+        self._checkout_waits.append(event.duration)
+
+    def connection_check_out_failed(self, event):
+        self._counters["checkout_failed"] += 1
+
+    def connection_checked_in(self, event):
+        self._counters["checked_in"] += 1
+
+    def connection_created(self, event):
+        self._counters["created"] += 1
+
+    def connection_closed(self, event):
+        self._counters["closed"] += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        logger.warning(f"Пул соединений MongoDB {event.address} очищен")
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def stats(self) -> Dict[str, Any]:
+        waits = list(self._checkout_waits)
+        return {
+            "max_pool_size": settings.mongodb_max_pool_size,
+            "min_pool_size": settings.mongodb_min_pool_size,
+            "in_use": self._counters["checked_out"] - self._counters["checked_in"],
+            "open": self._counters["created"] - self._counters["closed"],
+            **self._counters,
+            "checkout_wait_p50": percentile(waits, 0.5),
+            "checkout_wait_p95": percentile(waits, 0.95),
+            "checkout_wait_max": max(waits) if waits else None,
+        }
+
+
+def client_options() -> Dict[str, Any]:
+    """Параметры пула, таймаутов, сжатия и гарантий чтения/записи из Settings."""
+    options: Dict[str, Any] = {
+        "maxPoolSize": settings.mongodb_max_pool_size,
+        "minPoolSize": settings.mongodb_min_pool_size,
+        "maxIdleTimeMS": settings.mongodb_max_idle_time_ms,
+        "waitQueueTimeoutMS": settings.mongodb_wait_queue_timeout_ms,
+        "connectTimeoutMS": settings.mongodb_connect_timeout_ms,
+        "serverSelectionTimeoutMS": settings.mongodb_server_selection_timeout_ms,
+        "socketTimeoutMS": settings.mongodb_socket_timeout_ms,
+        "readPreference": settings.mongodb_read_preference,
+        "w": int(settings.mongodb_write_concern) if settings.mongodb_write_concern.isdigit() else settings.mongodb_write_concern,
+    }
+    if settings.mongodb_journal is not None:
+        options["journal"] = settings.mongodb_journal
+    if settings.mongodb_read_concern:
+        options["readConcernLevel"] = settings.mongodb_read_concern
+    if settings.mongodb_compressors:
+        # Только zlib: он входит в стандартную библиотеку, для zstd и snappy нужны пакеты не из requirements.txt
+        options["compressors"] = settings.mongodb_compressors
+    return options
+
+
+pool_monitor = ConnectionPoolMonitor()
+register_metrics("mongodb_pool", pool_monitor.stats)
+
+# Создаем асинхронный клиент для подключения к MongoDB.
+# Соединения открываются при первом запросе; warm_up в lifespan приложения
+# открывает их до приема трафика, close_client закрывает при остановке
+client = AsyncIOMotorClient(settings.mongodb_url, event_listeners=[pool_monitor], **client_options())
 
 #----------------------------------------------------------------------------------------------------
 
@@ -23,6 +119,9 @@ user_roles_collection = user_accounts_db["user_roles"]
 # Создаем коллекцию для хранения сессий пользователей
 user_sessions_collection = user_accounts_db["session"]
 
+# Создаем коллекцию для счетчиков версий данных, кешируемых в памяти воркеров
+cache_versions_collection = user_accounts_db["cache_versions"]
+
 #----------------------------------------------------------------------------------------------------
 
 # Подключаемся к базе данных для хранения контента приложения
@@ -34,8 +133,99 @@ profile_data_collection = content_storage_db["profile_data"]
 # Создаем коллекцию для хранения данных мероприятий
 events_data_collection = content_storage_db["events_data"]
 
+# Создаем коллекцию для участников, экспертов, менеджеров и зрителей мероприятий
+event_members_collection = content_storage_db["event_members"]
+
 # Создаем коллекцию для хранения данных проектов
 projects_data_collection = content_storage_db["projects_data"]
 
 # Создаем коллекцию для хранения данных проектов
 reviews_data_collection = content_storage_db["review_data"]
+
+# Создаем коллекцию для хранения задач импорта проектов из файлов
+import_jobs_collection = content_storage_db["import_jobs"]
+
+# Создаем коллекцию для кеша результатов разбора файлов заявок
+parse_cache_collection = content_storage_db["parse_cache"]
+
+#----------------------------------------------------------------------------------------------------
+
+# Реестр индексов: коллекция -> индексы, которые создаются при старте приложения.
+# Отчет о расхождениях с базой: python -m src.index_report
+INDEXES: List[Tuple[AsyncIOMotorCollection, List[IndexModel]]] = [
+    (authorization_accounts_collection, [
+        # Уникальность email делает регистрацию безопасной при одновременных запросах;
+        # учетные записи без входа по email в индекс не попадают
+        IndexModel([("email_user_account.email_login", ASCENDING)], unique=True,
+                   partialFilterExpression={"email_user_account.email_login": {"$type": "string"}}),
+        IndexModel([("yandex_user_account.email_ya", ASCENDING)]),
+    ]),
+    (user_roles_collection, [
+        IndexModel([("name", ASCENDING)], unique=True),
+    ]),
+    (user_sessions_collection, [
+        # TTL индекс: MongoDB удаляет сессию после expires_at
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+        IndexModel([("user_id", ASCENDING)]),
+    ]),
+    (profile_data_collection, [
+        IndexModel([("user_id", ASCENDING)], unique=True),
+        IndexModel([("role_name", ASCENDING)]),
+        # Поисковые токены (src/search.py)
+        IndexModel([("search_tokens.full_name", ASCENDING)]),
+        IndexModel([("search_tokens.yandex", ASCENDING)]),
+    ]),
+    (projects_data_collection, [
+        IndexModel([("author_id", ASCENDING)]),
+        IndexModel([("assigned_event_id", ASCENDING)]),
+        IndexModel([("search_tokens.project_name", ASCENDING)]),
+        IndexModel([("search_tokens.author_name", ASCENDING)]),
+    ]),
+    (events_data_collection, [
+        # Порядок списка мероприятий и курсор страниц
+        IndexModel([("date", DESCENDING), ("_id", DESCENDING)]),
+        IndexModel([("search_tokens.event_full_title", ASCENDING)]),
+        IndexModel([("search_tokens.event_venue", ASCENDING)]),
+    ]),
+    (event_members_collection, [
+        # Один пользователь в одной роли на мероприятии; индекс также выбирает состав роли
+        IndexModel([("event_id", ASCENDING), ("role", ASCENDING), ("user_id", ASCENDING)], unique=True),
+        # Постраничный вывод состава роли в порядке добавления
+        IndexModel([("event_id", ASCENDING), ("role", ASCENDING), ("_id", ASCENDING)]),
+        # Мероприятия пользователя в роли (например, эксперта)
+        IndexModel([("user_id", ASCENDING), ("role", ASCENDING)]),
+        IndexModel([("projects.project_id", ASCENDING)]),
+    ]),
+    (reviews_data_collection, [
+        # Один эксперт оставляет одну проверку проекта: create_review не создаст дубликат при гонке
+        IndexModel([("project_id", ASCENDING), ("reviewer_id", ASCENDING)], unique=True),
+        IndexModel([("reviewer_id", ASCENDING)]),
+    ]),
+    (import_jobs_collection, [
+        # claim_next_job выбирает самую старую задачу в очереди или с истекшей арендой
+        IndexModel([("state", ASCENDING), ("created_at", ASCENDING)]),
+        IndexModel([("state", ASCENDING), ("lease_expires_at", ASCENDING)]),
+    ]),
+]
+
+
+async def warm_up():
+    """Проверяет подключение и заранее открывает minPoolSize соединений."""
+    await client.admin.command("ping")
+    await asyncio.gather(*(client.admin.command("ping") for _ in range(settings.mongodb_min_pool_size)))
+
+
+def close_client():
+    client.close()
+
+
+async def ensure_indexes():
+    """
+    Создает индексы из реестра. Повторный вызов ничего не меняет; ошибка одной коллекции
+    (например, дубликаты под уникальным индексом) записывается в лог и не мешает старту.
+    """
+    for collection, indexes in INDEXES:
+        try:
+            await collection.create_indexes(indexes)
+        except Exception as e:
+            logger.error(f"Не удалось создать индексы коллекции {collection.full_name}: {e}")
@@ -0,0 +1,72 @@
+# src/index_report.py
+"""
+Отчет о расхождении индексов базы с реестром INDEXES из src/database.py
+и о неиспользуемых индексах по статистике $indexStats.
+
+Запуск из каталога backend:
+    python -m src.index_report
+    python -m src.index_report --apply
+"""
+import argparse
+import asyncio
+from typing import Any, Dict, List
+
+from src.database import INDEXES, ensure_indexes
+
+# Параметры индекса, которые сравниваются с реестром
+INDEX_OPTIONS = ("unique", "sparse", "expireAfterSeconds", "partialFilterExpression")
+
+
+def index_spec(index: Dict[str, Any]) -> Dict[str, Any]:
+    spec = {"key": list(dict(index["key"]).items())}
+    spec.update({option: index[option] for option in INDEX_OPTIONS if option in index})
+    return spec
+
+
+async def collection_report(collection, indexes) -> List[str]:
+    expected = {index.document["name"]: index_spec(index.document) for index in indexes}
+    existing = {index["name"]: index async for index in collection.list_indexes()}
+    problems = []
+
+    for name, spec in expected.items():
+        if name not in existing:
+            problems.append(f"  отсутствует: {name}")
+        elif index_spec(existing[name]) != spec:
+            problems.append(f"  отличается: {name}: в базе {index_spec(existing[name])}, в реестре {spec}")
+
+    for name in existing:
+        if name != "_id_" and name not in expected:
+            problems.append(f"  нет в реестре: {name}")
+
+    async for stats in collection.aggregate([{"$indexStats": {}}]):
+        if stats["name"] != "_id_" and stats["accesses"]["ops"] == 0:
+            problems.append(f"  не используется с {stats['accesses']['since']:%Y-%m-%d %H:%M}: {stats['name']}")
+
+    return problems
+
+
+async def report(apply: bool) -> bool:
+    if apply:
+        await ensure_indexes()
+
+    drift = False
+    for collection, indexes in INDEXES:
+        problems = await collection_report(collection, indexes)
+        if problems:
+            print(collection.full_name)
+            print("\n".join(problems))
+            drift = drift or any(not problem.startswith("  не используется") for problem in problems)
+    return drift
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Проверка индексов MongoDB по реестру src/database.py")
+    parser.add_argument("--apply", action="store_true", help="Создать недостающие индексы перед проверкой")
+    args = parser.parse_args()
+
+    if asyncio.run(report(args.apply)):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
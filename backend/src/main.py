@@ -1,15 +1,51 @@
 # src/main.py
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends
 from src.modules.auth.router import router as auth_router
 from src.modules.profile.router import router as profiles_router
 from src.modules.events.router import router as events_router
 from src.modules.projects.router import router as projects_router
 from src.modules.reviews.router import router as reviews_router
+from src.modules.projects.parser_pool import parser_pool
+from src.modules.projects.import_jobs import import_workers
+from src.modules.auth.utils import decode_jwt, password_hasher
+from src.modules.auth.yandex_client import yandex_client
+from src.modules.auth.sessions import session_store
+from src.utils import check_permissions, role_permissions_cache
+from src.metrics import collect_metrics
+from src.database import ensure_indexes, warm_up, close_client
+from src.search import fill_search_tokens
+from src.modules.events.members import migrate_embedded_members
 
 from fastapi.middleware.cors import CORSMiddleware
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # До приема трафика: соединения с MongoDB, индексы и фоновые задачи
+    await warm_up()
+    await ensure_indexes()
+    await fill_search_tokens()
+    await migrate_embedded_members()
+    import_workers.start()
+    await role_permissions_cache.start()
+    await session_store.remove_legacy_sessions()
+    session_store.start()
+
+    yield
+
+    await import_workers.stop()
+    await role_permissions_cache.stop()
+    await session_store.stop()
+    parser_pool.shutdown()
+    password_hasher.shutdown()
+    await yandex_client.close()
+    # Клиент закрывается последним: остановленные выше задачи еще могли обращаться к базе
+    close_client()
+
+
 app = FastAPI(
-    title="Конкурсант API"
+    title="Конкурсант API",
+    lifespan=lifespan
 )
 
 app.include_router(auth_router, prefix="/api/v1", tags=["Авторизация (auth)"])
@@ -38,10 +74,18 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
-    expose_headers=["auth_token"],
+    expose_headers=["auth_token", "X-Total-Count", "X-Total-Count-Approximate", "X-Next-Cursor"],
 )
 
 @app.get("/", tags=["Стартовая страница"])
 async def root():
     return {"message": "Добро пожаловать в API Конкурсант"}
 
+@app.get("/api/v1/metrics", tags=["Метрики (metrics)"])
+async def get_metrics(token: dict = Depends(decode_jwt)):
+    """
+    Текущие метрики подсистем (очереди, кэши, время обработки).
+    """
+    await check_permissions(token, operation_type="high-level_operation")
+    return collect_metrics()
+
@@ -0,0 +1,23 @@
+# src/metrics.py
+from typing import Any, Callable, Dict
+
+# Реестр метрик подсистем: имя -> функция, возвращающая текущие значения
+_metrics_providers: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register_metrics(name: str, provider: Callable[[], Dict[str, Any]]):
+    """Регистрирует поставщика метрик подсистемы."""
+    _metrics_providers[name] = provider
+
+
+def collect_metrics() -> Dict[str, Dict[str, Any]]:
+    """Собирает текущие метрики всех зарегистрированных подсистем."""
+    return {name: provider() for name, provider in _metrics_providers.items()}
+
+
+def percentile(values, fraction: float):
+    """Перцентиль по отсортированной копии значений (None для пустой выборки)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
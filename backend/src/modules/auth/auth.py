@@ -1,40 +1,24 @@
 # src/modules/auth/auth.py
-import httpx
 from fastapi import HTTPException, Response
 from fastapi.responses import JSONResponse
 from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 
-from src.database import authorization_accounts_collection, profile_data_collection, user_sessions_collection
-from src.modules.auth.schemas import SessionCreate, YandexUserAccount, AuthorizationAccounts, RegistrationData, LoginData, EmailUserAccount
+from src.database import authorization_accounts_collection, profile_data_collection
+from src.pagination import count_cache
+from src.search import search_fields
+from src.modules.auth.schemas import YandexUserAccount, AuthorizationAccounts, RegistrationData, LoginData, EmailUserAccount
 from src.modules.profile.schemas import ProfileData, RoleEnum, ExternalServiceAccounts, SquadInfo
-from src.modules.auth.utils import hash_password, verify_password, create_jwt, create_refresh_token
+from src.modules.auth.yandex_client import yandex_client
+from src.modules.auth.sessions import session_store
+from src.modules.auth.utils import hash_password, verify_password, password_needs_rehash, password_hasher, create_jwt
 
 
 
-async def get_user_info(token: str):
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.get(
-                "https://login.yandex.ru/info",
-                headers={"Authorization": f"Bearer {token}"}
-            )
-            response.raise_for_status()  # Поднимает исключение для статусов 4xx и 5xx
-        except httpx.HTTPStatusError as exc:
-            print(f"Ошибка статуса: {exc.response.status_code}, {exc.response.text}")
-            raise HTTPException(status_code=exc.response.status_code,
-                                detail="Ошибка при получении информации о пользователе")
-        except httpx.RequestError as exc:
-            print(f"Ошибка запроса: {exc}")
-            raise HTTPException(status_code=500, detail="Ошибка соединения с Яндексом")
-
-        user_data = response.json()
-
-        # Проверяем наличие ключевых полей
-        if "id" not in user_data or "default_email" not in user_data:
-            raise HTTPException(status_code=400, detail="Некорректные данные пользователя")
-
-        return user_data
+async def get_user_info(token: str, expires_in: Optional[int] = None):
+    return await yandex_client.get_user_info(token, expires_in)
 
 async def create_or_load_user_yandex(user_info: dict) -> list:
     # Проверяем наличие email в данных пользователя
@@ -89,10 +73,10 @@ async def create_or_load_user_yandex(user_info: dict) -> list:
             role_name=RoleEnum.USER,
             squad_info=squad_info
         )
-        await profile_data_collection.insert_one(data_user.dict())
-
-        # Создаем сессию для пользователя
-        await create_session(user_id)
+        profile = data_user.dict()
+        profile.update(search_fields(profile_data_collection.name, profile))
+        await profile_data_collection.insert_one(profile)
+        count_cache.invalidate(profile_data_collection)
 
         # Устанавливаем роль по умолчанию
         role = RoleEnum.USER
@@ -105,15 +89,6 @@ async def create_or_load_user_yandex(user_info: dict) -> list:
     # Возвращаем список с user_id, email_ya и role
     return [str(user_id), user_info["default_email"], role]
 
-async def create_session(user_id: ObjectId):
-    session = SessionCreate(
-        user_id=str(user_id),
-        created_at=datetime.utcnow().isoformat(),
-        expires_at=(datetime.utcnow() + timedelta(hours=24)).isoformat()
-    )
-    result = await user_sessions_collection.insert_one(session.dict())
-    return str(result.inserted_id)
-
 async def create_user_profile(data: RegistrationData):
     # Проверяем, существует ли пользователь с таким email
     existing_user = await authorization_accounts_collection.find_one(
@@ -123,7 +98,7 @@ async def create_user_profile(data: RegistrationData):
         raise HTTPException(status_code=400, detail="Пользователь с таким email уже существует")
 
     # Хешируем пароль
-    hashed_password = hash_password(data.password)
+    hashed_password = await hash_password(data.password)
 
     # Создаём запись в AuthorizationAccounts с YandexUserAccount
     yandex_user = YandexUserAccount(
@@ -145,8 +120,12 @@ async def create_user_profile(data: RegistrationData):
         yandex_user_account=yandex_user
     )
 
-    # Вставляем нового пользователя в коллекцию authorization_accounts_collection
-    result = await authorization_accounts_collection.insert_one(authorization_account.dict())
+    # Вставляем нового пользователя в коллекцию authorization_accounts_collection;
+    # уникальный индекс по email отклоняет одновременную повторную регистрацию
+    try:
+        result = await authorization_accounts_collection.insert_one(authorization_account.dict())
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Пользователь с таким email уже существует")
     if not result.inserted_id:
         raise HTTPException(status_code=500, detail="Ошибка при создании пользователя")
 
@@ -177,7 +156,10 @@ async def create_user_profile(data: RegistrationData):
         squad_info=squad_info
     )
 
-    profile_result = await profile_data_collection.insert_one(data_user.dict())
+    profile = data_user.dict()
+    profile.update(search_fields(profile_data_collection.name, profile))
+    profile_result = await profile_data_collection.insert_one(profile)
+    count_cache.invalidate(profile_data_collection)
     if not profile_result.inserted_id:
         raise HTTPException(status_code=500, detail="Ошибка при создании профиля пользователя")
 
@@ -209,20 +191,45 @@ async def get_user_and_profile(email: str):
 
     return user, profile
 
+async def get_user_and_profile_by_id(user_id: str):
+    """Получает пользователя и его профиль по идентификатору."""
+    user = await authorization_accounts_collection.find_one({"_id": ObjectId(user_id)}) if ObjectId.is_valid(user_id) else None
+    if not user:
+        raise HTTPException(status_code=401, detail="Пользователь не найден")
+
+    profile = await profile_data_collection.find_one({"user_id": user_id})
+    if not profile:
+        raise HTTPException(status_code=500, detail="Профиль пользователя не найден")
+
+    return user, profile
+
 async def authenticate_user(data: LoginData):
     """Аутентификация пользователя."""
     user, profile = await get_user_and_profile(data.email)
 
     # Проверяем пароль
-    if not verify_password(data.password, user["email_user_account"]["hash_password"]):
+    hashed_password = user["email_user_account"]["hash_password"]
+    if not await verify_password(data.password, hashed_password):
         raise HTTPException(status_code=400, detail="Неверный email или пароль")
 
+    # Хеш с устаревшим числом раундов пересчитывается в фоне
+    if password_needs_rehash(hashed_password):
+        async def save_hash(new_hash: str):
+            await authorization_accounts_collection.update_one(
+                {"_id": user["_id"], "email_user_account.hash_password": hashed_password},
+                {"$set": {
+                    "email_user_account.hash_password": new_hash,
+                    "email_user_account.updated_at": datetime.utcnow()
+                }}
+            )
+        password_hasher.schedule_rehash(data.password, save_hash)
+
     role = profile.get("role_name", RoleEnum.USER)
 
     # Создаем JWT токен
     user_id = str(user["_id"])
-    jwt_token = create_jwt(user_id, data.email, role)
-    refresh_token = create_refresh_token(user_id)
+    session_id, refresh_token = await session_store.create(user_id)
+    jwt_token = create_jwt(user_id, data.email, role, session_id)
 
     # Устанавливаем куки с JWT токеном
     response = JSONResponse(content={"message": "Аутентификация прошла успешно.", "refresh_token": refresh_token})
@@ -1,9 +1,11 @@
 # src/modules/auth/router.py
 from fastapi import APIRouter, HTTPException, Depends, Response, Cookie
 from fastapi.responses import JSONResponse
-from src.modules.auth.auth import get_user_info, create_or_load_user_yandex, authenticate_user, create_user_profile, get_user_and_profile
-from src.modules.auth.utils import create_jwt, hash_password, verify_password, decode_refresh_token
-from src.modules.profile.schemas import JwtResponse
+from typing import Optional
+from src.modules.auth.auth import get_user_info, create_or_load_user_yandex, authenticate_user, create_user_profile, get_user_and_profile_by_id, set_auth_cookie
+from src.modules.auth.sessions import session_store
+from src.modules.auth.utils import create_jwt, decode_access_token, token_cache
+from src.modules.profile.schemas import JwtResponse, RoleEnum
 from src.modules.auth.schemas import TokenData, UserResponse, RegistrationData, LoginData
 
 
@@ -42,7 +44,7 @@ async def authenticate_with_yandex(token_data: TokenData):
     - UserResponse: сообщение об успешной аутентификации.
     """
     token = token_data.token
-    user_info: Dict[str, Any] = await get_user_info(token)
+    user_info: Dict[str, Any] = await get_user_info(token, token_data.expires_in)
 
     # Проверяем, что получены корректные данные пользователя
     if not user_info or "id" not in user_info or "default_email" not in user_info:
@@ -58,11 +60,12 @@ async def authenticate_with_yandex(token_data: TokenData):
     # Извлекаем данные из списка
     user_id, email_ya, role = user_data_list
 
-    # Создаем JWT-токен для аутентификации
-    jwt_token = create_jwt(user_id, email_ya, role)
+    # Создаем сессию и JWT-токен для аутентификации
+    session_id, refresh_token = await session_store.create(user_id)
+    jwt_token = create_jwt(user_id, email_ya, role, session_id)
 
     # Устанавливаем куки с JWT токеном
-    response = JSONResponse(content={"message": "Аутентификация прошла успешно."})
+    response = JSONResponse(content={"message": "Аутентификация прошла успешно.", "refresh_token": refresh_token})
     response.set_cookie(
         key="auth_token",
         value=jwt_token,
@@ -83,18 +86,40 @@ async def login_user(data: LoginData):
     return await authenticate_user(data)
 
 
+@router.post("/logout")
+async def logout_user(auth_token: Optional[str] = Cookie(None)):
+    """Выход пользователя: отзывает сессию, удаляет куку с токеном и его запись в кеше токенов."""
+    if auth_token:
+        claims = token_cache.get(auth_token)
+        token_cache.evict(auth_token)
+        if claims is None:
+            # Токен мог не попасть в кеш этого воркера; истекший токен тоже завершает свою сессию
+            try:
+                claims = decode_access_token(auth_token, verify_exp=False)
+            except Exception:
+                claims = {}
+        if claims.get("sid"):
+            await session_store.revoke(claims["sid"])
+
+    response = JSONResponse(content={"message": "Выход выполнен."})
+    response.delete_cookie(key="auth_token")
+    return response
+
+
 @router.post("/refresh")
 async def refresh_token(refresh_token: str):
-    """Обновляет access токен с использованием refresh токена."""
-    payload = decode_refresh_token(refresh_token)
-    user_id = payload.get("sub")
+    """Обновляет access токен и заменяет refresh токен сессии новым."""
+    user_id, session_id, new_refresh_token = await session_store.rotate(refresh_token)
 
-    user, profile = await get_user_and_profile(user_id)
+    user, profile = await get_user_and_profile_by_id(user_id)
     role = profile.get("role_name", RoleEnum.USER)
 
-    new_access_token = create_jwt(user_id, user["email_user_account"]["email_login"], role)
+    # Вход через Яндекс не создает email_user_account
+    account = user.get("email_user_account") or user.get("yandex_user_account") or {}
+    email = account.get("email_login") or account.get("email_ya")
+    new_access_token = create_jwt(user_id, email, role, session_id)
 
-    response = JSONResponse(content={"message": "Access token обновлен."})
+    response = JSONResponse(content={"message": "Access token обновлен.", "refresh_token": new_refresh_token})
     set_auth_cookie(response, new_access_token)
 
     return response
\ No newline at end of file
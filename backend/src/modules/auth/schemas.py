@@ -1,6 +1,6 @@
 # src/modules/auth/schemas.py
 from pydantic import BaseModel, EmailStr
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class RegistrationData(BaseModel):
@@ -45,12 +45,16 @@ class SessionCreate(BaseModel):
     Схема для создания сессии пользователя.
     """
     user_id: str  # Идентификатор пользователя
-    created_at: str  # Время создания сессии
-    expires_at: str  # Время окончания сессии
+    created_at: datetime  # Время создания сессии
+    expires_at: datetime  # Время окончания сессии (по нему работает TTL индекс)
+    refresh_jti: str  # Идентификатор действующего refresh токена
+    rotated_at: Optional[datetime] = None  # Время последней замены refresh токена
+    rotations: List[dict] = []  # Замененные refresh токены: jti и время замены
 
 
 class TokenData(BaseModel):
     token: str
+    expires_in: Optional[int] = None  # Срок действия токена Яндекса в секундах из ответа OAuth
 
 class UserResponse(BaseModel):
     message: str
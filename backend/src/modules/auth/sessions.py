@@ -0,0 +1,210 @@
+# src/modules/auth/sessions.py
+import asyncio
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+from src.config import settings
+from src.database import user_accounts_db, user_sessions_collection
+from src.metrics import register_metrics
+from src.modules.auth.schemas import SessionCreate
+from src.modules.auth.utils import create_refresh_token, decode_refresh_token, token_cache
+
+logger = logging.getLogger(__name__)
+
+# Сколько предыдущих refresh токенов сессии хранится для обнаружения повторного использования
+ROTATION_HISTORY = 20
+
+
+class SessionStore:
+    """
+    Сессии пользователей с ротацией refresh токенов.
+
+    Документ сессии хранит expires_at как datetime, и TTL индекс MongoDB удаляет
+    истекшие сессии сам. Каждый refresh токен несет идентификатор сессии (sid)
+    и одноразовый jti; при обновлении jti заменяется, а старый попадает
+    в rotations. Предъявление уже замененного токена считается кражей
+    и отзывает сессию.
+
+    Сессии кешируются в памяти со сквозной записью: проверки при refresh и logout
+    читают кеш, а запись в MongoDB выполняется условно по текущему jti, поэтому
+    устаревший кеш другого воркера не позволит использовать отозванную сессию.
+    """
+
+    def __init__(self, lifetime: timedelta, cache_size: int, stats_interval: float, cache_ttl: float):
+        self.lifetime = lifetime
+        self.cache_size = cache_size
+        self.stats_interval = stats_interval
+        self.cache_ttl = cache_ttl
+
+        # Идентификатор сессии -> (документ сессии, момент, после которого запись перечитывается)
+        self._cache: "OrderedDict[str, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._task: Optional[asyncio.Task] = None
+        self._collection_stats: Dict[str, Any] = {}
+        self._counters = {"created": 0, "rotated": 0, "revoked": 0, "reuse_detected": 0,
+                          "cache_hits": 0, "cache_misses": 0}
+
+    async def remove_legacy_sessions(self):
+        # Сессии старого формата хранили expires_at строкой: TTL индекс из реестра
+        # src/database.py их не удалит, а прочитать их было нечем
+        result = await user_sessions_collection.delete_many({"expires_at": {"$type": "string"}})
+        if result.deleted_count:
+            logger.info(f"Удалено сессий старого формата: {result.deleted_count}")
+
+    def _cache_put(self, session: Dict[str, Any]):
+        if self.cache_size <= 0:
+            return
+        session_id = str(session["_id"])
+        self._cache[session_id] = (session, time.monotonic() + self.cache_ttl)
+        self._cache.move_to_end(session_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def get(self, session_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Действующая сессия или None. Запись кеша живет cache_ttl секунд, поэтому
+        сессия, отозванная в другом воркере, перестает приниматься не позже этого срока.
+        """
+        entry = self._cache.get(session_id)
+        session = entry[0] if entry is not None and entry[1] > time.monotonic() else None
+        if session is not None:
+            self._counters["cache_hits"] += 1
+            self._cache.move_to_end(session_id)
+        else:
+            self._counters["cache_misses"] += 1
+            if not ObjectId.is_valid(session_id):
+                return None
+            session = await user_sessions_collection.find_one({"_id": ObjectId(session_id)})
+            if session is None:
+                return None
+            self._cache_put(session)
+
+        # TTL монитор MongoDB удаляет документы не сразу
+        if session["expires_at"] <= datetime.utcnow():
+            self._cache.pop(session_id, None)
+            return None
+        return session
+
+    async def create(self, user_id: str) -> Tuple[str, str]:
+        """Создает сессию и возвращает ее идентификатор и первый refresh токен."""
+        now = datetime.utcnow()
+        jti = uuid.uuid4().hex
+        session = SessionCreate(
+            user_id=str(user_id),
+            created_at=now,
+            expires_at=now + self.lifetime,
+            refresh_jti=jti
+        ).dict()
+        result = await user_sessions_collection.insert_one(session)
+        self._cache_put(session)
+        self._counters["created"] += 1
+
+        session_id = str(result.inserted_id)
+        return session_id, create_refresh_token(user_id, session_id, jti)
+
+    async def rotate(self, refresh_token: str) -> Tuple[str, str, str]:
+        """
+        Проверяет refresh токен и заменяет его новым.
+        Возвращает user_id, идентификатор сессии и новый refresh токен.
+        """
+        payload = decode_refresh_token(refresh_token)
+        session_id, jti = payload.get("sid"), payload.get("jti")
+        if not session_id or not jti:
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+        session = await self.get(session_id)
+        if session is None:
+            raise HTTPException(status_code=401, detail="Session expired")
+
+        if session.get("refresh_jti") != jti:
+            if any(rotation["jti"] == jti for rotation in session.get("rotations", [])):
+                # Уже замененный токен предъявлен повторно: токен мог быть украден
+                self._counters["reuse_detected"] += 1
+                logger.warning(f"Повторное использование refresh токена сессии {session_id}")
+                await self.revoke(session_id)
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+        now = datetime.utcnow()
+        new_jti = uuid.uuid4().hex
+        result = await user_sessions_collection.update_one(
+            {"_id": session["_id"], "refresh_jti": jti},
+            {
+                "$set": {"refresh_jti": new_jti, "rotated_at": now},
+                "$push": {"rotations": {"$each": [{"jti": jti, "rotated_at": now}], "$slice": -ROTATION_HISTORY}}
+            }
+        )
+        if result.matched_count == 0:
+            # Сессию отозвали или обновили в другом воркере
+            self._cache.pop(session_id, None)
+            raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+        session["refresh_jti"] = new_jti
+        session["rotated_at"] = now
+        session["rotations"] = (session.get("rotations", []) + [{"jti": jti, "rotated_at": now}])[-ROTATION_HISTORY:]
+        self._counters["rotated"] += 1
+
+        user_id = session["user_id"]
+        return user_id, session_id, create_refresh_token(user_id, session_id, new_jti)
+
+    async def revoke(self, session_id: str):
+        self._cache.pop(session_id, None)
+        # Access токены сессии в кеше этого воркера больше не принимаются сразу,
+        # в остальных воркерах - после перечитывания сессии (cache_ttl)
+        token_cache.evict_session(session_id)
+        if ObjectId.is_valid(session_id):
+            await user_sessions_collection.delete_one({"_id": ObjectId(session_id)})
+        self._counters["revoked"] += 1
+
+    def start(self):
+        self._task = asyncio.create_task(self._stats_loop(), name="session-stats")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _stats_loop(self):
+        while True:
+            try:
+                collection_stats = await user_accounts_db.command("collStats", user_sessions_collection.name)
+                self._collection_stats = {
+                    "documents": collection_stats.get("count"),
+                    "size": collection_stats.get("size"),
+                    "storage_size": collection_stats.get("storageSize"),
+                    "index_size": collection_stats.get("totalIndexSize"),
+                    # Истекшие сессии, которые TTL монитор еще не удалил
+                    "expired_pending": await user_sessions_collection.count_documents(
+                        {"expires_at": {"$lte": datetime.utcnow()}}
+                    ),
+                    "collected_at": datetime.utcnow().isoformat(),
+                }
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Не удалось получить статистику сессий: {e}")
+            await asyncio.sleep(self.stats_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["cache_hits"] + self._counters["cache_misses"]
+        return {
+            "cached": len(self._cache),
+            **self._counters,
+            "cache_hit_ratio": self._counters["cache_hits"] / lookups if lookups else None,
+            "collection": self._collection_stats,
+        }
+
+
+session_store = SessionStore(
+    lifetime=timedelta(days=settings.refresh_token_expire_days),
+    cache_size=settings.session_cache_size,
+    stats_interval=settings.session_stats_interval,
+    cache_ttl=settings.session_cache_ttl,
+)
+register_metrics("sessions", session_store.stats)
@@ -1,13 +1,20 @@
 # src/modules/auth/utils.py
 import jwt
 from jwt import PyJWTError
+import asyncio
+import hashlib
 import logging
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from passlib.context import CryptContext
 from fastapi import HTTPException, Request, status
-from datetime import datetime, timedelta
-from typing import Dict, List, Union
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple, Union
 from src.config import settings
+from src.metrics import register_metrics, percentile
 from src.security import encrypt_payload, decrypt_payload
+from src.utils import role_permissions_cache
 
 
 
@@ -15,8 +22,208 @@ from src.security import encrypt_payload, decrypt_payload
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Настройка для хеширования паролей
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Настройка для хеширования паролей: хеши с другим числом раундов считаются устаревшими
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.bcrypt_rounds)
+
+
+class PasswordHasher:
+    """
+    Пул потоков для bcrypt: хеширование и проверка паролей не занимают цикл событий.
+    Число принятых операций ограничено workers + queue_size, при переполнении
+    или превышении timeout запрос отклоняется с 503 и заголовком Retry-After.
+    """
+
+    def __init__(self, workers: int, queue_size: int, timeout: float, retry_after: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.retry_after = retry_after
+
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hasher")
+        self._in_flight = 0
+        self._waits = deque(maxlen=1000)
+        self._durations = deque(maxlen=1000)
+        self._background: set = set()
+        self._counters = {"completed": 0, "timeouts": 0, "rejected": 0, "rehashed": 0}
+
+    def _unavailable(self, detail: str) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(self.retry_after)}
+        )
+
+    def _release(self, _future=None):
+        self._in_flight -= 1
+
+    def _timed(self, submitted: float, func, *args):
+        started = time.perf_counter()
+        self._waits.append(started - submitted)
+        try:
+            return func(*args)
+        finally:
+            self._durations.append(time.perf_counter() - started)
+
+    async def run(self, func, *args):
+        if self._in_flight >= self.workers + self.queue_size:
+            self._counters["rejected"] += 1
+            raise self._unavailable("Слишком много запросов авторизации, повторите попытку позже")
+
+        loop = asyncio.get_running_loop()
+        future = self._executor.submit(self._timed, time.perf_counter(), func, *args)
+        # Слот освобождается, когда bcrypt действительно завершился в потоке
+        self._in_flight += 1
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(self._release, f))
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            # Задача, еще ждущая в очереди, не будет выполнена впустую
+            future.cancel()
+            self._counters["timeouts"] += 1
+            raise self._unavailable("Превышено время проверки пароля, повторите попытку позже")
+
+        self._counters["completed"] += 1
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self.run(pwd_context.hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(pwd_context.verify, plain_password, hashed_password)
+
+    def schedule_rehash(self, plain_password: str, save):
+        """
+        Пересчитывает хеш с текущим числом раундов в фоне, не задерживая вход.
+        save - корутинная функция, сохраняющая новый хеш.
+        """
+        async def rehash():
+            try:
+                await save(await self.hash(plain_password))
+                self._counters["rehashed"] += 1
+            except Exception as e:
+                logger.warning(f"Не удалось обновить хеш пароля: {e}")
+
+        task = asyncio.create_task(rehash())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        waits = list(self._waits)
+        durations = list(self._durations)
+        return {
+            "workers": self.workers,
+            "in_flight": self._in_flight,
+            "queue_depth": max(0, self._in_flight - self.workers),
+            "queue_capacity": self.queue_size,
+            **self._counters,
+            "queue_wait_p50": percentile(waits, 0.5),
+            "queue_wait_p95": percentile(waits, 0.95),
+            "hash_time_p50": percentile(durations, 0.5),
+            "hash_time_p95": percentile(durations, 0.95),
+        }
+
+
+password_hasher = PasswordHasher(
+    workers=settings.password_hasher_workers,
+    queue_size=settings.password_hasher_queue_size,
+    timeout=settings.password_hasher_timeout,
+    retry_after=settings.password_hasher_retry_after,
+)
+register_metrics("password_hasher", password_hasher.stats)
+
+
+class DecodedTokenCache:
+    """
+    LRU кеш расшифрованных access токенов: sha256 токена -> claims.
+
+    Браузер отправляет одну и ту же куку с каждым запросом, а проверка подписи,
+    расшифровка Fernet и разбор JSON повторяются. Запись живет до exp из токена.
+    Записи привязаны к сессии (sid): отзыв сессии удаляет все ее токены
+    (evict_session), а decode_jwt при каждом попадании проверяет, что сессия действует.
+    """
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, Tuple[Dict, float]]" = OrderedDict()
+        # sid -> ключи записей токенов этой сессии
+        self._by_session: Dict[str, set] = {}
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expired": 0}
+
+    @staticmethod
+    def key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[Dict]:
+        key = self.key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self._counters["misses"] += 1
+            return None
+        claims, expires_at = entry
+        if expires_at <= time.time():
+            self._counters["expired"] += 1
+            self._remove(key)
+            return None
+        self._entries.move_to_end(key)
+        self._counters["hits"] += 1
+        # Копия, чтобы изменения в обработчике не попали в кеш
+        return dict(claims)
+
+    def put(self, token: str, claims: Dict):
+        if self.max_size <= 0:
+            return
+        try:
+            expires_at = datetime.fromisoformat(claims["exp"]).replace(tzinfo=timezone.utc).timestamp()
+        except (KeyError, TypeError, ValueError):
+            return
+        if expires_at <= time.time():
+            return
+        key = self.key(token)
+        self._entries[key] = (dict(claims), expires_at)
+        self._entries.move_to_end(key)
+        if claims.get("sid"):
+            self._by_session.setdefault(claims["sid"], set()).add(key)
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+            self._counters["evictions"] += 1
+
+    def _remove(self, key: bytes):
+        entry = self._entries.pop(key, None)
+        session_id = entry[0].get("sid") if entry else None
+        if session_id in self._by_session:
+            self._by_session[session_id].discard(key)
+            if not self._by_session[session_id]:
+                del self._by_session[session_id]
+
+    def evict(self, token: str):
+        self._remove(self.key(token))
+
+    def evict_session(self, session_id: str):
+        """Удаляет записи всех токенов сессии (при ее отзыве)."""
+        for key in self._by_session.pop(session_id, set()):
+            self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_session.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            **self._counters,
+            "hit_ratio": self._counters["hits"] / lookups if lookups else None,
+        }
+
+
+token_cache = DecodedTokenCache(max_size=settings.token_cache_size)
+
+register_metrics("decoded_token_cache", token_cache.stats)
 
 
 def decode_refresh_token(refresh_token: str):
@@ -30,26 +237,51 @@ def decode_refresh_token(refresh_token: str):
         raise HTTPException(status_code=401, detail="Invalid refresh token")
 
 
-def create_refresh_token(user_id: str):
-    """Создает refresh токен."""
+def create_refresh_token(user_id: str, session_id: str, jti: str):
+    """Создает refresh токен сессии; jti меняется при каждом обновлении."""
     return jwt.encode({
         "sub": user_id,
+        "sid": session_id,
+        "jti": jti,
         "exp": datetime.utcnow() + timedelta(days=settings.refresh_token_expire_days)
     }, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
 
-def create_jwt(user_id: str, email: str, role: str) -> str:
+def create_jwt(user_id: str, email: str, role: str, session_id: Optional[str] = None) -> str:
     expiration = datetime.utcnow() + timedelta(days=1)
     payload = {
         "user_id": user_id,
         "email": email,
         "role": role,
-        "exp": expiration.isoformat()
+        "sid": session_id,
+        "exp": expiration.isoformat(),
+        # Маска разрешений роли: проверка прав выполняется без обращения к MongoDB
+        **role_permissions_cache.token_claims(getattr(role, "value", role))
     }
 
     encrypted_payload = encrypt_payload(payload)
     token = jwt.encode({'data': encrypted_payload.decode()}, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
     return token
 
+def decode_access_token(token: str, verify_exp: bool = True) -> Dict:
+    """Проверяет подпись access токена и расшифровывает claims."""
+    decoded = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm],
+                         options={"verify_exp": verify_exp})
+    encrypted_payload = decoded.get('data')
+    if not encrypted_payload:
+        raise HTTPException(status_code=401, detail="Неверный токен")
+    return decrypt_payload(encrypted_payload)
+
+
+async def check_session(claims: Dict):
+    """Токен отозванной или истекшей сессии не принимается; токены без sid выпущены до появления сессий."""
+    # Импорт внутри функции: sessions импортирует создание refresh токенов из этого модуля
+    from src.modules.auth.sessions import session_store
+
+    session_id = claims.get("sid")
+    if session_id and await session_store.get(session_id) is None:
+        raise HTTPException(status_code=401, detail="Сессия завершена")
+
+
 async def decode_jwt(request: Request) -> Dict:
 
     token = request.cookies.get("auth_token")
@@ -58,14 +290,19 @@ async def decode_jwt(request: Request) -> Dict:
         logger.warning("Токен не найден")
         raise HTTPException(status_code=401, detail="Токен не найден")
 
-    try:
-        decoded = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
-        encrypted_payload = decoded.get('data')
-        if not encrypted_payload:
-            raise HTTPException(status_code=401, detail="Неверный токен")
-
-        return decrypt_payload(encrypted_payload)
+    claims = token_cache.get(token)
+    if claims is not None:
+        try:
+            await check_session(claims)
+        except HTTPException:
+            token_cache.evict(token)
+            raise
+        return claims
 
+    try:
+        claims = decode_access_token(token)
+    except HTTPException:
+        raise
     except jwt.ExpiredSignatureError:
         logger.warning("Токен истек")
         raise HTTPException(status_code=401, detail="Токен истек")
@@ -76,10 +313,19 @@ async def decode_jwt(request: Request) -> Dict:
         logger.error(f"Ошибка декодирования: {str(e)}")
         raise HTTPException(status_code=500, detail="Ошибка декодирования")
 
+    await check_session(claims)
+    token_cache.put(token, claims)
+    return claims
+
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
 
 # Проверяем пароль
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
\ No newline at end of file
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.verify(plain_password, hashed_password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Хеш создан с устаревшими параметрами (проверка без вычисления bcrypt)."""
+    return pwd_context.needs_update(hashed_password)
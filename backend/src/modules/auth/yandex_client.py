@@ -0,0 +1,144 @@
+# src/modules/auth/yandex_client.py
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import random
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+import httpx
+from fastapi import HTTPException
+
+from src.config import settings
+from src.metrics import register_metrics
+
+logger = logging.getLogger(__name__)
+
+# HTTP/2 включается, если установлен пакет h2 (есть в requirements.txt; без него - HTTP/1.1)
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+class YandexOAuthClient:
+    """
+    Клиент Яндекс OAuth на все время жизни приложения.
+
+    Соединения переиспользуются (keep-alive, HTTP/2 при наличии h2), у запросов
+    явные таймауты подключения и чтения, сетевые ошибки и ответы 5xx повторяются
+    с экспоненциальной задержкой и случайным разбросом. Ответ /info кешируется
+    по sha256 токена, поэтому повторный вход с тем же токеном не обращается
+    к Яндексу. Запись живет не дольше срока действия токена (expires_in из ответа
+    OAuth) и не дольше user_info_ttl; если срок неизвестен - fallback_ttl секунд,
+    чтобы отозванный токен быстро переставал работать.
+    """
+
+    def __init__(self, base_url: str, connect_timeout: float, read_timeout: float, retries: int,
+                 retry_backoff: float, user_info_ttl: float, fallback_ttl: float, cache_size: int):
+        self.base_url = base_url
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.retries = retries
+        self.retry_backoff = retry_backoff
+        self.user_info_ttl = user_info_ttl
+        self.fallback_ttl = fallback_ttl
+        self.cache_size = cache_size
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._cache: "OrderedDict[bytes, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self._counters = {"requests": 0, "retries": 0, "errors": 0, "cache_hits": 0, "cache_misses": 0}
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=HTTP2_AVAILABLE,
+                timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+            )
+        return self._client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def clear_cache(self):
+        self._cache.clear()
+
+    async def _get(self, path: str, headers: Dict[str, str]) -> httpx.Response:
+        client = self._get_client()
+        for attempt in range(self.retries + 1):
+            self._counters["requests"] += 1
+            try:
+                response = await client.get(path, headers=headers)
+                if response.status_code < 500 or attempt == self.retries:
+                    return response
+            except httpx.TransportError:
+                if attempt == self.retries:
+                    raise
+            self._counters["retries"] += 1
+            # Экспоненциальная задержка с полным разбросом
+            await asyncio.sleep(random.uniform(0, self.retry_backoff * 2 ** attempt))
+
+    def _cache_ttl(self, expires_in: Optional[int]) -> float:
+        if not expires_in or expires_in <= 0:
+            return min(self.fallback_ttl, self.user_info_ttl)
+        return min(expires_in, self.user_info_ttl)
+
+    async def get_user_info(self, token: str, expires_in: Optional[int] = None) -> Dict[str, Any]:
+        key = hashlib.sha256(token.encode()).digest()
+        entry = self._cache.get(key)
+        if entry is not None and entry[1] > time.monotonic():
+            self._cache.move_to_end(key)
+            self._counters["cache_hits"] += 1
+            return dict(entry[0])
+        self._counters["cache_misses"] += 1
+
+        try:
+            response = await self._get("/info", headers={"Authorization": f"Bearer {token}"})
+            response.raise_for_status()  # Поднимает исключение для статусов 4xx и 5xx
+        except httpx.HTTPStatusError as exc:
+            self._counters["errors"] += 1
+            logger.warning(f"Ошибка статуса: {exc.response.status_code}, {exc.response.text}")
+            raise HTTPException(status_code=exc.response.status_code,
+                                detail="Ошибка при получении информации о пользователе")
+        except httpx.RequestError as exc:
+            self._counters["errors"] += 1
+            logger.warning(f"Ошибка запроса: {exc}")
+            raise HTTPException(status_code=500, detail="Ошибка соединения с Яндексом")
+
+        user_data = response.json()
+
+        # Проверяем наличие ключевых полей
+        if "id" not in user_data or "default_email" not in user_data:
+            raise HTTPException(status_code=400, detail="Некорректные данные пользователя")
+
+        if self.cache_size > 0:
+            self._cache[key] = (user_data, time.monotonic() + self._cache_ttl(expires_in))
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return dict(user_data)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["cache_hits"] + self._counters["cache_misses"]
+        return {
+            "http2": HTTP2_AVAILABLE,
+            "cached_tokens": len(self._cache),
+            **self._counters,
+            "cache_hit_ratio": self._counters["cache_hits"] / lookups if lookups else None,
+        }
+
+
+yandex_client = YandexOAuthClient(
+    base_url=settings.yandex_oauth_url,
+    connect_timeout=settings.yandex_connect_timeout,
+    read_timeout=settings.yandex_read_timeout,
+    retries=settings.yandex_retries,
+    retry_backoff=settings.yandex_retry_backoff,
+    user_info_ttl=settings.yandex_user_info_ttl,
+    fallback_ttl=settings.yandex_user_info_fallback_ttl,
+    cache_size=settings.yandex_user_info_cache_size,
+)
+register_metrics("yandex_oauth", yandex_client.stats)
@@ -0,0 +1,189 @@
+# src/modules/events/members.py
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+from bson import ObjectId
+from fastapi import Response
+from pymongo import ASCENDING, UpdateOne
+
+from src.database import event_members_collection, events_data_collection, profile_data_collection
+from src.modules.events.schemas import MemberRole
+from src.pagination import count_cache, find_page, set_total_count
+
+logger = logging.getLogger(__name__)
+
+# Поля документа мероприятия, в которых раньше хранились участники, эксперты, менеджеры и зрители
+EMBEDDED_MEMBER_FIELDS = ("event_participants", "event_experts", "event_managers", "event_spectators", "spectators")
+
+
+def member_key(event_id: str, user_id: str, role: MemberRole) -> Dict[str, Any]:
+    return {"event_id": event_id, "user_id": user_id, "role": role.value}
+
+
+def upsert_member(event_id: str, user_id: str, role: MemberRole, user_full_name: Optional[str] = None,
+                  projects: Iterable[Dict[str, str]] = ()) -> UpdateOne:
+    """Операция добавления пользователя в роли на мероприятии; проекты участника дополняются."""
+    update: Dict[str, Any] = {"$setOnInsert": {"user_full_name": user_full_name or "Не указано",
+                                               "joined_at": datetime.utcnow()}}
+    projects = list(projects)
+    if projects:
+        update["$addToSet"] = {"projects": {"$each": projects}}
+    else:
+        update["$setOnInsert"]["projects"] = []
+    return UpdateOne(member_key(event_id, user_id, role), update, upsert=True)
+
+
+async def add_members(operations: List[UpdateOne]):
+    if operations:
+        await event_members_collection.bulk_write(operations, ordered=False)
+        count_cache.invalidate(event_members_collection)
+
+
+async def remove_member(event_id: str, user_id: str, role: MemberRole) -> bool:
+    result = await event_members_collection.delete_one(member_key(event_id, user_id, role))
+    count_cache.invalidate(event_members_collection)
+    return result.deleted_count > 0
+
+
+async def replace_role_members(event_id: str, role: MemberRole, users: List[Dict[str, Any]]):
+    """Приводит состав роли (менеджеры, эксперты) к списку из данных мероприятия."""
+    user_ids = [user["user_id"] for user in users]
+    await event_members_collection.delete_many(
+        {"event_id": event_id, "role": role.value, "user_id": {"$nin": user_ids}}
+    )
+    await add_members([upsert_member(event_id, user["user_id"], role, user.get("user_full_name")) for user in users])
+    count_cache.invalidate(event_members_collection)
+
+
+async def remove_project(project_id: str, event_id: Optional[str] = None) -> bool:
+    """
+    Убирает проект из участников мероприятия; участник без проектов удаляется.
+    Возвращает False, если проект не был зарегистрирован.
+    """
+    query: Dict[str, Any] = {"role": MemberRole.PARTICIPANT.value, "projects.project_id": project_id}
+    if event_id is not None:
+        query["event_id"] = event_id
+    member_ids = [member["_id"] for member in await event_members_collection.find(query, {"_id": 1}).to_list(length=None)]
+    if not member_ids:
+        return False
+
+    await event_members_collection.update_many(
+        {"_id": {"$in": member_ids}}, {"$pull": {"projects": {"project_id": project_id}}}
+    )
+    await event_members_collection.delete_many({"_id": {"$in": member_ids}, "projects": {"$size": 0}})
+    count_cache.invalidate(event_members_collection)
+    return True
+
+
+async def event_project_ids(event_id: str) -> List[str]:
+    return await event_members_collection.distinct(
+        "projects.project_id", {"event_id": event_id, "role": MemberRole.PARTICIPANT.value}
+    )
+
+
+async def user_event_ids(user_id: str, role: MemberRole) -> List[str]:
+    return await event_members_collection.distinct("event_id", {"user_id": user_id, "role": role.value})
+
+
+async def user_memberships(event_id: str, user_id: str) -> List[Dict[str, Any]]:
+    """Роли пользователя на мероприятии вместе с проектами участника."""
+    return await event_members_collection.find(
+        {"event_id": event_id, "user_id": user_id}, {"_id": 0, "role": 1, "projects": 1}
+    ).to_list(length=None)
+
+
+async def page_member_profiles(response: Response, event_id: str, role: MemberRole, limit: int, page: int = 1,
+                               cursor: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    Страница профилей пользователей в роли на мероприятии в порядке добавления.
+    Записи выбираются по индексу (event_id, role, _id), профили - одним запросом по user_id.
+    """
+    query = {"event_id": event_id, "role": role.value}
+    await set_total_count(response, event_members_collection, query)
+    page_members = await find_page(event_members_collection, query, [("_id", ASCENDING)], limit, page, cursor,
+                                   projection={"user_id": 1}, response=response)
+    user_ids = [member["user_id"] for member in page_members]
+    profiles = {profile["user_id"]: profile async for profile in profile_data_collection.find({"user_id": {"$in": user_ids}})}
+    return [profiles[user_id] for user_id in user_ids if user_id in profiles]
+
+
+async def delete_event_members(event_id: str):
+    await event_members_collection.delete_many({"event_id": event_id})
+    count_cache.invalidate(event_members_collection)
+
+
+async def embedded_members(event_id: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Менеджеры и эксперты мероприятия в формате полей EventBase.
+    Участников и зрителей может быть сколько угодно, они отдаются только
+    постраничными эндпоинтами /participants и /spectators, а собственные роли
+    и проекты пользователь получает через /members/me.
+    """
+    fields: Dict[str, List[Dict[str, Any]]] = {"event_managers": [], "event_experts": []}
+    roles = {MemberRole.MANAGER.value: "event_managers", MemberRole.EXPERT.value: "event_experts"}
+    query = {"event_id": event_id, "role": {"$in": list(roles)}}
+    async for member in event_members_collection.find(query, {"user_id": 1, "user_full_name": 1, "role": 1}).sort("_id", 1):
+        fields[roles[member["role"]]].append(
+            {"user_id": member["user_id"], "user_full_name": member.get("user_full_name") or "Не указано"}
+        )
+    return fields
+
+
+def _event_member_operations(event: Dict[str, Any]) -> List[UpdateOne]:
+    event_id = str(event["_id"])
+    operations = []
+    for field, role in (("event_managers", MemberRole.MANAGER), ("event_experts", MemberRole.EXPERT),
+                        ("event_spectators", MemberRole.SPECTATOR)):
+        for user in event.get(field) or []:
+            if user.get("user_id"):
+                operations.append(upsert_member(event_id, user["user_id"], role, user.get("user_full_name")))
+
+    # Зрители, записанные через register_spectator: [{"spectator_user_id": [user_id, ...]}]
+    for spectator in event.get("spectators") or []:
+        for user_id in spectator.get("spectator_user_id") or []:
+            if isinstance(user_id, str):
+                operations.append(upsert_member(event_id, user_id, MemberRole.SPECTATOR))
+
+    # projects_id участника мог стать списком после повторной регистрации проекта
+    projects = defaultdict(list)
+    names = {}
+    for participant in event.get("event_participants") or []:
+        user_id = participant.get("user_id")
+        if not user_id:
+            continue
+        names.setdefault(user_id, participant.get("user_full_name"))
+        project_ids = participant.get("projects_id")
+        for project_id in project_ids if isinstance(project_ids, list) else [project_ids]:
+            if project_id:
+                projects[user_id].append({"project_id": project_id,
+                                          "project_name": participant.get("project_name") or "Не указано"})
+    for user_id in names:
+        operations.append(upsert_member(event_id, user_id, MemberRole.PARTICIPANT, names[user_id], projects[user_id]))
+    return operations
+
+
+async def migrate_embedded_members() -> int:
+    """
+    Переносит участников, экспертов, менеджеров и зрителей из массивов документов
+    мероприятий в event_members и удаляет массивы. Повторный запуск безопасен:
+    записи добавляются через upsert, а обработанные мероприятия массивов уже не содержат.
+    """
+    query = {"$or": [{field: {"$exists": True}} for field in EMBEDDED_MEMBER_FIELDS]}
+    projection = {field: 1 for field in EMBEDDED_MEMBER_FIELDS}
+    migrated = 0
+    async for event in events_data_collection.find(query, projection):
+        await add_members(_event_member_operations(event))
+        await events_data_collection.update_one(
+            {"_id": event["_id"]}, {"$unset": {field: "" for field in EMBEDDED_MEMBER_FIELDS}}
+        )
+        migrated += 1
+    if migrated:
+        logger.info(f"Участники перенесены в event_members из мероприятий: {migrated}")
+    return migrated
+
+
+async def event_exists(event_id: str) -> bool:
+    return ObjectId.is_valid(event_id) and \
+        await events_data_collection.find_one({"_id": ObjectId(event_id)}, {"_id": 1}) is not None
@@ -4,9 +4,13 @@ from fastapi import Query
 from bson import ObjectId
 from src.modules.auth.utils import create_jwt, decode_jwt
 from src.utils import check_permissions
-from pymongo import DESCENDING
-from src.modules.events.schemas import EventBase, EventCreate, EventReduced, EventStatus
+from pymongo import ASCENDING, DESCENDING
+from src.pagination import count_cache, find_page, find_page_with_total, set_total_count
+from src.search import SearchQuery, search_fields, search_update
+from src.modules.events.schemas import EventBase, EventCreate, EventMembership, EventReduced, EventStatus, MemberRole
+from src.modules.events import members
 from src.modules.projects.schemas import ProjectFICPersonSummary
+from src.modules.projects.utils import project_to_summary, SUMMARY_PROJECTION
 from src.modules.profile.schemas import UserSummary
 from src.database import projects_data_collection, events_data_collection, profile_data_collection
 
@@ -30,22 +34,26 @@ async def create_or_update_event(event: EventCreate, token: dict = Depends(decod
 
     user_id = token.get("user_id")
 
-    # Подготовка данных для мероприятия
+    # Подготовка данных для мероприятия; менеджеры и эксперты хранятся в event_members
     event_data = {
         "event_creator": user_id,
-        "event_managers": [],
-        "event_experts": [],
-        "event_spectators": [],
-        "event_participants": [],
-        **event.dict()  # Объединяем дополнительные данные из event
+        **event.dict(exclude={"event_managers", "event_experts"})  # Объединяем дополнительные данные из event
     }
+    event_data.update(search_fields(events_data_collection.name, event_data))
 
     new_event = await events_data_collection.insert_one(event_data)
+    count_cache.invalidate(events_data_collection)
+    event_id = str(new_event.inserted_id)
+    await members.add_members(
+        [members.upsert_member(event_id, user.user_id, MemberRole.MANAGER, user.user_full_name) for user in event.event_managers] +
+        [members.upsert_member(event_id, user.user_id, MemberRole.EXPERT, user.user_full_name) for user in event.event_experts]
+    )
+
     created_event = await events_data_collection.find_one({"_id": new_event.inserted_id})
     if not created_event:
         raise HTTPException(status_code=404, detail="Мероприятие не найдено")
 
-    return EventBase(**created_event)
+    return EventBase(**{**created_event, **await members.embedded_members(event_id)})
 
 
 
@@ -55,17 +63,32 @@ async def update_event(event_id: str, event: EventBase, token: dict = Depends(de
     """
     Обновление мероприятия по ID.
     - **event_id**: ID мероприятия.
-    - **event**: Данные для обновления.
+    - **event**: Данные для обновления. Менеджеры и эксперты заменяются списками из запроса;
+      event_participants и event_spectators должны быть пустыми - участники и зрители
+      меняются эндпоинтами /events/{event_id}/project/{project_id} и /events/{event_id}/spectator/{user_id}.
     """
     await check_permissions(token, SERVICE_NAME, event_id=event_id)
 
+    if event.event_participants or event.event_spectators:
+        raise HTTPException(
+            status_code=400,
+            detail="Участники и зрители не изменяются через обновление мероприятия, "
+                   "используйте эндпоинты проектов и зрителей мероприятия"
+        )
+
+    # Участники и зрители меняются своими эндпоинтами, менеджеры и эксперты - по данным мероприятия
+    event_dict = event.dict(exclude={"event_managers", "event_experts", "event_spectators", "event_participants"})
     updated_event = await events_data_collection.find_one_and_update(
         {"_id": ObjectId(event_id)},
-        {"$set": event.dict()},
+        {"$set": {**event_dict, **search_update(events_data_collection.name, event_dict)}},
     )
+    count_cache.invalidate(events_data_collection)
     if not updated_event:
         raise HTTPException(status_code=404, detail="Мероприятие не найдено")
-    return EventBase(**updated_event)
+
+    await members.replace_role_members(event_id, MemberRole.MANAGER, [user.dict() for user in event.event_managers])
+    await members.replace_role_members(event_id, MemberRole.EXPERT, [user.dict() for user in event.event_experts])
+    return EventBase(**{**updated_event, **await members.embedded_members(event_id)})
 
 
 # Эндпоинт для получения списка мероприятий с пагинацией
@@ -80,18 +103,18 @@ async def get_events(
         location: str = None,
         event_publish: str = None,
         page: int = Query(1, ge=1),
-        limit: int = Query(10, ge=1),
+        limit: int = Query(10, ge=1, le=1000),
+        cursor: Optional[str] = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor"),
+        approximate_total: bool = Query(False, description="Приблизительный подсчет X-Total-Count для больших списков"),
         token: dict = Depends(decode_jwt)
 ):
     await check_permissions(token)
 
-    # Расчет пропускаемых элементов для текущей страницы
-    skip = (page - 1) * limit
     query = {}
 
-    # Фильтрация по полному названию мероприятия
-    if full_title:
-        query["event_full_title"] = {"$regex": full_title, "$options": "i"}
+    # Поиск по названию и месту проведения мероприятия
+    search = SearchQuery(events_data_collection.name).add("event_full_title", full_title).add("event_venue", location)
+    query.update(search.filter())
 
     # Фильтрация по типу мероприятия, если не ALL
     if event_type:
@@ -114,19 +137,15 @@ async def get_events(
     if event_publish:
         query["event_publish"] = event_publish
 
-    # Фильтрация по локации
-    if location:
-        query["event_venue"] = {"$regex": location, "$options": "i"}
-
-    total_events = await events_data_collection.count_documents(query)
-    total_count = await events_data_collection.count_documents(query)
-    events = await events_data_collection.find(query).skip(skip).limit(limit).sort("date", DESCENDING).to_list(
-        length=limit)
+    total_events = await set_total_count(response, events_data_collection, query, approximate_total)
+    # Прежний порядок по date; _id делает ключ уникальным для курсора
+    # (у мероприятий без date порядок - сначала новые)
+    events = await find_page(events_data_collection, query, [("date", DESCENDING), ("_id", DESCENDING)], limit, page,
+                             cursor, response=response, search=search)
 
     for event in events:
         event['id_event'] = str(event['_id'])
 
-    response.headers['X-Total-Count'] = str(total_count)
     return {"total": total_events, "events": [EventReduced(**event) for event in events]}
 
 
@@ -150,7 +169,7 @@ async def get_event(event_id: str, token: dict = Depends(decode_jwt)):
     # Добавление id_event
     event['id_event'] = str(event['_id'])
 
-    return EventBase(**event)
+    return EventBase(**{**event, **await members.embedded_members(event_id)})
 
 
 # Эндпоинт для удаления мероприятия
@@ -165,35 +184,33 @@ async def delete_event(event_id: str, token: dict = Depends(decode_jwt)):
     result = await events_data_collection.delete_one({"_id": ObjectId(event_id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Мероприятие не найдено")
+    count_cache.invalidate(events_data_collection)
+    await members.delete_event_members(event_id)
 
 
 
 
 # Эндпоинт для просмотра зрителей мероприятия
 @router.get("/events/{event_id}/spectators", response_model=List[UserSummary])
-async def get_spectators(event_id: str, token: dict = Depends(decode_jwt)):
+async def get_spectators(
+        response: Response,
+        event_id: str,
+        page: int = Query(1, ge=1),
+        limit: int = Query(50, ge=1, le=1000),
+        cursor: Optional[str] = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor"),
+        token: dict = Depends(decode_jwt)
+):
     """
-    Получение списка участников для мероприятия.
+    Получение списка зрителей мероприятия с пагинацией.
     - **event_id**: ID мероприятия.
     """
     # Проверка прав доступа
     await check_permissions(token)
 
-    # Поиск мероприятия в базе данных
-    event = await events_data_collection.find_one({"_id": ObjectId(event_id)})
-    if not event:
+    if not await members.event_exists(event_id):
         raise HTTPException(status_code=404, detail="Мероприятие не найдено")
 
-    # Получение уникальных user_id участников
-    spectator_user_ids = set()
-    for spectator in event.get("spectators", []):
-        spectator_user_ids.update(spectator.get("spectator_user_id", []))
-
-    # Проверяем, что spectator_user_ids - это множество строк
-    spectator_user_ids = [user_id for user_id in spectator_user_ids if isinstance(user_id, str)]
-
-    # Получаем пользователей асинхронно
-    data_users = await profile_data_collection.find({"user_id": {"$in": spectator_user_ids}}).to_list(length=None)
+    data_users = await members.page_member_profiles(response, event_id, MemberRole.SPECTATOR, limit, page, cursor)
 
     # Создаем список UserSummary
     return [UserSummary(**user) for user in data_users]
@@ -211,31 +228,14 @@ async def register_spectator(event_id: str, user_id: str, token: dict = Depends(
     await check_permissions(token, SERVICE_NAME, user_id=user_id)
 
     # Поиск мероприятия
-    event = await events_data_collection.find_one({"_id": ObjectId(event_id)})
-    if not event:
+    if not await members.event_exists(event_id):
         raise HTTPException(status_code=404, detail="Мероприятие не найдено")
 
-    # Проверка, есть ли уже зритель с таким user_id
-    spectator_found = False
-    for spectator in event.get("spectators", []):
-        if user_id in spectator.get("spectator_user_id", []):
-            spectator_found = True
-            break
-
-    if not spectator_found:
-        # Если зритель не найден, добавляем user_id в существующий объект или создаем новый
-        result = await events_data_collection.update_one(
-            {"_id": ObjectId(event_id)},
-            {"$addToSet": {"spectators.$[spectator].spectator_user_id": user_id}},
-            array_filters=[{"spectator.spectator_user_id": {"$ne": user_id}}]
-        )
-
-        if result.modified_count == 0:
-            # Если ни один объект не был обновлён, добавляем нового зрителя
-            await events_data_collection.update_one(
-                {"_id": ObjectId(event_id)},
-                {"$addToSet": {"spectators": {"spectator_user_id": [user_id]}}}
-            )
+    # Повторная регистрация ничего не меняет: запись зрителя добавляется через upsert
+    profile = await profile_data_collection.find_one({"user_id": user_id}, {"full_name": 1})
+    await members.add_members([
+        members.upsert_member(event_id, user_id, MemberRole.SPECTATOR, profile.get("full_name") if profile else None)
+    ])
 
 # Эндпоинт для удаления зрителя мероприятия
 @router.delete("/events/{event_id}/spectator/{user_id}", status_code=204)
@@ -247,12 +247,8 @@ async def delete_spectator(event_id: str, user_id: str, token: dict = Depends(de
     """
     await check_permissions(token, SERVICE_NAME, user_id=user_id)
 
-    # Удаление user_id из списка зрителей
-    result = await events_data_collection.update_one(
-        {"_id": ObjectId(event_id)},
-        {"$pull": {"spectators.$[].spectator_user_id": user_id}}  # Удаляем user_id из всех зрителей
-    )
-    if result.modified_count == 0:
+    # Удаление записи зрителя
+    if not await members.remove_member(event_id, user_id, MemberRole.SPECTATOR):
         raise HTTPException(status_code=404, detail="Зритель не найден или мероприятие не найдено")
 
 
@@ -261,11 +257,12 @@ async def delete_spectator(event_id: str, user_id: str, token: dict = Depends(de
 async def get_projects_by_event(
     response: Response,
     event_id: str,
-    page: int = 1,
-    limit: int = 10,
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=1000),
     author: str = "",
     title: str = "",
     rating: str = "",
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor"),
     token: dict = Depends(decode_jwt)
 ):
     """
@@ -276,55 +273,41 @@ async def get_projects_by_event(
     - **author**: Условие поиска по ФИО автора.
     - **title**: Условие поиска по названию проекта.
     - **rating**: Фильтр по оценке (оценено/не оценено).
+    - **cursor**: Курсор следующей страницы; если указан, page не используется.
     """
     await check_permissions(token)
 
     # Поиск мероприятия по ID
-    event = await events_data_collection.find_one({"_id": ObjectId(event_id)})
-    if not event:
+    if not await members.event_exists(event_id):
         raise HTTPException(status_code=404, detail="Мероприятие не найдено")
 
     # Получение списка проектов, связанных с мероприятием
-    participants = event.get("event_participants", [])
-    project_ids_flat = [participant["projects_id"] for participant in participants if "projects_id" in participant]
-    valid_project_ids = [pid for pid in project_ids_flat if ObjectId.is_valid(pid)]
+    project_ids = await members.event_project_ids(event_id)
+    valid_project_ids = [pid for pid in project_ids if ObjectId.is_valid(pid)]
 
     if not valid_project_ids:
+        response.headers['X-Total-Count'] = "0"
         return []  # Возвращаем пустой список, если нет корректных проектов
 
     # Создаем базовый фильтр для поиска
     filter_conditions = {"_id": {"$in": [ObjectId(pid) for pid in valid_project_ids]}}
 
-    # Добавляем фильтрацию по названию проекта, если указано
-    if title:
-        filter_conditions["project_name"] = {"$regex": title, "$options": "i"}
+    # Поиск по названию проекта и ФИО автора
+    search = SearchQuery(projects_data_collection.name).add("project_name", title).add("author_name", author)
+    filter_conditions.update(search.filter())
 
-    # Добавляем фильтрацию по ФИО автора, если указано
-    if author:
-        filter_conditions["author_name"] = {"$regex": author, "$options": "i"}
-
-    # Получение общего количества проектов перед пагинацией
-    total_count = await projects_data_collection.count_documents(filter_conditions)
-
-    # Получение проектов с учетом пагинации
-    projects_cursor = projects_data_collection.find(filter_conditions).skip((page - 1) * limit).limit(limit)
-    projects = await projects_cursor.to_list(length=limit)
-
-    # Фильтрация проектов по оценке
+    # Фильтрация проектов по оценке текущего эксперта
     if rating == "rated":
-        projects = [project for project in projects if any(review["expert_id"] == token["user_id"] for review in project.get("reviews", []))]
+        filter_conditions["reviews.expert_id"] = token["user_id"]
     elif rating == "not-rated":
-        projects = [project for project in projects if not any(review["expert_id"] == token["user_id"] for review in project.get("reviews", []))]
-
-    # Добавление project_id к проектам
-    for project in projects:
-        project["project_id"] = str(project["_id"])
+        filter_conditions["reviews.expert_id"] = {"$ne": token["user_id"]}
 
-    # Установка заголовка с общим количеством проектов
+    # Страница проектов и общее количество одним запросом
+    projects, _ = await find_page_with_total(projects_data_collection, filter_conditions, [("_id", ASCENDING)], limit,
+                                             page, cursor, projection=SUMMARY_PROJECTION, response=response,
+                                             search=search)
 
-    response.headers['X-Total-Count'] = str(total_count)
-
-    return [ProjectFICPersonSummary(**project) for project in projects]
+    return [project_to_summary(project) for project in projects]
 
 
 # Эндпоинт для получения мероприятий, где пользователь назначен экспертом
@@ -332,10 +315,12 @@ async def get_projects_by_event(
 async def get_events_as_expert(
         response: Response,
         token: dict = Depends(decode_jwt),
-        page: int = 1,
-        limit: int = 10,
+        page: int = Query(1, ge=1),
+        limit: int = Query(10, ge=1, le=1000),
         title: Optional[str] = None,
-        status: Optional[EventStatus] = None
+        status: Optional[EventStatus] = None,
+        cursor: Optional[str] = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor"),
+        approximate_total: bool = Query(False, description="Приблизительный подсчет X-Total-Count для больших списков")
 ):
     """
     Получение списка мероприятий, где пользователь назначен экспертом с пагинацией и фильтрацией.
@@ -345,16 +330,18 @@ async def get_events_as_expert(
     if not user_id:
         raise HTTPException(status_code=400, detail="Не удалось извлечь user_id из токена.")
 
-    query = {"event_experts": {"$elemMatch": {"user_id": user_id}}}
+    expert_event_ids = await members.user_event_ids(user_id, MemberRole.EXPERT)
+    query = {"_id": {"$in": [ObjectId(event_id) for event_id in expert_event_ids if ObjectId.is_valid(event_id)]}}
 
-    if title:
-        query["event_full_title"] = {"$regex": title, "$options": "i"}
+    search = SearchQuery(events_data_collection.name).add("event_full_title", title)
+    query.update(search.filter())
     if status:
         query["event_status"] = status.name
 
-    total_events = await events_data_collection.count_documents(query)
+    await set_total_count(response, events_data_collection, query, approximate_total)
 
-    events = await events_data_collection.find(query).skip((page - 1) * limit).limit(limit).to_list(length=limit)
+    events = await find_page(events_data_collection, query, [("_id", ASCENDING)], limit, page, cursor,
+                             response=response, search=search)
 
     # Возвращаем пустой список, если мероприятий не найдено
     if not events:
@@ -365,31 +352,48 @@ async def get_events_as_expert(
         event['id_event'] = str(event['_id'])
 
     # Возвращаем только список мероприятий
-    response.headers['X-Total-Count'] = str(total_events)  # Устанавливаем общее количество в заголовках
     return [EventReduced(**event) for event in events]
 
 # Эндпоинт для получения всех участников конкретного мероприятия
 @router.get("/events/{event_id}/participants", response_model=List[UserSummary])
-async def get_participants(event_id: str, token: dict = Depends(decode_jwt)):
+async def get_participants(
+        response: Response,
+        event_id: str,
+        page: int = Query(1, ge=1),
+        limit: int = Query(50, ge=1, le=1000),
+        cursor: Optional[str] = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor"),
+        token: dict = Depends(decode_jwt)
+):
     await check_permissions(token)
 
-    event = await events_data_collection.find_one({"_id": ObjectId(event_id)})
-    if not event:
+    if not await members.event_exists(event_id):
         raise HTTPException(status_code=404, detail="Мероприятие не найдено")
 
-    participant_user_ids = {participant["user_id"] for participant in event.get("event_participants", [])}
-
-    participant_user_ids = [user_id for user_id in participant_user_ids if isinstance(user_id, str)]
+    data_users = await members.page_member_profiles(response, event_id, MemberRole.PARTICIPANT, limit, page, cursor)
 
-    if not participant_user_ids:
+    if not data_users and page == 1 and not cursor:
         raise HTTPException(status_code=404, detail="Нет участников для данного мероприятия.")
 
-    data_users = await profile_data_collection.find({"user_id": {"$in": participant_user_ids}}).to_list(length=None)
-
     return [UserSummary(**user) for user in data_users]
 
 
 
+# Эндпоинт для получения ролей текущего пользователя на мероприятии
+@router.get("/events/{event_id}/members/me", response_model=List[EventMembership])
+async def get_my_memberships(event_id: str, token: dict = Depends(decode_jwt)):
+    """
+    Роли текущего пользователя на мероприятии и проекты, поданные им как участником.
+    Пустой список, если пользователь не состоит в мероприятии.
+    - **event_id**: ID мероприятия.
+    """
+    await check_permissions(token)
+
+    if not await members.event_exists(event_id):
+        raise HTTPException(status_code=404, detail="Мероприятие не найдено")
+
+    return [EventMembership(**member) for member in await members.user_memberships(event_id, token["user_id"])]
+
+
 # Эндпоинт добавления проекта в мероприятие и обновления участника.
 @router.patch("/events/{event_id}/project/{project_id}", status_code=204)
 async def registration_project_to_event(event_id: str, project_id: str, token: dict = Depends(decode_jwt)):
@@ -406,32 +410,20 @@ async def registration_project_to_event(event_id: str, project_id: str, token: d
     if not author_id:
         raise HTTPException(status_code=400, detail="Автор проекта не определен")
 
-    result = await events_data_collection.update_one(
-        {"_id": ObjectId(event_id), "event_participants.user_id": author_id},
-        {"$addToSet": {"event_participants.$.projects_id": project_id}}
-    )
-
-    if result.modified_count == 0:
-        new_participant = {
-            "user_id": author_id,
-            "user_full_name": author_name,
-            "projects_id": project_id,
-            "project_name": project_name,
-        }
-
-        update_result = await events_data_collection.update_one(
-            {"_id": ObjectId(event_id)},
-            {"$addToSet": {"event_participants": new_participant}}
-        )
+    if not await members.event_exists(event_id):
+        raise HTTPException(status_code=404, detail="Мероприятие не найдено")
 
-        # Обновляем проект, добавляя assigned_event_id
-        await projects_data_collection.update_one(
-            {"_id": ObjectId(project_id)},
-            {"$set": {"assigned_event_id": event_id}}
-        )
+    # Автор становится участником мероприятия, проект добавляется к его проектам
+    await members.add_members([
+        members.upsert_member(event_id, author_id, MemberRole.PARTICIPANT, author_name,
+                              [{"project_id": project_id, "project_name": project_name or "Не указано"}])
+    ])
 
-        if update_result.modified_count == 0:
-            raise HTTPException(status_code=400, detail="Не удалось добавить проект и участника")
+    # Обновляем проект, добавляя assigned_event_id
+    await projects_data_collection.update_one(
+        {"_id": ObjectId(project_id)},
+        {"$set": {"assigned_event_id": event_id}}
+    )
 
 
 # Эндпоинт удаления участника с указанным projects_id из мероприятия
@@ -445,8 +437,7 @@ async def delete_project_from_event(event_id: str, project_id: str, token: dict
         raise HTTPException(status_code=404, detail="Проект не найден")
 
     # Проверяем, существует ли событие
-    event = await events_data_collection.find_one({"_id": ObjectId(event_id)})
-    if not event:
+    if not await members.event_exists(event_id):
         raise HTTPException(status_code=404, detail="Событие не найдено")
 
     # Удаляем событие из проекта
@@ -455,11 +446,6 @@ async def delete_project_from_event(event_id: str, project_id: str, token: dict
         {"$set": {"assigned_event_id": None}}
     )
 
-    # Удаляем участника с указанным projects_id из мероприятия
-    result = await events_data_collection.update_one(
-        {"_id": ObjectId(event_id)},
-        {"$pull": {"event_participants": {"projects_id": project_id}}}
-    )
-
-    if result.modified_count == 0:
+    # Удаляем проект из участников мероприятия
+    if not await members.remove_project(project_id, event_id):
         raise HTTPException(status_code=404, detail="Участник с указанным projects_id не найден")
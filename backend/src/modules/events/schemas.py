@@ -15,6 +15,34 @@ class EventUserData(BaseModel):
     user_id: constr(min_length=1) = Field(..., description="ID Пользователя")
     user_full_name: constr(min_length=1) = Field(..., description="ФИО Пользователя")
 
+class MemberRole(str, Enum):
+    PARTICIPANT = "participant"
+    EXPERT = "expert"
+    MANAGER = "manager"
+    SPECTATOR = "spectator"
+
+class EventMemberProject(BaseModel):
+    project_id: str = Field(..., description="ID Проекта")
+    project_name: str = Field(..., description="Название Проекта")
+
+class EventMember(BaseModel):
+    """
+    Схема документа коллекции event_members: пользователь в роли на мероприятии.
+    """
+    event_id: str = Field(..., description="ID Мероприятия")
+    user_id: str = Field(..., description="ID Пользователя")
+    role: MemberRole = Field(..., description="Роль на мероприятии")
+    user_full_name: str = Field(..., description="ФИО Пользователя")
+    projects: List[EventMemberProject] = Field(default_factory=list, description="Проекты участника")
+    joined_at: datetime = Field(..., description="Время добавления")
+
+class EventMembership(BaseModel):
+    """
+    Роль текущего пользователя на мероприятии и его проекты в этой роли.
+    """
+    role: MemberRole = Field(..., description="Роль на мероприятии")
+    projects: List[EventMemberProject] = Field(default_factory=list, description="Проекты участника")
+
 class EventParticipantsData(BaseModel):
     user_id: constr(min_length=1) = Field(..., description="ID Пользователя")
     user_full_name: constr(min_length=1) = Field(..., description="ФИО Пользователя")
@@ -45,8 +73,10 @@ class EventBase(BaseModel):
     event_managers: List[EventUserData] = Field(default_factory=list, description="Менеджеры мероприятия")
     event_experts: List[EventUserData] = Field(default_factory=list, description="Эксперты мероприятия")
 
-    event_spectators: List[EventUserData] = Field(default_factory=list, description="Зрители мероприятия")
-    event_participants: List[EventParticipantsData] = Field(default_factory=list, description="Участники мероприятия")
+    event_spectators: List[EventUserData] = Field(
+        default_factory=list, description="Зрители мероприятия (в ответах пусто, см. /events/{event_id}/spectators)")
+    event_participants: List[EventParticipantsData] = Field(
+        default_factory=list, description="Участники мероприятия (в ответах пусто, см. /events/{event_id}/participants)")
 
 
 
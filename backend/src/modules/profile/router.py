@@ -5,6 +5,9 @@ from src.modules.auth.utils import create_jwt, decode_jwt
 from src.utils import check_permissions
 from src.modules.profile.schemas import DataUserUpdate, RoleEnum, ProfileData, ExternalServiceAccounts, SquadInfo, UserSummary, RoleUpdate, UserResponse
 from src.database import profile_data_collection, authorization_accounts_collection
+from src.pagination import count_cache, find_page, set_total_count
+from src.search import SearchQuery, search_update
+from pymongo import ASCENDING
 
 # Создаем экземпляр маршрутизатора
 router = APIRouter()
@@ -68,7 +71,9 @@ async def get_all_users(
         limit: Optional[int] = Query(50, ge=1, le=1000),
         full_name: Optional[str] = Query(None),
         yandex: Optional[str] = Query(None),
-        role_name: Optional[str] = Query(None)
+        role_name: Optional[str] = Query(None),
+        cursor: Optional[str] = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor"),
+        approximate_total: bool = Query(False, description="Приблизительный подсчет X-Total-Count для больших списков")
 ):
     # Проверка прав доступа
     if details:
@@ -78,20 +83,15 @@ async def get_all_users(
     else:
         raise HTTPException(status_code=400, detail="Укажите либо «details», либо «abbreviated» параметр")
 
-    skip = (page - 1) * limit
-
-    query = {}
-    if full_name:
-        query["full_name"] = {"$regex": full_name, "$options": "i"}
-    if yandex:
-        query["external_service_accounts.yandex"] = {"$regex": yandex, "$options": "i"}
+    search = SearchQuery(profile_data_collection.name).add("full_name", full_name) \
+        .add("external_service_accounts.yandex", yandex)
+    query = search.filter()
     if role_name:
         query["role_name"] = role_name
 
-    total_users = await profile_data_collection.count_documents(query)
-    data_users = await profile_data_collection.find(query).skip(skip).limit(limit).to_list(length=limit)
-
-    response.headers['X-Total-Count'] = str(total_users)
+    await set_total_count(response, profile_data_collection, query, approximate_total)
+    data_users = await find_page(profile_data_collection, query, [("_id", ASCENDING)], limit, page, cursor,
+                                 response=response, search=search)
 
     # Возвращаем пустой список, если пользователей нет
     if not data_users:
@@ -161,9 +161,11 @@ async def update_user_profile(user_id: str, user_data: DataUserUpdate, token: di
                 set_operations[f"{key}.{sub_key}"] = sub_value
         else:
             set_operations[key] = value
+    set_operations.update(search_update(profile_data_collection.name, set_operations))
 
     # Применение точечного обновления
     result = await profile_data_collection.update_one({"user_id": user_id}, {"$set": set_operations})
+    count_cache.invalidate(profile_data_collection)
 
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
@@ -184,6 +186,7 @@ async def delete_user_profile(user_id: str, token: dict = Depends(decode_jwt)):
 
     # Удаление из коллекций
     result = await profile_data_collection.delete_one({"user_id": user_id})
+    count_cache.invalidate(profile_data_collection)
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -211,6 +214,7 @@ async def assign_user_role(
         {"user_id": user_id},
         {"$set": {"role_name": role}}
     )
+    count_cache.invalidate(profile_data_collection)
 
     # Проверяем, была ли изменена запись
     if result.modified_count == 0:
@@ -231,9 +235,8 @@ async def get_users_by_role(
     # Создаем базовый запрос для поиска пользователей по роли
     query = {"role_name": role_name}
 
-    # Добавляем фильтры по ФИО, если они указаны
-    if full_name:
-        query["full_name"] = {"$regex": full_name, "$options": "i"}
+    # Добавляем поиск по ФИО, если он указан
+    query.update(SearchQuery(profile_data_collection.name).add("full_name", full_name).filter())
 
     # Поиск пользователей в базе данных
     users = await profile_data_collection.find(query).to_list(length=100)  # Ограничим до 100 пользователей
@@ -266,9 +269,8 @@ async def get_users_by_role_type(
     # Создаем базовый запрос для поиска пользователей по ролям
     query = {"role_name": {"$in": roles}}
 
-    # Добавляем фильтры по ФИО, если они указаны
-    if full_name:
-        query["full_name"] = {"$regex": full_name, "$options": "i"}
+    # Добавляем поиск по ФИО, если он указан
+    query.update(SearchQuery(profile_data_collection.name).add("full_name", full_name).filter())
 
     # Поиск пользователей в базе данных
     users = await profile_data_collection.find(query).to_list(length=100)  # Ограничим до 100 пользователей
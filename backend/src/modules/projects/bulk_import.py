@@ -0,0 +1,229 @@
+# src/modules/projects/bulk_import.py
+import asyncio
+import logging
+import os
+import time
+import zipfile
+from typing import Any, Dict, IO, List, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+from pymongo.errors import BulkWriteError
+
+from src.config import settings
+from src.database import events_data_collection, projects_data_collection
+from src.modules.events.members import add_members, upsert_member
+from src.modules.events.schemas import MemberRole
+from src.modules.projects.parser_pool import parser_pool
+from src.pagination import count_cache
+from src.modules.projects.schemas import BulkImportFileResult, BulkImportReport
+from src.modules.projects.utils import create_project_from_file, file_too_large, store_blob
+
+logger = logging.getLogger(__name__)
+
+# Флаг ZIP, означающий, что имя файла записано в UTF-8
+ZIP_UTF8_FLAG = 0x800
+
+
+def member_file_name(info: zipfile.ZipInfo) -> str:
+    """
+    Имя файла из архива без каталогов.
+    Архивы, созданные в Windows, хранят кириллические имена в cp866,
+    а zipfile без флага UTF-8 декодирует их как cp437.
+    """
+    name = info.filename
+    if not info.flag_bits & ZIP_UTF8_FLAG:
+        try:
+            name = name.encode("cp437").decode("cp866")
+        except (UnicodeEncodeError, UnicodeDecodeError):
+            pass
+    return os.path.basename(name.replace("\\", "/"))
+
+
+def extract_archive_members(archive: IO[bytes]) -> List[Dict[str, Any]]:
+    """
+    Распаковывает DOCX файлы архива в хранилище загрузок по одному,
+    не загружая архив целиком в память.
+
+    Ограничения на число файлов и их суммарный размер проверяются по заголовкам
+    архива до распаковки; zipfile не отдает больше байт, чем указано в заголовке.
+    Каждый файл проходит те же проверки размера и формата, что и одиночная загрузка.
+    """
+    try:
+        zip_file = zipfile.ZipFile(archive)
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="Файл не является ZIP архивом")
+
+    members = []
+    accepted = []
+    with zip_file:
+        for info in zip_file.infolist():
+            if info.is_dir() or info.filename.startswith("__MACOSX/"):
+                continue
+
+            file_name = member_file_name(info)
+            if not file_name.lower().endswith(".docx") or file_name.startswith("~$"):
+                members.append({"file_name": file_name, "status": "skipped", "error": "Файл не является DOCX"})
+                continue
+
+            if info.file_size > settings.upload_max_size:
+                members.append({"file_name": file_name, "status": "failed",
+                                "error": file_too_large(settings.upload_max_size).detail})
+                continue
+
+            member = {"file_name": file_name, "status": None}
+            members.append(member)
+            accepted.append((info, member))
+
+        if len(accepted) > settings.bulk_import_max_files:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Архив содержит больше {settings.bulk_import_max_files} файлов"
+            )
+        if sum(info.file_size for info, _ in accepted) > settings.bulk_import_max_total_size:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                detail=f"Размер распакованных файлов архива превышает "
+                       f"{settings.bulk_import_max_total_size // (1024 * 1024)} МБ"
+            )
+
+        for info, member in accepted:
+            try:
+                with zip_file.open(info) as source:
+                    stored = store_blob(source, settings.upload_max_size)
+            except HTTPException as e:
+                member["status"], member["error"] = "failed", str(e.detail)
+                continue
+            except (zipfile.BadZipFile, zipfile.LargeZipFile, OSError, RuntimeError) as e:
+                logger.warning(f"Не удалось распаковать '{member['file_name']}': {e}")
+                member["status"], member["error"] = "failed", "Не удалось распаковать файл"
+                continue
+
+            member["file_path"], member["file_hash"] = stored.file_path, stored.file_hash
+
+    return members
+
+
+async def parse_member(member: Dict[str, Any], token: dict, project_template: str):
+    """Разбирает файл в пуле; при переполнении пула ждет освобождения места."""
+    started = time.perf_counter()
+    deadline = started + settings.parser_job_timeout
+    while True:
+        try:
+            member["project"] = await create_project_from_file(
+                token, project_template, member["file_path"], member["file_hash"]
+            )
+            member["status"] = "created"
+            break
+        except HTTPException as e:
+            if e.status_code == status.HTTP_503_SERVICE_UNAVAILABLE and time.perf_counter() < deadline:
+                await asyncio.sleep(0.2)
+                continue
+            member["status"], member["error"] = "failed", str(e.detail)
+            break
+        except ValueError as e:
+            # Ошибка структуры заявки - сообщение адресовано пользователю
+            member["status"], member["error"] = "failed", str(e)
+            break
+        except Exception as e:
+            logger.warning(f"Ошибка при разборе файла '{member['file_name']}': {e}")
+            member["status"], member["error"] = "failed", "Не удалось прочитать DOCX файл"
+            break
+    member["parse_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+
+async def parse_archive(archive: IO[bytes], token: dict, project_template: str) -> List[Dict[str, Any]]:
+    """
+    Распаковывает архив и разбирает DOCX файлы параллельно.
+    Одновременно разбирается не больше файлов, чем воркеров в пуле,
+    чтобы пакетный импорт не вытеснял одиночные загрузки из очереди.
+    """
+    members = await run_in_threadpool(extract_archive_members, archive)
+
+    semaphore = asyncio.Semaphore(parser_pool.workers)
+
+    async def bounded(member: Dict[str, Any]):
+        async with semaphore:
+            await parse_member(member, token, project_template)
+
+    await asyncio.gather(*(bounded(member) for member in members if member["status"] is None))
+    return members
+
+
+async def insert_projects(members: List[Dict[str, Any]], event_id: Optional[str] = None):
+    """Сохраняет разобранные проекты пачками через insert_many."""
+    created = [member for member in members if member["status"] == "created"]
+    batch_size = settings.bulk_import_batch_size
+
+    for offset in range(0, len(created), batch_size):
+        batch = created[offset:offset + batch_size]
+        documents = [member["project"] for member in batch]
+        for document in documents:
+            document["assigned_event_id"] = event_id
+
+        try:
+            await projects_data_collection.insert_many(documents, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                member = batch[error["index"]]
+                member["status"], member["error"] = "failed", "Ошибка при сохранении проекта"
+                logger.error(f"Ошибка при сохранении проекта из '{member['file_name']}': {error.get('errmsg')}")
+
+        # insert_many проставляет _id в документах, повторно читать проекты не нужно
+        for member in batch:
+            if member["status"] == "created":
+                member["project_id"] = str(member["project"]["_id"])
+
+    if created:
+        count_cache.invalidate(projects_data_collection)
+
+
+async def assign_projects_to_event(members: List[Dict[str, Any]], event_id: str):
+    """Добавляет созданные проекты в участники мероприятия одной пакетной записью."""
+    await add_members([
+        upsert_member(event_id, member["project"]["author_id"], MemberRole.PARTICIPANT,
+                      member["project"].get("author_name"),
+                      [{"project_id": member["project_id"],
+                        "project_name": member["project"].get("project_name") or "Не указано"}])
+        for member in members if member["status"] == "created"
+    ])
+
+
+async def import_projects_archive(archive: IO[bytes], token: dict, project_template: str,
+                                  event_id: Optional[str] = None) -> BulkImportReport:
+    started = time.perf_counter()
+
+    if event_id:
+        if not ObjectId.is_valid(event_id):
+            raise HTTPException(status_code=400, detail="Неверный формат event_id")
+        if not await events_data_collection.find_one({"_id": ObjectId(event_id)}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Мероприятие не найдено")
+
+    members = await parse_archive(archive, token, project_template)
+    await insert_projects(members, event_id)
+    if event_id:
+        await assign_projects_to_event(members, event_id)
+
+    duration = time.perf_counter() - started
+    documents = [member for member in members if member["status"] != "skipped"]
+    created = sum(1 for member in documents if member["status"] == "created")
+
+    return BulkImportReport(
+        total=len(documents),
+        created=created,
+        failed=len(documents) - created,
+        assigned_event_id=event_id,
+        duration_ms=round(duration * 1000, 1),
+        documents_per_second=round(len(documents) / duration, 2) if duration else 0.0,
+        files=[
+            BulkImportFileResult(
+                file_name=member["file_name"],
+                status=member["status"],
+                project_id=member.get("project_id"),
+                error=member.get("error"),
+                parse_ms=member.get("parse_ms")
+            )
+            for member in members
+        ]
+    )
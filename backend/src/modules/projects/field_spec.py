@@ -0,0 +1,466 @@
+# src/modules/projects/field_spec.py
+"""
+Декларативное описание шаблона заявки и движок, собирающий по нему записи блоков.
+
+Шаблон (TemplateSpec) перечисляет блоки документа с их заголовками, записи блоков
+с полями, типами значений и правилами повторения. При импорте модуля все подписи
+шаблона компилируются в один LineMatcher, поэтому каждая строка документа
+сопоставляется с подписями один раз, а новый вариант шаблона добавляется
+описанием, без новых веток кода.
+"""
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def parse_int(value: str) -> int:
+    digits = re.sub(r'\D', '', value)
+    return int(digits) if digits else 0
+
+
+class Field:
+    """
+    Поле записи в строке вида "Подпись: значение".
+
+    type: "str" - значение строкой, "int" - число, "lines" - значения накапливаются
+    построчно с "\\n", "list" - значения накапливаются списком.
+    continuation: следующие строки без подписи дописываются в поле; для "str"
+    это разделитель, для "lines" и "list" достаточно True. Дописывание продолжается
+    до следующего многострочного поля или поля с breaks.
+    """
+    __slots__ = ("label", "key", "type", "continuation", "breaks")
+
+    def __init__(self, label: str, key: str, type: str = "str", continuation: Any = None, breaks: bool = False):
+        self.label = label
+        self.key = key
+        self.type = type
+        self.continuation = continuation
+        self.breaks = breaks
+
+
+class Marker:
+    """
+    Строка-маркер без двоеточия, например 'Категория "..."' или 'Запись № 1'.
+
+    opens: вид записи, которую открывает маркер; иначе значение первой группы
+    шаблона сохраняется в контекст блока под именем маркера.
+    requires: маркер учитывается, только если в контексте есть это значение.
+    closes: маркер завершает текущую запись.
+    column: заголовок столбца таблицы с тем же значением.
+    """
+    __slots__ = ("name", "pattern", "opens", "requires", "closes", "column")
+
+    def __init__(self, name: str, pattern: str, opens: Optional[str] = None, requires: Optional[str] = None,
+                 closes: bool = False, column: Optional[str] = None):
+        self.name = name
+        self.pattern = pattern
+        self.opens = opens
+        self.requires = requires
+        self.closes = closes
+        self.column = column
+
+
+class Record:
+    """
+    Повторяющаяся запись блока. Новая запись начинается с поля или маркера opener;
+    запись с parent может появиться только после записи-родителя.
+    В запись копируются значения контекста блока из context.
+    """
+    __slots__ = ("kind", "opener", "fields", "parent", "context")
+
+    def __init__(self, kind: str, opener: str, fields: Iterable[Field] = (), parent: Optional[str] = None,
+                 context: Iterable[str] = ()):
+        self.kind = kind
+        self.opener = opener
+        self.fields = tuple(fields)
+        self.parent = parent
+        self.context = tuple(context)
+
+
+class BlockSpec:
+    """
+    Блок документа между заголовками. Границы совпадают с SectionIndex.section([start_header], end_header):
+    сбор идет от первого стартового заголовка до первого конечного.
+    """
+    __slots__ = ("name", "start_header", "end_header", "records", "markers", "skip_blank", "fields", "columns")
+
+    def __init__(self, name: str, start_header: str, end_header: Optional[str], records: Iterable[Record],
+                 markers: Iterable[Marker] = (), skip_blank: bool = False):
+        self.name = name
+        self.start_header = start_header
+        self.end_header = end_header
+        self.records = tuple(records)
+        self.markers = {marker.name: marker for marker in markers}
+        self.skip_blank = skip_blank
+
+        # Подпись -> (запись, поле)
+        self.fields: Dict[str, Tuple[Record, Field]] = {}
+        for record in self.records:
+            for field in record.fields:
+                if field.label in self.fields:
+                    raise ValueError(f"Подпись '{field.label}' повторяется в блоке '{name}'")
+                self.fields[field.label] = (record, field)
+
+        # Заголовки столбцов таблиц -> подпись поля или имя маркера
+        self.columns = {label.casefold(): label for label in self.fields}
+        self.columns.update({marker.column.casefold(): marker.name for marker in self.markers.values() if marker.column})
+
+    def record(self, kind: str) -> Record:
+        return next(record for record in self.records if record.kind == kind)
+
+
+class LineMatcher:
+    """
+    Сопоставляет строку со всеми подписями шаблона за одно обращение:
+    текст до первого двоеточия ищется в множестве подписей, а строки-маркеры
+    проверяются одним объединенным регулярным выражением.
+    """
+
+    def __init__(self, labels: Iterable[str], markers: Iterable[Marker]):
+        self.labels = frozenset(labels)
+        for label in self.labels:
+            if ":" in label:
+                raise ValueError(f"Подпись '{label}' не должна содержать двоеточие")
+
+        parts = []
+        self._groups: Dict[int, Tuple[str, Optional[int]]] = {}
+        group = 0
+        for name, pattern in {marker.name: marker.pattern for marker in markers}.items():
+            inner_groups = re.compile(pattern).groups
+            parts.append(f"({pattern})")
+            group += 1
+            self._groups[group] = (name, group + 1 if inner_groups else None)
+            group += inner_groups
+        self._markers = re.compile("|".join(parts)) if parts else None
+
+    def match(self, line: str) -> Tuple[Optional[str], Optional[str]]:
+        """Возвращает (подпись или имя маркера, значение) либо (None, None)."""
+        head, colon, rest = line.partition(":")
+        if colon and head in self.labels:
+            return head, rest.strip()
+        if self._markers is not None:
+            match = self._markers.match(line)
+            if match:
+                name, value_group = self._groups[match.lastindex]
+                return name, match.group(value_group) if value_group else None
+        return None, None
+
+
+class TemplateSpec:
+    """
+    Описание шаблона заявки: блоки с записями, поля уровня документа
+    (встречаются в любом месте файла, побеждает последнее значение)
+    и текстовые поля между заголовками.
+    """
+
+    def __init__(self, name: str, blocks: Iterable[BlockSpec], document_fields: Dict[str, str],
+                 sections: Dict[str, Tuple[Tuple[str, str], Tuple[Tuple[str, str, str], ...]]]):
+        self.name = name
+        self.blocks = tuple(blocks)
+        self.document_fields = document_fields
+        self.sections = sections
+
+        self.matcher = LineMatcher(
+            [label for block in self.blocks for label in block.fields] + list(document_fields),
+            [marker for block in self.blocks for marker in block.markers.values()]
+        )
+        self.headers = tuple(
+            header for block in self.blocks for header in (block.start_header, block.end_header) if header
+        )
+
+
+class BlockRows:
+    """Собирает строки одного блока в записи по BlockSpec."""
+
+    def __init__(self, spec: BlockSpec, matcher: LineMatcher):
+        self.spec = spec
+        self.matcher = matcher
+        self.rows: List[Dict[str, Any]] = []
+        self.active = False
+        self.done = False
+        self.context: Dict[str, Any] = {}
+        self._open: Dict[str, Dict[str, Any]] = {}
+        self._current: Optional[Dict[str, Any]] = None
+        self._continuation: Optional[Field] = None
+
+    def feed_header(self, line: str):
+        """Строка, начинающаяся с одного из заголовков блоков шаблона."""
+        if self.done:
+            return
+        if line.startswith(self.spec.start_header):
+            # Повторный стартовый заголовок пропускается
+            self.active = True
+        elif self.spec.end_header and line.startswith(self.spec.end_header):
+            self.active, self.done = False, True
+        elif self.active:
+            self.handle(line.strip(), *self.matcher.match(line.strip()))
+
+    def open_record(self, record: Record, values: Dict[str, Any]) -> bool:
+        if record.parent and record.parent not in self._open:
+            return False
+        row = {"kind": record.kind, **{key: self.context.get(key) for key in record.context}, **values}
+        self.rows.append(row)
+        self._open[record.kind] = row
+        for child in self.spec.records:
+            if child.parent == record.kind:
+                self._open.pop(child.kind, None)
+        self._current = row
+        self._continuation = None
+        return True
+
+    def set_field(self, field: Field, value: str):
+        row = self._current
+        if field.type == "int":
+            row[field.key] = parse_int(value)
+        elif field.type == "lines":
+            row[field.key] = row.get(field.key, "") + value + "\n"
+        elif field.type == "list":
+            row.setdefault(field.key, []).append(value)
+        else:
+            row[field.key] = value
+        if field.continuation is not None:
+            self._continuation = field
+        elif field.breaks:
+            self._continuation = None
+
+    def continue_field(self, line: str):
+        row, field = self._current, self._continuation
+        if field.type == "lines":
+            row[field.key] = row.get(field.key, "") + line + "\n"
+        elif field.type == "list":
+            row.setdefault(field.key, []).append(line)
+        else:
+            row[field.key] = row.get(field.key, "") + field.continuation + line
+
+    def handle(self, line: str, token: Optional[str], value: Optional[str]):
+        if not line and self.spec.skip_blank:
+            return
+
+        entry = self.spec.fields.get(token)
+        if entry is not None:
+            record, field = entry
+            if field.label == record.opener:
+                if self.open_record(record, {}):
+                    self.set_field(field, value)
+            elif self._current is not None and self._current["kind"] == record.kind:
+                self.set_field(field, value)
+            return
+
+        marker = self.spec.markers.get(token)
+        if marker is not None:
+            if marker.requires and not self.context.get(marker.requires):
+                return
+            if marker.opens:
+                self.open_record(self.spec.record(marker.opens), {})
+                return
+            self.context[marker.name] = value
+            if marker.closes:
+                self._current, self._continuation = None, None
+            return
+
+        # Строка без подписи этого блока продолжает многострочное поле
+        if self._continuation is not None and self._current is not None:
+            self.continue_field(line)
+
+    def feed_table(self, rows: List[List[str]]):
+        if not self.active or not rows:
+            return
+
+        header = [self.spec.columns.get(cell.rstrip(':').strip().casefold()) for cell in rows[0]]
+        if sum(1 for column in header if column) >= 2:
+            # Таблица с заголовками столбцов: каждая строка - отдельная запись
+            for cells in rows[1:]:
+                values = {column: value.strip() for column, value in zip(header, cells) if column}
+                if any(values.values()):
+                    self.handle_table_record(values)
+            return
+
+        # Таблица "подпись | значение" или ячейки с текстом "Подпись: значение"
+        for cells in rows:
+            column = self.spec.columns.get(cells[0].rstrip(':').strip().casefold()) if len(cells) >= 2 else None
+            if column in self.spec.fields:
+                line = f"{column}: {' '.join(cells[1:]).strip()}"
+                self.handle(line, *self.matcher.match(line))
+            else:
+                for cell in cells:
+                    for line in cell.split('\n'):
+                        line = line.strip()
+                        self.handle(line, *self.matcher.match(line))
+
+    def handle_table_record(self, values: Dict[str, str]):
+        # Маркеры строки (категория, тип) обновляют контекст блока
+        for name, marker in self.spec.markers.items():
+            if values.get(name) and not marker.opens:
+                self.context[name] = values[name].strip('"')
+
+        opened = False
+        for record in self.spec.records:
+            opener = values.get(record.opener)
+            if not opener:
+                continue
+            current = self._open.get(record.kind)
+            # Значение родительской записи повторяется в каждой строке таблицы
+            if current is not None and any(child.parent == record.kind for child in self.spec.records) \
+                    and current.get(self.spec.fields[record.opener][1].key) == opener:
+                self._current = current
+                continue
+            self.open_record(record, {})
+            opened = True
+
+        if not opened:
+            innermost = self.spec.records[-1]
+            if not values.get(innermost.opener):
+                self.open_record(innermost, {})
+
+        for label, value in values.items():
+            entry = self.spec.fields.get(label)
+            if entry is None or not value:
+                continue
+            record, field = entry
+            row = self._open.get(record.kind)
+            if row is not None:
+                self._current = row
+                self.set_field(field, value)
+        self._continuation = None
+
+
+class DocumentRows:
+    """Собирает записи всех блоков шаблона за один проход по документу."""
+
+    def __init__(self, spec: TemplateSpec):
+        self.spec = spec
+        self.blocks = {block.name: BlockRows(block, spec.matcher) for block in spec.blocks}
+
+    @property
+    def rows(self) -> Dict[str, List[Dict[str, Any]]]:
+        return {name: block.rows for name, block in self.blocks.items()}
+
+    def feed_line(self, line: str, token: Optional[str], value: Optional[str]):
+        if line.startswith(self.spec.headers):
+            for block in self.blocks.values():
+                block.feed_header(line)
+            return
+
+        # Строка без заголовков блоков нужна только собирающим блокам
+        stripped = line.strip()
+        for block in self.blocks.values():
+            if block.active:
+                block.handle(stripped, token, value)
+
+    def feed_table(self, rows: List[List[str]]):
+        for block in self.blocks.values():
+            block.feed_table(rows)
+
+
+# Шаблон "ФИЗ_ЛИЦО"
+FIZ_LITSO_SPEC = TemplateSpec(
+    name="ФИЗ_ЛИЦО",
+    document_fields={
+        "ФИО": "author_name",
+        "Название проекта": "project_name",
+        "Регион проекта": "region",
+        "Контакты": "contacts",
+    },
+    sections={
+        "tab_general_info": (
+            ('Блок "Общая информация"', 'Блок "Информация о проекте"'),
+            (
+                ("project_scale", "Масштаб реализации проекта:", "Дата начала и окончания проекта:"),
+                ("project_duration", "Дата начала и окончания проекта:", 'Блок "Дополнительная информация об авторе проекта"'),
+                ("author_experience", "Опыт автора проекта:", "Описание функционала автора проекта:"),
+                ("author_functionality", "Описание функционала автора проекта:", "Адрес регистрации автора проекта:"),
+                ("author_registration_address", "Адрес регистрации автора проекта:", "Добавить резюме:"),
+                ("video_link", "Видео-визитка (ссылка на ролик на любом видеохостинге):", 'Вкладка "О проекте"'),
+            ),
+        ),
+        "tab_project_info": (
+            ('Блок "Информация о проекте"', 'Вкладка "Команда'),
+            (
+                ("brief_info", "Краткая информация о проекте:", "Описание проблемы, решению/снижению которой посвящен проект:"),
+                ("problem_description", "Описание проблемы, решению/снижению которой посвящен проект:", "Основные целевые группы, на которые направлен проект:"),
+                ("target_groups", "Основные целевые группы, на которые направлен проект:", "Основная цель проекта:"),
+                ("main_goal", "Основная цель проекта:", "Опыт успешной реализации проекта:"),
+                ("successful_experience", "Опыт успешной реализации проекта:", "Перспектива развития и потенциал проекта:"),
+                ("development_perspective", "Перспектива развития и потенциал проекта:", 'Блок "Задачи"'),
+            ),
+        ),
+    },
+    blocks=(
+        BlockSpec(
+            "project", 'Блок "Информация о проекте"', 'Вкладка "Команда',
+            records=(
+                Record("task", "Поставленная задача", [Field("Поставленная задача", "task_name")]),
+                Record("geography", "Выберите регион или федеральный округ", [
+                    Field("Выберите регион или федеральный округ", "region"),
+                    Field("Адрес", "address"),
+                ]),
+            ),
+        ),
+        BlockSpec(
+            "team", 'Вкладка "Команда"', 'Вкладка "Результаты"',
+            records=(
+                Record("teammate", "ФИО наставника", [
+                    Field("ФИО наставника", "mentor_name"),
+                    Field("E-mail наставника", "mentor_email"),
+                    Field("Роль в проекте", "role"),
+                    Field("Компетенции, опыт, подтверждающие возможность участника выполнять роль в команде", "competencies"),
+                ]),
+            ),
+        ),
+        BlockSpec(
+            "calendar", 'Вкладка "Календарный план"', 'Вкладка "Медиа"',
+            records=(
+                Record("task", "Поставленная задача", [Field("Поставленная задача", "task_name")]),
+                Record("event", "Название мероприятия", parent="task", fields=[
+                    Field("Название мероприятия", "title"),
+                    Field("Крайняя дата выполнения", "due_date"),
+                    Field("Описание мероприятия", "description", "lines"),
+                    Field("Количество уникальных участников", "unique_participants", "int"),
+                    Field("Количество повторяющихся участников", "recurring_participants", "int"),
+                    Field("Количество публикаций", "publications_count", "int"),
+                    Field("Количество просмотров", "views_count", "int"),
+                    Field("Дополнительная информация", "additional_info", "lines", continuation=True),
+                ]),
+            ),
+        ),
+        BlockSpec(
+            "media", 'Вкладка "Медиа"', 'Вкладка "Расходы"', skip_blank=True,
+            records=(
+                Record("media_resource", "Вид ресурса", [
+                    Field("Вид ресурса", "resource_type"),
+                    Field("Месяц публикации", "publication_month"),
+                    Field("Планируемое количество просмотров", "planned_views"),
+                    Field("Ссылки на ресурсы", "resource_links", "list", continuation=True),
+                    Field("Почему выбран такой формат медиа", "reason_for_format", continuation=" "),
+                ]),
+            ),
+        ),
+        BlockSpec(
+            "expenses", 'Вкладка "Расходы"', 'Вкладка "Софинансирование"',
+            markers=(
+                Marker("category", r'Категория "(.*)"', closes=True, column="Категория"),
+                Marker("type", r'Тип "(.*)"', requires="category", column="Тип"),
+                Marker("record", r'Запись № \d+', opens="expense"),
+            ),
+            records=(
+                Record("expense", "record", context=("category", "type"), fields=[
+                    Field("Название", "title"),
+                    Field("Описание", "description"),
+                    Field("Количество", "quantity"),
+                    Field("Цена", "price"),
+                    Field("Сумма", "total"),
+                ]),
+            ),
+        ),
+        BlockSpec(
+            "additional_files", 'Вкладка "Доп. Файлы"', None, skip_blank=True,
+            records=(
+                Record("file", "Описание файла", [
+                    Field("Описание файла", "file_description", continuation="\n"),
+                    Field("Выберете файл", "file", breaks=True),
+                ]),
+            ),
+        ),
+    ),
+)
+
+TEMPLATE_SPECS = {FIZ_LITSO_SPEC.name: FIZ_LITSO_SPEC}
@@ -0,0 +1,222 @@
+# src/modules/projects/import_jobs.py
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException, status
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from src.config import settings
+from src.database import import_jobs_collection, projects_data_collection
+from src.pagination import count_cache
+from src.modules.projects.schemas import ImportJob, ImportJobState, ImportJobTimings, UploadedFile
+from src.modules.projects.utils import create_project_from_file
+
+logger = logging.getLogger(__name__)
+
+# Задача в состоянии running с истекшей арендой считается брошенной
+# (например, процесс был перезапущен) и снова забирается воркером
+JOB_LEASE_SECONDS = settings.parser_job_timeout * 2
+
+
+def elapsed_ms(start: Optional[datetime], end: Optional[datetime]) -> Optional[float]:
+    if not start or not end:
+        return None
+    return round((end - start).total_seconds() * 1000, 1)
+
+
+def job_to_response(job: Dict[str, Any]) -> ImportJob:
+    return ImportJob(
+        job_id=str(job["_id"]),
+        state=job["state"],
+        file_name=job.get("file_name"),
+        file_size=job.get("file_size"),
+        project_template=job.get("project_template"),
+        author_id=job.get("author_id"),
+        project_id=job.get("project_id"),
+        attempts=job.get("attempts", 0),
+        error=job.get("error"),
+        created_at=job.get("created_at"),
+        started_at=job.get("started_at"),
+        finished_at=job.get("finished_at"),
+        timings=ImportJobTimings(**job.get("timings", {}))
+    )
+
+
+async def create_import_job(token: dict, project_template: str, uploaded: UploadedFile, file_name: str) -> ImportJob:
+    """Ставит файл в очередь импорта и сразу возвращает задачу."""
+    job = {
+        "state": ImportJobState.QUEUED.value,
+        "file_path": uploaded.file_path,
+        "file_hash": uploaded.file_hash,
+        "file_size": uploaded.size,
+        "file_name": file_name,
+        "project_template": project_template,
+        "author_id": token.get("user_id"),
+        "project_id": None,
+        "attempts": 0,
+        "error": None,
+        "created_at": datetime.utcnow(),
+        "started_at": None,
+        "finished_at": None,
+        "lease_expires_at": None,
+        "timings": {}
+    }
+    result = await import_jobs_collection.insert_one(job)
+    job["_id"] = result.inserted_id
+    return job_to_response(job)
+
+
+async def get_import_job(job_id: str) -> Dict[str, Any]:
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Неверный формат job_id")
+
+    job = await import_jobs_collection.find_one({"_id": ObjectId(job_id)})
+    if not job:
+        raise HTTPException(status_code=404, detail="Задача импорта не найдена")
+    return job
+
+
+async def claim_next_job() -> Optional[Dict[str, Any]]:
+    """Атомарно забирает самую старую задачу из очереди."""
+    now = datetime.utcnow()
+    return await import_jobs_collection.find_one_and_update(
+        {"$or": [
+            {"state": ImportJobState.QUEUED.value},
+            {"state": ImportJobState.RUNNING.value, "lease_expires_at": {"$lt": now}}
+        ]},
+        {
+            "$set": {
+                "state": ImportJobState.RUNNING.value,
+                "started_at": now,
+                "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS)
+            },
+            "$inc": {"attempts": 1}
+        },
+        sort=[("created_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER
+    )
+
+
+def lease_filter(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Условие того, что задача все еще принадлежит забравшему ее воркеру."""
+    return {"_id": job["_id"], "state": ImportJobState.RUNNING.value, "started_at": job["started_at"]}
+
+
+async def finish_job(job: Dict[str, Any], state: ImportJobState, timings: Dict[str, Any],
+                     project_id: Optional[str] = None, error: Optional[str] = None):
+    finished_at = datetime.utcnow()
+    timings["total_ms"] = elapsed_ms(job["created_at"], finished_at)
+    result = await import_jobs_collection.update_one(
+        lease_filter(job),
+        {"$set": {
+            "state": state.value,
+            "project_id": project_id,
+            "error": error,
+            "finished_at": finished_at,
+            "lease_expires_at": None,
+            "timings": timings
+        }}
+    )
+    if result.matched_count == 0:
+        # Аренда истекла, и задачу уже забрал другой воркер: итог запишет он
+        logger.warning(f"Задача импорта {job['_id']} завершена после потери аренды")
+
+
+async def process_import_job(job: Dict[str, Any]):
+    timings = {"queued_ms": elapsed_ms(job["created_at"], job["started_at"])}
+
+    if job["attempts"] > settings.import_job_max_attempts:
+        await finish_job(job, ImportJobState.FAILED, timings, error="Превышено число попыток обработки")
+        return
+
+    try:
+        started = time.perf_counter()
+        new_project = await create_project_from_file(
+            {"user_id": job["author_id"]}, job["project_template"], job["file_path"], job.get("file_hash")
+        )
+        timings["parse_ms"] = round((time.perf_counter() - started) * 1000, 1)
+
+        # _id проекта совпадает с _id задачи: повторная обработка той же задачи
+        # (после падения воркера или истечения аренды) не создает второй проект
+        new_project["_id"] = job["_id"]
+        started = time.perf_counter()
+        try:
+            await projects_data_collection.insert_one(new_project)
+            count_cache.invalidate(projects_data_collection)
+        except DuplicateKeyError:
+            logger.info(f"Проект задачи импорта {job['_id']} уже сохранен предыдущей попыткой")
+        timings["insert_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    except HTTPException as e:
+        if e.status_code == status.HTTP_503_SERVICE_UNAVAILABLE:
+            # Пул разбора переполнен - возвращаем задачу в очередь
+            await import_jobs_collection.update_one(
+                lease_filter(job),
+                {"$set": {"state": ImportJobState.QUEUED.value, "lease_expires_at": None},
+                 "$inc": {"attempts": -1}}
+            )
+            await asyncio.sleep(settings.parser_retry_after)
+            return
+        await finish_job(job, ImportJobState.FAILED, timings, error=str(e.detail))
+        return
+    except Exception as e:
+        logger.exception(f"Ошибка при импорте файла '{job.get('file_name')}'")
+        await finish_job(job, ImportJobState.FAILED, timings, error=str(e))
+        return
+
+    await finish_job(job, ImportJobState.SUCCEEDED, timings, project_id=str(job["_id"]))
+
+
+class ImportJobWorkers:
+    """
+    Фоновые воркеры, разбирающие очередь задач импорта.
+    Очередь хранится в MongoDB, поэтому задачи переживают перезапуск приложения.
+    """
+
+    def __init__(self, concurrency: int, poll_interval: float):
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup = asyncio.Event()
+
+    def start(self):
+        for number in range(self.concurrency):
+            self._tasks.append(asyncio.create_task(self._worker_loop(), name=f"import-worker-{number}"))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Будит воркеры, не дожидаясь очередного опроса очереди."""
+        self._wakeup.set()
+
+    async def _worker_loop(self):
+        while True:
+            try:
+                job = await claim_next_job()
+                if job is None:
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wakeup.clear()
+                    continue
+                await process_import_job(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Ошибка воркера импорта")
+                await asyncio.sleep(self.poll_interval)
+
+
+import_workers = ImportJobWorkers(
+    concurrency=settings.import_workers,
+    poll_interval=settings.import_poll_interval,
+)
@@ -0,0 +1,93 @@
+# src/modules/projects/parse_cache.py
+import logging
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from src.database import parse_cache_collection
+from src.metrics import register_metrics
+from src.modules.projects.projects import PARSER_VERSION
+
+logger = logging.getLogger(__name__)
+
+_counters = {"hits": 0, "misses": 0, "errors": 0}
+
+
+def cache_key(file_hash: str) -> str:
+    return f"{file_hash}:{PARSER_VERSION}"
+
+
+def refresh_record_ids(data: Any, mapping: Optional[Dict[str, str]] = None) -> Any:
+    """
+    Заменяет UUID записей (teammate_id, task_id, expense_record_id и т.д.) на новые,
+    чтобы проекты, созданные из одного файла, не делили идентификаторы записей.
+    """
+    if mapping is None:
+        mapping = {}
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key.endswith("_id") and isinstance(value, str) and value:
+                try:
+                    uuid.UUID(value)
+                except ValueError:
+                    continue
+                data[key] = mapping.setdefault(value, str(uuid.uuid4()))
+            elif isinstance(value, (dict, list)):
+                refresh_record_ids(value, mapping)
+    elif isinstance(data, list):
+        for item in data:
+            refresh_record_ids(item, mapping)
+    return data
+
+
+async def get_cached_parse(file_hash: str) -> Optional[Dict[str, Any]]:
+    """
+    Возвращает закешированный результат разбора файла или None.
+    Результат содержит либо data, либо error для файлов с ошибкой структуры.
+    """
+    try:
+        cached = await parse_cache_collection.find_one({"_id": cache_key(file_hash)})
+    except Exception as e:
+        # Недоступность кеша не должна мешать разбору
+        _counters["errors"] += 1
+        logger.warning(f"Не удалось прочитать кеш разбора: {e}")
+        return None
+
+    if cached is None:
+        _counters["misses"] += 1
+        return None
+
+    _counters["hits"] += 1
+    if cached.get("data") is not None:
+        cached["data"] = refresh_record_ids(cached["data"])
+    return cached
+
+
+async def store_parse(file_hash: str, data: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+    try:
+        await parse_cache_collection.update_one(
+            {"_id": cache_key(file_hash)},
+            {"$setOnInsert": {
+                "file_hash": file_hash,
+                "parser_version": PARSER_VERSION,
+                "data": data,
+                "error": error,
+                "created_at": datetime.utcnow()
+            }},
+            upsert=True
+        )
+    except Exception as e:
+        _counters["errors"] += 1
+        logger.warning(f"Не удалось сохранить результат разбора в кеш: {e}")
+
+
+def cache_stats() -> Dict[str, Any]:
+    lookups = _counters["hits"] + _counters["misses"]
+    return {
+        "parser_version": PARSER_VERSION,
+        **_counters,
+        "hit_ratio": _counters["hits"] / lookups if lookups else None,
+    }
+
+
+register_metrics("docx_parse_cache", cache_stats)
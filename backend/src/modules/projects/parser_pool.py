@@ -0,0 +1,157 @@
+# src/modules/projects/parser_pool.py
+import asyncio
+import logging
+import time
+from collections import deque
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import HTTPException, status
+
+from src.config import settings
+from src.metrics import register_metrics, percentile
+from src.modules.projects.parse_cache import get_cached_parse, store_parse
+from src.modules.projects.projects import convert_docx_to_dict
+
+logger = logging.getLogger(__name__)
+
+
+class ParserPool:
+    """
+    Пул для разбора DOCX файлов вне цикла событий.
+    Число одновременно принятых задач ограничено: workers + queue_size,
+    при переполнении запрос отклоняется с 503 и заголовком Retry-After.
+    """
+
+    def __init__(self, kind: str, workers: int, queue_size: int, job_timeout: float, retry_after: int):
+        self.kind = kind
+        self.workers = workers
+        self.queue_size = queue_size
+        self.job_timeout = job_timeout
+        self.retry_after = retry_after
+
+        self._executor: Optional[Executor] = None
+        self._executor_kind: Optional[str] = None
+        self._in_flight = 0
+        self._durations = deque(maxlen=1000)
+        self._counters = {"completed": 0, "failed": 0, "timeouts": 0, "rejected": 0}
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                try:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                    self._executor_kind = "process"
+                except (OSError, NotImplementedError, ImportError) as e:
+                    logger.warning(f"Пул процессов недоступен, используется пул потоков: {e}")
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="docx-parser")
+                self._executor_kind = "thread"
+        return self._executor
+
+    def _release(self, _future=None):
+        self._in_flight -= 1
+
+    async def run(self, func: Callable[..., Any], *args) -> Any:
+        if self._in_flight >= self.workers + self.queue_size:
+            self._counters["rejected"] += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Очередь обработки файлов переполнена, повторите попытку позже",
+                headers={"Retry-After": str(self.retry_after)}
+            )
+
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BrokenProcessPool:
+            # Воркер аварийно завершился - пересоздаем пул
+            self._executor = None
+            future = self._get_executor().submit(func, *args)
+
+        # Слот освобождается, когда задача действительно завершилась в воркере,
+        # а не когда истек таймаут ожидания
+        self._in_flight += 1
+        future.add_done_callback(lambda f: loop.call_soon_threadsafe(self._release, f))
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(asyncio.wrap_future(future)), timeout=self.job_timeout)
+        except asyncio.TimeoutError:
+            future.cancel()
+            self._counters["timeouts"] += 1
+            logger.error(f"Превышено время обработки файла ({self.job_timeout} с)")
+            raise HTTPException(
+                status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+                detail="Превышено время обработки файла"
+            )
+        except BrokenProcessPool:
+            self._executor = None
+            self._counters["failed"] += 1
+            raise
+        except Exception:
+            self._counters["failed"] += 1
+            raise
+
+        self._counters["completed"] += 1
+        self._durations.append(time.perf_counter() - started)
+        return result
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        durations = list(self._durations)
+        return {
+            "kind": self._executor_kind or self.kind,
+            "workers": self.workers,
+            "in_flight": self._in_flight,
+            "queue_depth": max(0, self._in_flight - self.workers),
+            "queue_capacity": self.queue_size,
+            **self._counters,
+            "parse_time_avg": sum(durations) / len(durations) if durations else None,
+            "parse_time_p50": percentile(durations, 0.5),
+            "parse_time_p95": percentile(durations, 0.95),
+        }
+
+
+parser_pool = ParserPool(
+    kind=settings.parser_pool_kind,
+    workers=settings.parser_pool_workers,
+    queue_size=settings.parser_pool_queue_size,
+    job_timeout=settings.parser_job_timeout,
+    retry_after=settings.parser_retry_after,
+)
+register_metrics("docx_parser_pool", parser_pool.stats)
+
+
+async def parse_docx_file(docx_filepath: str, file_hash: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Разбирает DOCX файл в пуле и возвращает извлеченные данные.
+    Если известен хеш содержимого, результат берется из кеша разбора,
+    а повторно загруженный файл не разбирается вовсе.
+    """
+    if not settings.parse_cache_enabled:
+        file_hash = None
+
+    if file_hash:
+        cached = await get_cached_parse(file_hash)
+        if cached is not None:
+            if cached.get("error"):
+                raise ValueError(cached["error"])
+            return cached["data"]
+
+    try:
+        data = await parser_pool.run(convert_docx_to_dict, docx_filepath, settings.parser_debug_artifacts)
+    except ValueError as e:
+        # Ошибка структуры заявки не изменится при повторной загрузке того же файла
+        if file_hash:
+            await store_parse(file_hash, error=str(e))
+        raise
+
+    if file_hash:
+        await store_parse(file_hash, data=data)
+    return data
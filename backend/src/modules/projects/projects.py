@@ -1,64 +1,242 @@
+import argparse
 import json
 import re
 import os
 import logging
+from bisect import bisect_left
+from collections import defaultdict
 from docx import Document
-from typing import List, Dict, Any
-import asyncio
-import aiofiles
+from docx.table import Table
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Union
 import uuid
 
+from src.modules.projects.field_spec import DocumentRows, TemplateSpec, FIZ_LITSO_SPEC
+
 # Настройка логирования
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Версия разбора заявок. Увеличивается при любом изменении результата извлечения,
+# чтобы закешированные результаты разбора перестали использоваться
+PARSER_VERSION = 3
+
+# Вкладки, наличие которых обязательно для корректной заявки
+REQUIRED_PHRASES = (
+    "Вкладка \"Общее\"",
+    "Вкладка \"О проекте\"",
+    "Вкладка \"Команда\"",
+    "Вкладка \"Результаты\"",
+    "Вкладка \"Календарный план\"",
+    "Вкладка \"Медиа\"",
+    "Вкладка \"Расходы\"",
+    "Вкладка \"Софинансирование\"",
+    "Вкладка \"Доп. Файлы\""
+)
+
+
 class DocxConverter:
-    def __init__(self, docx_filepath: str, txt_filepath: str):
+    def __init__(self, docx_filepath: str):
         self.docx_filepath = docx_filepath
-        self.txt_filepath = txt_filepath
 
-    async def convert_to_txt(self):
+    def iter_lines(self) -> Iterator[str]:
+        """Отдает абзацы документа по одному, в том виде, в котором они писались в TXT."""
+        for paragraph in self.load().paragraphs:
+            yield paragraph.text + '\n'
+
+    def load(self):
         try:
-            document = Document(self.docx_filepath)
-            async with aiofiles.open(self.txt_filepath, 'w', encoding='utf-8') as txt_file:
-                for paragraph in document.paragraphs:
-                    await txt_file.write(paragraph.text + '\n')
-            logging.info(f"Файл '{self.txt_filepath}' успешно создан.")
+            return Document(self.docx_filepath)
         except Exception as e:
-            logging.error(f"Ошибка при конвертации DOCX в TXT: {e}")
+            logging.error(f"Ошибка при открытии DOCX файла '{self.docx_filepath}': {e}")
             raise
 
-    async def check_structure(self):
-        required_phrases = [
-            "Вкладка \"Общее\"",
-            "Вкладка \"О проекте\"",
-            "Вкладка \"Команда\"",
-            "Вкладка \"Результаты\"",
-            "Вкладка \"Календарный план\"",
-            "Вкладка \"Медиа\"",
-            "Вкладка \"Расходы\"",
-            "Вкладка \"Софинансирование\"",
-            "Вкладка \"Доп. Файлы\""
-        ]
+    def iter_blocks(self, document=None) -> Iterator[Union[str, "DocxTable"]]:
+        """
+        Обходит тело документа в исходном порядке: абзацы отдаются строками,
+        как в iter_lines, таблицы - объектами DocxTable с текстом ячеек.
+        """
+        if document is None:
+            document = self.load()
+        for block in document.iter_inner_content():
+            if isinstance(block, Table):
+                yield DocxTable([[cell.text for cell in row.cells] for row in block.rows])
+            else:
+                yield block.text + '\n'
 
-        try:
-            # Асинхронное чтение файла
-            async with aiofiles.open(self.txt_filepath, 'r', encoding='utf-8') as txt_file:
-                content = await txt_file.read()
+    @staticmethod
+    def check_structure(missing_phrases: List[str]):
+        if missing_phrases:
+            error = f"Ошибка: '{missing_phrases[0]}' не обнаружена в файле."
+            logging.error(f"Ошибка при проверке структуры файла: {error}")
+            raise ValueError(error)
+
+# Заголовки, по которым DataExtractor делит документ на разделы.
+# Индексируются за один проход по строкам в SectionIndex.
+SECTION_HEADERS = (
+    'Блок "Общая информация"',
+    'Блок "Информация о проекте"',
+    'Блок "Дополнительная информация об авторе проекта"',
+    'Блок "Задачи"',
+    "Масштаб реализации проекта:",
+    "Дата начала и окончания проекта:",
+    "Опыт автора проекта:",
+    "Описание функционала автора проекта:",
+    "Адрес регистрации автора проекта:",
+    "Добавить резюме:",
+    "Видео-визитка (ссылка на ролик на любом видеохостинге):",
+    "Краткая информация о проекте:",
+    "Описание проблемы, решению/снижению которой посвящен проект:",
+    "Основные целевые группы, на которые направлен проект:",
+    "Основная цель проекта:",
+    "Опыт успешной реализации проекта:",
+    "Перспектива развития и потенциал проекта:",
+    "Социальный эффект:",
+    "Общая сумма расходов:",
+    "Категория",
+    'Вкладка "О проекте"',
+    'Вкладка "Команда',
+    'Вкладка "Команда"',
+    'Вкладка "Результаты"',
+    'Вкладка "Календарный план"',
+    'Вкладка "Медиа"',
+    'Вкладка "Расходы"',
+    'Вкладка "Софинансирование"',
+    'Вкладка "Доп. Файлы"',
+)
+
+
+class Section:
+    """
+    Диапазон строк документа между заголовками.
+    Повторные стартовые заголовки внутри диапазона исключаются (skip),
+    как и в extract_between_headers.
+    """
+    __slots__ = ("lines", "start", "end", "skip")
+
+    def __init__(self, lines: List[str], start: int, end: int, skip: frozenset = frozenset()):
+        self.lines = lines
+        self.start = start
+        self.end = end
+        self.skip = skip
+
+    def to_list(self) -> List[str]:
+        if not self.skip:
+            return self.lines[self.start:self.end]
+        return [self.lines[i] for i in range(self.start, self.end) if i not in self.skip]
+
+    def joined(self) -> str:
+        return ' '.join(self.to_list())
+
+
+class SectionIndex:
+    """
+    Индекс позиций заголовков, построенный за один проход по строкам документа.
+    Заголовок совпадает со строкой, если строка с него начинается.
+    """
+
+    def __init__(self, lines: Iterable[str] = (), headers: Iterable[str] = SECTION_HEADERS):
+        self.lines: List[str] = []
+        self.positions: Dict[str, List[int]] = {header: [] for header in headers}
+
+        # Группируем заголовки по длине: для каждой строки достаточно
+        # одного среза и поиска в множестве на каждую длину
+        headers_by_length = defaultdict(set)
+        for header in self.positions:
+            headers_by_length[len(header)].add(header)
+        self._buckets = sorted(headers_by_length.items())
 
-            # Проверка наличия необходимых фраз
-            for phrase in required_phrases:
-                if phrase not in content:
-                    raise ValueError(f"Ошибка: '{phrase}' не обнаружена в файле.")
+        for line in lines:
+            self.append(line)
+
+    def append(self, line: str):
+        """Добавляет строку в конец документа, обновляя позиции заголовков."""
+        position = len(self.lines)
+        self.lines.append(line)
+        for length, bucket in self._buckets:
+            if length > len(line):
+                break
+            prefix = line[:length]
+            if prefix in bucket:
+                self.positions[prefix].append(position)
+
+    def whole(self) -> Section:
+        return Section(self.lines, 0, len(self.lines))
+
+    def _positions(self, header: str) -> List[int]:
+        positions = self.positions.get(header)
+        if positions is None:
+            # Заголовок не зарегистрирован заранее - индексируем его отдельно
+            positions = [i for i, line in enumerate(self.lines) if line.startswith(header)]
+            self.positions[header] = positions
+        return positions
+
+    def _in_range(self, header: str, start: int, end: int) -> List[int]:
+        positions = self._positions(header)
+        left = bisect_left(positions, start)
+        right = bisect_left(positions, end, left)
+        return positions[left:right]
+
+    def section(self, start_headers: List[str], end_header: Optional[str] = None,
+                within: Optional[Section] = None) -> Section:
+        """
+        Аналог extract_between_headers(within.to_list(), start_headers, end_header)
+        без повторного сканирования строк.
+        """
+        within = within or self.whole()
+        skip = within.skip
+
+        starts = sorted({
+            position
+            for header in start_headers
+            for position in self._in_range(header, within.start, within.end)
+            if position not in skip
+        })
+
+        # Строка со стартовым заголовком никогда не считается конечной
+        end = within.end
+        if end_header is not None:
+            starts_set = set(starts)
+            for position in self._in_range(end_header, within.start, within.end):
+                if position not in skip and position not in starts_set:
+                    end = position
+                    break
+
+        if not starts or starts[0] >= end:
+            return Section(self.lines, 0, 0)
+
+        first = starts[0]
+        repeated = {position for position in starts if position < end}
+        repeated.update(position for position in skip if first < position < end)
+        repeated.discard(first)
+        return Section(self.lines, first + 1, end, frozenset(repeated))
+
+
+class DocxTable:
+    """Таблица документа: текст ячеек по строкам."""
+    __slots__ = ("rows",)
+
+    def __init__(self, rows: List[List[str]]):
+        # Объединенные ячейки python-docx повторяет в каждой строке, оставляем одну копию
+        self.rows = [[cell.strip() for i, cell in enumerate(row) if i == 0 or cell != row[i - 1]] for row in rows]
+
+    def lines(self) -> List[str]:
+        """
+        Строки таблицы в текстовом виде для индекса разделов: строка из двух ячеек
+        превращается в "Подпись: значение", остальные ячейки разделяются табуляцией.
+        """
+        lines = []
+        for row in self.rows:
+            if len(row) == 2 and row[0]:
+                lines.append(f"{row[0].rstrip(':')}: {row[1]}\n")
+            elif any(row):
+                lines.append('\t'.join(row) + '\n')
+        return lines
 
-            logging.info("Структура файла корректна.")
-        except Exception as e:
-            logging.error(f"Ошибка при проверке структуры файла: {e}")
-            raise
 
 class DataExtractor:
-    def __init__(self, txt_filepath: str):
-        self.txt_filepath = txt_filepath
+    def __init__(self, spec: TemplateSpec = FIZ_LITSO_SPEC):
+        self.spec = spec
         self.data = self.initialize_data_structure()
+        self.lines: List[str] = []
 
     @staticmethod
     def initialize_data_structure() -> Dict[str, Any]:
@@ -84,45 +262,77 @@ class DataExtractor:
             }
         }
 
-    async def extract_data(self) -> Dict[str, Any]:
-        try:
-            # Асинхронное чтение файла
-            async with aiofiles.open(self.txt_filepath, 'r', encoding='utf-8') as file:
-                lines = await file.readlines()
-
-            for line in lines:
-                if "ФИО:" in line:
-                    self.data["author_name"] = line.split("ФИО:")[1].strip()
-                elif "Название проекта:" in line:
-                    self.data["project_name"] = line.split("Название проекта:")[1].strip()
-                elif "Регион проекта:" in line:
-                    self.data["region"] = line.split("Регион проекта:")[1].strip()
-                elif "Контакты:" in line:
-                    contacts = line.split("Контакты:")[1].strip().split(", ")
-                    if contacts:
-                        self.data["contacts"]["phone"] = contacts[0]
-                    if len(contacts) > 1:
-                        self.data["contacts"]["email"] = contacts[1]
-
-            # Вызов методов для извлечения данных
-            self.data["project_data_tabs"]["tab_general_info"] = self.result_general_info(lines)
-            self.data["project_data_tabs"]["tab_project_info"] = self.result_project_info(lines)
-            self.data["project_data_tabs"]["tab_team"] = self.result_team_members(lines)
-            self.data["project_data_tabs"]["tab_results"] = self.result_extraction(lines)
-            self.data["project_data_tabs"]["tab_calendar_plan"] = self.result_calendar_plan(lines)
-            self.data["project_data_tabs"]["tab_media"] = self.result_media(lines)
-            self.data["project_data_tabs"]["tab_cofinancing"] = self.result_cofinancing(lines)
-            self.data["project_data_tabs"]["tab_additional_files"] = self.result_additional_files(lines)
-            self.data["project_data_tabs"]["tab_expenses"] = self.result_expenses(lines)
-
-            logging.info("Данные успешно извлечены из TXT файла.")
-            return self.data
-        except Exception as e:
-            logging.error(f"Ошибка при извлечении данных из файла '{self.txt_filepath}': {e}")
-            raise
+    def extract_from_paragraphs(self, paragraphs: Iterable[str],
+                                required_phrases: Iterable[str] = REQUIRED_PHRASES) -> Dict[str, Any]:
+        """Извлекает данные из абзацев документа без таблиц."""
+        return self.extract_from_blocks(paragraphs, required_phrases)
+
+    def extract_from_blocks(self, blocks: Iterable[Union[str, DocxTable]],
+                            required_phrases: Iterable[str] = REQUIRED_PHRASES) -> Dict[str, Any]:
+        """
+        Извлекает данные за один проход по абзацам и таблицам документа: в том же проходе
+        строится индекс заголовков, собираются записи блоков и проверяется структура файла.
+        """
+        index = SectionIndex()
+        rows = DocumentRows(self.spec)
+        match = self.spec.matcher.match
+        missing_phrases = list(required_phrases)
+
+        for block in blocks:
+            is_table = isinstance(block, DocxTable)
+            if is_table:
+                # Таблица разбирается по ячейкам, а в индекс попадает ее текст
+                rows.feed_table(block.rows)
+
+            for line in (block.lines() if is_table else (block,)):
+                # Каждая строка сопоставляется с подписями шаблона один раз
+                token, value = match(line.strip())
+                index.append(line)
+                if not is_table:
+                    rows.feed_line(line, token, value)
+                if token in self.spec.document_fields:
+                    self.extract_document_field(self.spec.document_fields[token], value)
+                if missing_phrases and "Вкладка" in line:
+                    missing_phrases = [phrase for phrase in missing_phrases if phrase not in line]
+
+        DocxConverter.check_structure(missing_phrases)
+        rows = rows.rows
+
+        # Вызов методов для извлечения данных
+        self.data["project_data_tabs"]["tab_general_info"] = self.result_general_info(index)
+        self.data["project_data_tabs"]["tab_project_info"] = self.result_project_info(index, rows["project"])
+        self.data["project_data_tabs"]["tab_team"] = self.result_team_members(rows["team"])
+        self.data["project_data_tabs"]["tab_results"] = self.result_extraction(index)
+        self.data["project_data_tabs"]["tab_calendar_plan"] = self.result_calendar_plan(rows["calendar"])
+        self.data["project_data_tabs"]["tab_media"] = self.result_media(rows["media"])
+        self.data["project_data_tabs"]["tab_cofinancing"] = self.result_cofinancing(index)
+        self.data["project_data_tabs"]["tab_additional_files"] = self.result_additional_files(rows["additional_files"])
+        self.data["project_data_tabs"]["tab_expenses"] = self.result_expenses(index, rows["expenses"])
+
+        self.lines = index.lines
+        return self.data
+
+    def extract_document_field(self, key: str, value: str):
+        if key == "contacts":
+            contacts = value.split(", ")
+            if contacts:
+                self.data["contacts"]["phone"] = contacts[0]
+            if len(contacts) > 1:
+                self.data["contacts"]["email"] = contacts[1]
+        else:
+            self.data[key] = value
 
+    def section_fields(self, index: SectionIndex, tab: str) -> Dict[str, str]:
+        """Текстовые поля вкладки между заголовками, описанные в шаблоне."""
+        (block_start, block_end), fields = self.spec.sections[tab]
+        block = index.section([block_start], block_end)
+        return {
+            key: index.section([start], end, within=block).joined()
+            for key, start, end in fields
+        }
 
-    def result_general_info(self, lines: List[str]) -> Dict[str, str]:
+
+    def result_general_info(self, index: SectionIndex) -> Dict[str, str]:
         general_info = dict(
             project_scale="",
             project_duration="",
@@ -133,31 +343,12 @@ class DataExtractor:
             video_link=""
         )
 
-        lines = extract_between_headers(lines, ['Блок "Общая информация"'], 'Блок "Информация о проекте"')
-
-        general_info["project_scale"] = ' '.join(extract_between_headers(
-            lines, ["Масштаб реализации проекта:"], "Дата начала и окончания проекта:"
-        ))
-        general_info["project_duration"] = ' '.join(extract_between_headers(
-            lines, ["Дата начала и окончания проекта:"], 'Блок "Дополнительная информация об авторе проекта"'
-        ))
-        general_info["author_experience"] = ' '.join(extract_between_headers(
-            lines, ['Опыт автора проекта:'], "Описание функционала автора проекта:"
-        ))
-        general_info["author_functionality"] = ' '.join(extract_between_headers(
-            lines, ["Описание функционала автора проекта:"], "Адрес регистрации автора проекта:"
-        ))
-        general_info["author_registration_address"] = ' '.join(extract_between_headers(
-            lines, ["Адрес регистрации автора проекта:"], "Добавить резюме:"
-        ))
-        general_info["video_link"] = ' '.join(extract_between_headers(
-            lines, ["Видео-визитка (ссылка на ролик на любом видеохостинге):"], 'Вкладка "О проекте"'
-        ))
+        general_info.update(self.section_fields(index, "tab_general_info"))
 
         return general_info
 
 
-    def result_project_info(self, lines: List[str]) -> Dict[str, str]:
+    def result_project_info(self, index: SectionIndex, rows: List[Dict[str, Any]]) -> Dict[str, str]:
         project_info = dict(
             brief_info="",
             problem_description="",
@@ -169,48 +360,23 @@ class DataExtractor:
             geography=[]  # Инициализируем как список
         )
 
-        lines = extract_between_headers(lines, ['Блок "Информация о проекте"'], 'Вкладка "Команда')
-
         # Извлечение информации по заголовкам
-        project_info["brief_info"] = ' '.join(extract_between_headers(
-            lines, ["Краткая информация о проекте:"], "Описание проблемы, решению/снижению которой посвящен проект:"))
-
-        project_info["problem_description"] = ' '.join(extract_between_headers(
-            lines, ["Описание проблемы, решению/снижению которой посвящен проект:"], "Основные целевые группы, на которые направлен проект:"))
-
-        project_info["target_groups"] = ' '.join(extract_between_headers
-            (lines, ["Основные целевые группы, на которые направлен проект:"], "Основная цель проекта:"))
-
-        project_info["main_goal"] = ' '.join(extract_between_headers
-            (lines, ["Основная цель проекта:"], "Опыт успешной реализации проекта:"))
-
-        project_info["successful_experience"] = ' '.join(extract_between_headers(
-            lines, ["Опыт успешной реализации проекта:"], "Перспектива развития и потенциал проекта:"))
-
-        project_info["development_perspective"] = ' '.join(extract_between_headers(
-            lines, ["Перспектива развития и потенциал проекта:"], 'Блок "Задачи"'))
-    
-        # Извлечение задач
-        for line in lines:
-            if "Поставленная задача:" in line:
-                task = line.split("Поставленная задача:")[1].strip()
-                if task not in project_info["tasks"]:  # Проверка на наличие задачи
-                    project_info["tasks"].append(task)  # Добавление задачи в список
-
-        # Извлечение географической информации
-        for i, line in enumerate(lines):
-            if "Выберите регион или федеральный округ:" in line:
-                region = line.split("Выберите регион или федеральный округ:")[1].strip()
-                address_line = lines[i + 1].strip() if i + 1 < len(lines) else ""
-                address = address_line.split("Адрес:")[1].strip() if "Адрес:" in address_line else ""
-                project_info["geography"].append({  # Добавление географической информации в список
-                    "region": region,
-                    "address": address
+        project_info.update(self.section_fields(index, "tab_project_info"))
+
+        for row in rows:
+            # Задачи проекта без повторов
+            if row["kind"] == "task":
+                if row["task_name"] not in project_info["tasks"]:
+                    project_info["tasks"].append(row["task_name"])
+            else:
+                project_info["geography"].append({
+                    "region": row["region"],
+                    "address": row.get("address", "")
                 })
 
         return project_info
 
-    def result_extraction(self, lines):
+    def result_extraction(self, index: SectionIndex):
         result_extraction = {
             "planned_date": "",
             "planned_events_count": "",
@@ -221,7 +387,8 @@ class DataExtractor:
             "social_effect": ""
         }
 
-        combined_lines = extract_between_headers(lines, ['Вкладка "Результаты"'], 'Вкладка "Календарный план"')
+        block = index.section(['Вкладка "Результаты"'], 'Вкладка "Календарный план"')
+        combined_lines = block.to_list()
 
         # Удаление всех данных, оставляя только числа
         numbers_only = extract_numbers(combined_lines)
@@ -242,205 +409,69 @@ class DataExtractor:
                 result_extraction[key] = numbers_only[i]
 
         # Извлечение социального эффекта
-        social_effect = extract_between_headers(combined_lines, ['Социальный эффект:'], 'Вкладка "Календарный план"')
+        social_effect = index.section(['Социальный эффект:'], 'Вкладка "Календарный план"', within=block).to_list()
         if social_effect:
             result_extraction["social_effect"] = social_effect
 
         return result_extraction
 
-    def result_team_members(self, lines):
-        team_list = []
-
-        # Извлечение блока данных о команде
-        combined_lines = extract_between_headers(lines, ['Вкладка "Команда"'], 'Вкладка "Результаты"')
-
-        # Разделяем строки для обработки
-        lines = [line.strip() for line in combined_lines if line.strip()]  # Убираем пустые строки
-
-        # Временные переменные для хранения данных о каждом участнике
-        current_member = {}
-
-        for line in lines:
-            if "ФИО наставника:" in line:
-                if current_member:  # Если текущий участник не пустой, добавляем его в список
-                    team_list.append(current_member)
-                current_member = {
-                    "teammate_id": str(uuid.uuid4()),  # Генерация уникального ID
-                    "mentor_name": line.split("ФИО наставника:")[1].strip(),
-                    "mentor_email": None,
-                    "role": None,
-                    "competencies": None,
-                    "resume": ""
-                }
-            elif "E-mail наставника:" in line:
-                current_member["mentor_email"] = line.split("E-mail наставника:")[1].strip()
-            elif "Роль в проекте:" in line:
-                current_member["role"] = line.split("Роль в проекте:")[1].strip()
-            elif "Компетенции, опыт, подтверждающие возможность участника выполнять роль в команде:" in line:
-                current_member["competencies"] = \
-                line.split("Компетенции, опыт, подтверждающие возможность участника выполнять роль в команде:")[
-                    1].strip()
-
-        # Добавляем последнего участника, если он есть
-        if current_member:
-            team_list.append(current_member)
-
-        return team_list
+    def result_team_members(self, rows: List[Dict[str, Any]]):
+        return [
+            {
+                "teammate_id": str(uuid.uuid4()),  # Генерация уникального ID
+                "mentor_name": row.get("mentor_name"),
+                "mentor_email": row.get("mentor_email"),
+                "role": row.get("role"),
+                "competencies": row.get("competencies"),
+                "resume": ""
+            }
+            for row in rows
+        ]
 
 
-    def result_calendar_plan(self, lines):
+    def result_calendar_plan(self, rows: List[Dict[str, Any]]):
         result_extraction = {
             "tasks": []
         }
-        lines = extract_between_headers(lines, ['Вкладка "Календарный план"'], 'Вкладка "Медиа"')
-
-        current_task = None
-        current_event = None
-        reading_additional_info = False
 
-        for line in lines:
-            line = line.strip()
-
-            # Проверка на начало новой задачи
-            if line.startswith("Поставленная задача:"):
-                # Завершаем текущую задачу и добавляем ее в список, если она не пустая
-                if current_task:
-                    if current_event:
-                        current_task["events"].append(current_event)
-                    result_extraction["tasks"].append(current_task)
-
-                # Создаем новую задачу
-                current_task = {
+        for row in rows:
+            if row["kind"] == "task":
+                result_extraction["tasks"].append({
                     "task_id": str(uuid.uuid4()),
-                    "task_name": line.split("Поставленная задача:")[1].strip(),
+                    "task_name": row["task_name"],
                     "events": []
-                }
-                current_event = None  # Сбрасываем текущее мероприятие
-
-            # Проверка на начало нового мероприятия
-            elif line.startswith("Название мероприятия:") and current_task is not None:
-                if current_event:
-                    current_task["events"].append(current_event)  # Сохраняем предыдущее мероприятие
-
-                # Создаем новое мероприятие
-                current_event = {
+                })
+            else:
+                result_extraction["tasks"][-1]["events"].append({
                     "event_id": str(uuid.uuid4()),
-                    "title": line.split("Название мероприятия:")[1].strip(),
-                    "due_date": None,
-                    "description": "",
-                    "unique_participants": None,
-                    "recurring_participants": None,
-                    "publications_count": None,
-                    "views_count": None,
-                    "additional_info": ""
-                }
-                reading_additional_info = False
-
-            # Проверка на крайний срок выполнения
-            elif line.startswith("Крайняя дата выполнения:") and current_event is not None:
-                current_event["due_date"] = line.split("Крайняя дата выполнения:")[1].strip()
-
-            # Проверка на уникальных участников
-            elif line.startswith("Количество уникальных участников:") and current_event is not None:
-                value = line.split("Количество уникальных участников:")[1].strip()
-                current_event["unique_participants"] = int(value) if value else 0
-
-            # Проверка на повторяющихся участников
-            elif line.startswith("Количество повторяющихся участников:") and current_event is not None:
-                value = line.split("Количество повторяющихся участников:")[1].strip()
-                current_event["recurring_participants"] = int(value) if value else 0
-
-            # Проверка на количество публикаций
-            elif line.startswith("Количество публикаций:") and current_event is not None:
-                value = line.split("Количество публикаций:")[1].strip()
-                current_event["publications_count"] = int(value) if value else 0
-
-            # Проверка на количество просмотров
-            elif line.startswith("Количество просмотров:") and current_event is not None:
-                value = line.split("Количество просмотров:")[1].strip()
-                current_event["views_count"] = int(value) if value else 0
-
-            # Проверка на начало описания мероприятия
-            elif line.startswith("Описание мероприятия:") and current_event is not None:
-                current_event["description"] += line.split("Описание мероприятия:")[1].strip() + "\n"
-
-            # Проверка на начало дополнительной информации
-            elif line.startswith("Дополнительная информация:") and current_event is not None:
-                reading_additional_info = True
-                current_event["additional_info"] += line.split("Дополнительная информация:")[1].strip() + "\n"
-
-            # Чтение многострочной дополнительной информации
-            elif reading_additional_info and current_event is not None:
-                current_event["additional_info"] += line + "\n"
-
-        # Добавляем последний обработанный элемент, если он существует
-        if current_event:
-            current_task["events"].append(current_event)
-        if current_task:
-            result_extraction["tasks"].append(current_task)
+                    "title": row.get("title"),
+                    "due_date": row.get("due_date"),
+                    "description": row.get("description", ""),
+                    "unique_participants": row.get("unique_participants"),
+                    "recurring_participants": row.get("recurring_participants"),
+                    "publications_count": row.get("publications_count"),
+                    "views_count": row.get("views_count"),
+                    "additional_info": row.get("additional_info", "")
+                })
 
         return result_extraction
 
-    def result_media(self, lines):
-        # Список для хранения всех медиа ресурсов
-        media_resources = []
-
-        # Извлекаем строки между заголовками
-        combined_lines = extract_between_headers(lines, ['Вкладка "Медиа"'], 'Вкладка "Расходы"')
-
-        current_resource = None
-        collecting_links = False
-        collecting_reason = False
+    def result_media(self, rows: List[Dict[str, Any]]):
+        # Список медиа ресурсов в порядке следования в документе
+        return [
+            {
+                "media_resource_id": str(uuid.uuid4()),  # Генерируем уникальный ID
+                "resource_type": row["resource_type"],
+                "publication_month": row.get("publication_month", ""),
+                "planned_views": row.get("planned_views", ""),
+                "resource_links": row.get("resource_links", []),
+                "reason_for_format": row.get("reason_for_format", "")
+            }
+            for row in rows
+        ]
 
-        for line in combined_lines:
-            line = line.strip()
-            if not line:
-                continue
 
-            if line.startswith("Вид ресурса:"):
-                # Сохраняем предыдущий ресурс, если он существует
-                if current_resource is not None:
-                    media_resources.append(current_resource)
-
-                # Создаем новый ресурс
-                current_resource = {
-                    "media_resource_id": str(uuid.uuid4()),  # Генерируем уникальный ID
-                    "resource_type": line.split("Вид ресурса:")[1].strip(),
-                    "publication_month": "",
-                    "planned_views": "",
-                    "resource_links": [],
-                    "reason_for_format": ""
-                }
-                collecting_links = False
-                collecting_reason = False
-
-            elif current_resource is not None:
-                if line.startswith("Месяц публикации:"):
-                    current_resource["publication_month"] = line.split("Месяц публикации:")[1].strip()
-                elif line.startswith("Планируемое количество просмотров:"):
-                    current_resource["planned_views"] = line.split("Планируемое количество просмотров:")[1].strip()
-                elif line.startswith("Ссылки на ресурсы:"):
-                    collecting_links = True
-                    current_resource["resource_links"].append(line.split("Ссылки на ресурсы:")[1].strip())
-                elif line.startswith("Почему выбран такой формат медиа:"):
-                    collecting_links = False
-                    collecting_reason = True
-                    current_resource["reason_for_format"] = line.split("Почему выбран такой формат медиа:")[1].strip()
-                elif collecting_links:
-                    # Добавляем новые ссылки на ресурсы
-                    current_resource["resource_links"].append(line.strip())
-                elif collecting_reason:
-                    current_resource["reason_for_format"] += " " + line.strip()
-
-        # Добавляем последний обработанный ресурс, если он существует
-        if current_resource is not None:
-            media_resources.append(current_resource)
-
-        # Возвращаем список медиа ресурсов
-        return  media_resources
-
-
-    def result_cofinancing(self, lines: List[str]) -> Dict[str, Any]:
+    def result_cofinancing(self, index: SectionIndex) -> Dict[str, Any]:
         result_extraction = {
             "own_funds": {
                 "expenses_description": "",
@@ -450,7 +481,7 @@ class DataExtractor:
         }
 
         # Извлечение текста между заголовками
-        combined_lines = extract_between_headers(lines, ['Вкладка "Софинансирование"'], 'Вкладка "Доп. Файлы"')
+        combined_lines = index.section(['Вкладка "Софинансирование"'], 'Вкладка "Доп. Файлы"').to_list()
 
         # Проверка, что combined_lines является списком и объединение в строку
         if isinstance(combined_lines, list):
@@ -504,40 +535,19 @@ class DataExtractor:
 
         return result_extraction
 
-    def result_additional_files(self, lines: List[str]) -> List[Dict[str, Any]]:
-        result_extraction = []  # Изменяем на список для хранения информации о файлах
-
-        # Обработка блока "Доп. Файлы"
-        additional_files_lines = extract_between_headers(lines, ['Вкладка "Доп. Файлы"'])
-
-        # Проверяем, что результат является списком строк
-        if isinstance(additional_files_lines, list):
-            additional_files_combined = ''.join(additional_files_lines)
-        elif isinstance(additional_files_lines, str):
-            additional_files_combined = additional_files_lines  # Если это строка, просто присваиваем
-        else:
-            logging.error("Ошибка: additional_files_combined не является строкой или списком строк.")
-            return result_extraction  # Возвращаем пустую структуру
-
-        # Извлечение дополнительных файлов
-        file_matches = re.findall(
-            r'Описание файла:\s*(.+?)\nВыберете файл:\s*(\S+)',
-            additional_files_combined, re.DOTALL
-        )
-
-        # Обработка найденных файлов
-        for match in file_matches:
-            file_info = {
+    def result_additional_files(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        # Учитываются только описания, за которыми указан выбранный файл
+        return [
+            {
                 "files_id": str(uuid.uuid4()),  # Используем ID файла
-                "file_description": match[0].strip(),
+                "file_description": row["file_description"].strip(),
                 "file_url": None  # Можно добавить логику для получения URL, если необходимо
             }
-            result_extraction.append(file_info)  # Добавляем информацию о файле в список
-
-        return result_extraction  # Возвращаем список с информацией о файлах
+            for row in rows if row.get("file")
+        ]
 
 
-    def result_expenses(self, lines: List[str]) -> Dict[str, Any]:
+    def result_expenses(self, index: SectionIndex, rows: List[Dict[str, Any]]) -> Dict[str, Any]:
         result_extraction = {
             "total_expense": None,
             "categories": []
@@ -568,63 +578,27 @@ class DataExtractor:
                 "records": []  # Изначально пустой список записей
             })
 
-        combined_lines = extract_between_headers(lines, ['Вкладка "Расходы"'], 'Вкладка "Софинансирование"')
-
         # Извлечение общей суммы расходов
-        total_expense = extract_between_headers(lines, ['Общая сумма расходов:'], 'Категория')
+        total_expense = index.section(['Общая сумма расходов:'], 'Категория').to_list()
 
         # Записываем только первые 2 строки
         result_extraction["total_expense"] = total_expense[:1]
 
-        # Обработка строк с категориями и записями
-        current_category = None
-        value_type = None
-
-        for i, line in enumerate(combined_lines):
-            line = line.strip()
-
-            # Обработка категории расходов
-            category_match = re.match(r'Категория "(.*)"', line)
-            if category_match:
-                category_name = category_match.group(1)
-                # Поиск текущей категории в результатах
-                current_category = next((cat for cat in result_extraction["categories"] if cat["name"] == category_name), None)
+        # Записи расходов по категориям
+        categories = {category["name"]: category for category in result_extraction["categories"]}
+        for row in rows:
+            category = categories.get(row["category"])
+            if category is None:
                 continue
-
-            # Обработка типа расходов
-            type_match = re.match(r'Тип "(.*)"', line)
-            if type_match and current_category:
-                value_type = type_match.group(1)
-                continue
-
-            # Обработка записей расходов
-            record_match = re.match(r'Запись № \d+', line)
-            if record_match and current_category is not None:
-                record = {
-                    "expense_record_id": str(uuid.uuid4()),  # Уникальный ID для каждой записи
-                    "type": value_type,
-                    "title": None,
-                    "description": None,
-                    "quantity": None,
-                    "price": None,
-                    "total": None
-                }
-
-                for j in range(1, 6):
-                    if i + j < len(combined_lines):
-                        next_line = combined_lines[i + j].strip()
-                        if next_line.startswith("Название:"):
-                            record["title"] = next_line.replace("Название:", "").strip()
-                        elif next_line.startswith("Описание:"):
-                            record["description"] = next_line.replace("Описание:", "").strip()
-                        elif next_line.startswith("Количество:"):
-                            record["quantity"] = next_line.replace("Количество:", "").strip()
-                        elif next_line.startswith("Цена:"):
-                            record["price"] = next_line.replace("Цена:", "").strip()
-                        elif next_line.startswith("Сумма:"):
-                            record["total"] = next_line.replace("Сумма:", "").strip()
-
-                current_category["records"].append(record)
+            category["records"].append({
+                "expense_record_id": str(uuid.uuid4()),  # Уникальный ID для каждой записи
+                "type": row["type"],
+                "title": row.get("title"),
+                "description": row.get("description"),
+                "quantity": row.get("quantity"),
+                "price": row.get("price"),
+                "total": row.get("total")
+            })
 
         # Добавляем пустую запись только для категорий, где нет расходов
         for category in result_extraction["categories"]:
@@ -645,10 +619,10 @@ class DataExtractor:
 
 class JSONWriter:
     @staticmethod
-    async def write_to_json(data: Dict[str, Any], json_filepath: str):
+    def write_to_json(data: Dict[str, Any], json_filepath: str):
         try:
-            async with aiofiles.open(json_filepath, 'w', encoding='utf-8') as json_file:
-                await json_file.write(json.dumps(data, ensure_ascii=False, indent=4))
+            with open(json_filepath, 'w', encoding='utf-8') as json_file:
+                json.dump(data, json_file, ensure_ascii=False, indent=4)
             logging.info(f"Данные успешно записаны в JSON файл '{json_filepath}'.")
         except IOError as e:
             logging.error(f"Ошибка ввода-вывода при записи JSON файла '{json_filepath}': {e}")
@@ -681,12 +655,12 @@ def extract_between_headers(lines: List[str], start_headers: List[str], end_head
         # Проверяем, начинается ли строка с одного из заголовков
         if any(re.match(pattern, line) for pattern in start_patterns):
             is_collecting = True
-            logging.info(f"Начато собирание строк после заголовка: {line.strip()}")
+            logging.debug(f"Начато собирание строк после заголовка: {line.strip()}")
             continue
 
         # Проверяем, заканчивается ли сбор данных на заголовке
         if end_pattern and re.match(end_pattern, line):
-            logging.info(f"Сбор строк остановлен на заголовке: {line.strip()}")
+            logging.debug(f"Сбор строк остановлен на заголовке: {line.strip()}")
             break
 
         # Если мы находимся в режиме сбора, добавляем строки без изменения
@@ -697,7 +671,8 @@ def extract_between_headers(lines: List[str], start_headers: List[str], end_head
 
 
 
-async def convert_docx_to_json(docx_filepath: str):
+def write_debug_artifacts(docx_filepath: str, lines: List[str], data: Dict[str, Any]):
+    """Отладочный вывод: TXT с абзацами и JSON с результатом в projects_txt / projects_json."""
     parent_folder = os.path.dirname(os.path.dirname(docx_filepath))
     file_name = os.path.splitext(os.path.basename(docx_filepath))[0]
 
@@ -708,26 +683,39 @@ async def convert_docx_to_json(docx_filepath: str):
     os.makedirs(txt_folder, exist_ok=True)
     os.makedirs(json_folder, exist_ok=True)
 
-    txt_filepath = os.path.join(txt_folder, f"{file_name}.txt")
-    json_filepath = os.path.join(json_folder, f"{file_name}.json")
+    with open(os.path.join(txt_folder, f"{file_name}.txt"), 'w', encoding='utf-8') as txt_file:
+        txt_file.writelines(lines)
+
+    JSONWriter.write_to_json(data, os.path.join(json_folder, f"{file_name}.json"))
+
+
+def convert_docx_to_dict(docx_filepath: str, dump_artifacts: bool = False) -> Dict[str, Any]:
+    """
+    Разбирает DOCX заявку в словарь без промежуточных файлов:
+    абзацы и таблицы потоком передаются из документа в DataExtractor.
+    """
+    converter = DocxConverter(docx_filepath)
+    extractor = DataExtractor()
+    data = extractor.extract_from_blocks(converter.iter_blocks())
+    logging.info(f"Данные успешно извлечены из файла '{docx_filepath}'.")
 
-    # Создаем экземпляр конвертера
-    converter = DocxConverter(docx_filepath, txt_filepath)
-    await converter.convert_to_txt()
+    if dump_artifacts:
+        write_debug_artifacts(docx_filepath, extractor.lines, data)
 
-    # Проверяем структуру файла
-    await converter.check_structure()
+    return data
 
-    # Создаем экземпляр извлекателя данных
-    extractor = DataExtractor(txt_filepath)
-    data = await extractor.extract_data()
 
-    await JSONWriter.write_to_json(data, json_filepath)
+def main():
+    parser = argparse.ArgumentParser(description="Разбор DOCX заявки в JSON")
+    parser.add_argument("docx_filepath", help="Путь к DOCX файлу заявки")
+    parser.add_argument("--output", help="Путь к JSON файлу (по умолчанию вывод в консоль)")
+    args = parser.parse_args()
 
-    return json_filepath
-async def main():
-    docx_filepath = "12.docx"
-    await convert_docx_to_json(docx_filepath)
+    data = convert_docx_to_dict(args.docx_filepath)
+    if args.output:
+        JSONWriter.write_to_json(data, args.output)
+    else:
+        print(json.dumps(data, ensure_ascii=False, indent=4))
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    main()
@@ -3,11 +3,18 @@
 from fastapi import APIRouter, HTTPException, Depends, Response, UploadFile, File, Query, status
 from pydantic import ValidationError
 from src.modules.auth.utils import create_jwt, decode_jwt
-from src.utils import check_permissions
-from src.modules.projects.utils import convert_project_to_summary, save_upload_file, create_empty_project, create_project_from_file
+from src.utils import check_permissions, EntityLoader
+from src.config import settings
+from src.modules.projects.utils import convert_project_to_summary, project_to_summary, save_upload_file, create_empty_project, SUMMARY_PROJECTION
+from src.modules.projects.import_jobs import create_import_job, get_import_job, job_to_response, import_workers
+from src.modules.projects.bulk_import import import_projects_archive
 from typing import List, Optional
 from bson import ObjectId
 from datetime import datetime
+from pymongo import ASCENDING
+from src.pagination import count_cache, find_page, set_total_count
+from src.search import SearchQuery, search_update
+from src.modules.events.members import remove_project as remove_event_project
 
 # Импортируем необходимые схемы
 from src.modules.projects.schemas import (
@@ -24,19 +31,26 @@ from src.modules.projects.schemas import (
     MediaResource,
     Review,
     TeamMember,
-    ProjectTemplate
+    ProjectTemplate,
+    ImportJob,
+    BulkImportReport
 
 )
 
 # Импортируем данные проекта
 from src.modules.projects.project_data import tab_calendar_plan, expenses, cofinancing
-from src.database import projects_data_collection, events_data_collection
+from src.database import projects_data_collection
 
 
 router = APIRouter()
 
 SERVICE_NAME = "projects_service"
 
+# Проект загружается один раз за запрос и используется и для проверки прав, и обработчиком
+load_project = EntityLoader(projects_data_collection, "project_id", "Проект не найден")
+load_project_owner = EntityLoader(projects_data_collection, "project_id", "Проект не найден",
+                                  fields=["assigned_event_id"])
+
 
 
 # Эндпоинт для создания пустого проекта
@@ -60,6 +74,7 @@ async def create_project(
     except Exception as e:
         logger.exception("Ошибка при сохранении проекта")
         raise HTTPException(status_code=500, detail="Ошибка при сохранении проекта")
+    count_cache.invalidate(projects_data_collection)
 
     created_project = await projects_data_collection.find_one({"_id": result.inserted_id})
     if not created_project:
@@ -73,30 +88,56 @@ async def create_project(
         raise HTTPException(status_code=422, detail=f"Ошибка валидации данных: {ve}")
 
 # Эндпоинт для создания проекта из файла
-@router.post("/projects/create-from-file", response_model=ProjectFICPersonSummary, status_code=status.HTTP_201_CREATED)
-async def create_project(
+@router.post("/projects/create-from-file", response_model=ImportJob, status_code=status.HTTP_202_ACCEPTED)
+async def create_project_from_upload(
     project_template: ProjectTemplate,
     input_file: UploadFile = File(...),
     token: dict = Depends(decode_jwt)
 ):
+    """
+    Постановка файла заявки в очередь импорта.
+    Проект создается фоновым воркером, состояние доступно по /projects/import-jobs/{job_id}.
+    """
     await check_permissions(token)
 
-    file_path = await save_upload_file(input_file)
-    new_project = await create_project_from_file(token, project_template, file_path)
+    uploaded = await save_upload_file(input_file)
+    job = await create_import_job(token, project_template.value, uploaded, input_file.filename)
+    import_workers.notify()
 
-    try:
-        result = await projects_data_collection.insert_one(new_project)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Ошибка при сохранении проекта: {e}")
+    return job
 
-    created_project = await projects_data_collection.find_one({"_id": result.inserted_id})
-    if not created_project:
-        raise HTTPException(status_code=404, detail="Созданный проект не найден")
 
-    try:
-        return await convert_project_to_summary(created_project)
-    except ValidationError as ve:
-        raise HTTPException(status_code=422, detail=f"Ошибка валидации данных: {ve}")
+# Эндпоинт для пакетного импорта проектов из ZIP архива
+@router.post("/projects/import-archive", response_model=BulkImportReport)
+async def import_projects_from_archive(
+    project_template: ProjectTemplate,
+    event_id: Optional[str] = None,  # Мероприятие, в которое сразу добавляются проекты
+    archive: UploadFile = File(...),
+    token: dict = Depends(decode_jwt)
+):
+    """
+    Создание проектов из ZIP архива с DOCX файлами заявок.
+    Файлы разбираются параллельно, проекты сохраняются пачками,
+    в ответе возвращается результат по каждому файлу.
+    """
+    await check_permissions(token, operation_type="high-level_event_operation")
+
+    if archive.size is not None and archive.size > settings.bulk_import_max_archive_size:
+        raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Превышен допустимый размер архива")
+
+    return await import_projects_archive(archive.file, token, project_template.value, event_id)
+
+
+# Эндпоинт для получения состояния задачи импорта
+@router.get("/projects/import-jobs/{job_id}", response_model=ImportJob)
+async def get_import_job_status(job_id: str, token: dict = Depends(decode_jwt)):
+    """
+    Получение состояния, длительности этапов и ошибок задачи импорта.
+    """
+    job = await get_import_job(job_id)
+    await check_permissions(token, SERVICE_NAME, user_id=job.get("author_id"))
+
+    return job_to_response(job)
 
 
 
@@ -126,10 +167,7 @@ async def get_my_projects(
     query = {"author_id": user_id}
 
     # Добавляем фильтры, если они указаны
-    if name:
-        query["project_name"] = {"$regex": name, "$options": "i"}  # Регистронезависимый поиск
-    if author:
-        query["author_name"] = {"$regex": author, "$options": "i"}  # Регистронезависимый поиск
+    query.update(SearchQuery(projects_data_collection.name).add("project_name", name).add("author_name", author).filter())
     if template:
         query["project_template"] = {"$regex": template, "$options": "i"}  # Регистронезависимый поиск
     # Фильтрация по event_section и event_id
@@ -143,7 +181,7 @@ async def get_my_projects(
 
 
     # Получаем проекты из базы данных с пагинацией
-    projects_cursor = projects_data_collection.find(query).skip(skip).limit(limit)
+    projects_cursor = projects_data_collection.find(query, SUMMARY_PROJECTION).skip(skip).limit(limit)
     projects = [await convert_project_to_summary(project) async for project in projects_cursor]
 
     return projects
@@ -154,16 +192,20 @@ async def get_my_projects(
 @router.get("/projects-all", response_model=List[ProjectFICPersonSummary])
 async def get_all_projects(
     response: Response,
-    page: int = 1,
-    limit: int = 10,
+    page: int = Query(1, ge=1),
+    limit: int = Query(10, ge=1, le=1000),
     author: str = "",
     title: str = "",
+    cursor: Optional[str] = Query(None, description="Курсор следующей страницы из заголовка X-Next-Cursor"),
+    approximate_total: bool = Query(False, description="Приблизительный подсчет X-Total-Count для больших списков"),
     token: dict = Depends(decode_jwt)
 ):
     """
     Получение списка всех проектов в системе с возможностью фильтрации.
     - **page**: Номер страницы.
     - **limit**: Количество элементов на странице.
+    - **cursor**: Курсор следующей страницы; если указан, page не используется.
+    - **approximate_total**: Не считать X-Total-Count точно дальше предела count_approximate_limit.
     - **author**: Условие поиска по ФИО автора.
     - **title**: Условие поиска по названию проекта.
     """
@@ -172,29 +214,18 @@ async def get_all_projects(
     # Создаем базовый фильтр для поиска
     filter_conditions = {}
 
-    # Добавляем фильтрацию по названию проекта, если указано
-    if title:
-        filter_conditions["project_name"] = {"$regex": title, "$options": "i"}
-
-    # Добавляем фильтрацию по ФИО автора, если указано
-    if author:
-        filter_conditions["author_name"] = {"$regex": author, "$options": "i"}
+    # Поиск по названию проекта и ФИО автора
+    search = SearchQuery(projects_data_collection.name).add("project_name", title).add("author_name", author)
+    filter_conditions.update(search.filter())
 
     # Получение общего количества проектов перед пагинацией
-    total_count = await projects_data_collection.count_documents(filter_conditions)
+    await set_total_count(response, projects_data_collection, filter_conditions, approximate_total)
 
     # Получение проектов с учетом пагинации
-    projects_cursor = projects_data_collection.find(filter_conditions).skip((page - 1) * limit).limit(limit)
-    projects = await projects_cursor.to_list(length=limit)
-
-    # Добавление project_id к проектам
-    for project in projects:
-        project["project_id"] = str(project["_id"])
-
-    # Установка заголовка с общим количеством проектов
-    response.headers['X-Total-Count'] = str(total_count)
+    projects = await find_page(projects_data_collection, filter_conditions, [("_id", ASCENDING)], limit, page, cursor,
+                               projection=SUMMARY_PROJECTION, response=response, search=search)
 
-    return [ProjectFICPersonSummary(**project) for project in projects]
+    return [project_to_summary(project) for project in projects]
 
 
 # Эндпоинт для получения списка проектов
@@ -224,7 +255,7 @@ async def get_projects(
             raise HTTPException(status_code=400, detail="Неверный формат user_id")
 
     # Получаем проекты из базы данных с пагинацией
-    projects_cursor = projects_data_collection.find(query).skip(skip).limit(limit)
+    projects_cursor = projects_data_collection.find(query, SUMMARY_PROJECTION).skip(skip).limit(limit)
     projects = [await convert_project_to_summary(project) async for project in projects_cursor]
 
     return projects
@@ -235,20 +266,11 @@ async def get_projects(
 
 # Эндпоинт для получения конкретного проекта
 @router.get("/projects/{project_id}", response_model=ProjectFICPerson)
-async def get_project(project_id: str, token: dict = Depends(decode_jwt)):
+async def get_project(project_id: str, token: dict = Depends(decode_jwt), project: dict = Depends(load_project)):
     """
     Получение информации о проекте по его ID.
     """
-    await check_permissions(token, SERVICE_NAME, project_id=project_id)
-
-    try:
-        obj_id = ObjectId(project_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Неверный формат project_id")
-
-    project = await projects_data_collection.find_one({"_id": obj_id})
-    if not project:
-        raise HTTPException(status_code=404, detail="Проект не найден")
+    await check_permissions(token, SERVICE_NAME, project_id=project_id, entity=project)
 
     project["project_id"] = str(project["_id"])
     return ProjectFICPerson(**project)
@@ -258,18 +280,11 @@ async def get_project(project_id: str, token: dict = Depends(decode_jwt)):
 async def update_additional_files(
         project_id: str,
         request: UpdateAdditionalFilesRequest,
-        token: dict = Depends(decode_jwt)
+        token: dict = Depends(decode_jwt),
+        existing_project: dict = Depends(load_project_owner)
 ):
-    await check_permissions(token, SERVICE_NAME, project_id=project_id)
-
-    try:
-        obj_id = ObjectId(project_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Неверный формат project_id")
-
-    existing_project = await projects_data_collection.find_one({"_id": obj_id})
-    if not existing_project:
-        raise HTTPException(status_code=404, detail="Проект не найден")
+    await check_permissions(token, SERVICE_NAME, project_id=project_id, entity=existing_project)
+    obj_id = existing_project["_id"]
 
     # Преобразование объектов Pydantic в словари
     additional_files_dict = [file.dict() for file in request.additional_files]
@@ -291,68 +306,51 @@ async def update_additional_files(
 async def update_project(
         project_id: str,
         update_data: ProjectFICPersonUpdateData,
-        token: dict = Depends(decode_jwt)
+        token: dict = Depends(decode_jwt),
+        existing_project: dict = Depends(load_project_owner)
 ):
     """
     Обновление информации о проекте по его ID.
     """
 
-    await check_permissions(token, SERVICE_NAME, project_id=project_id)
-
-    try:
-        obj_id = ObjectId(project_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Неверный формат project_id")
-
-    existing_project = await projects_data_collection.find_one({"_id": obj_id})
-    if not existing_project:
-        raise HTTPException(status_code=404, detail="Проект не найден")
+    await check_permissions(token, SERVICE_NAME, project_id=project_id, entity=existing_project)
+    obj_id = existing_project["_id"]
 
     update_dict = update_data.dict(exclude_unset=True)
     update_dict["update_date"] = datetime.utcnow()
+    update_dict.update(search_update(projects_data_collection.name, update_dict))
 
     await projects_data_collection.update_one(
         {"_id": obj_id},
         {"$set": update_dict}
     )
+    count_cache.invalidate(projects_data_collection)
 
     return {"detail": "Проект успешно обновлён"}
 
 
 # Эндпоинт для удаления проекта
 @router.delete("/projects/{project_id}", status_code=204)
-async def delete_project(project_id: str, token: dict = Depends(decode_jwt)):
+async def delete_project(project_id: str, token: dict = Depends(decode_jwt),
+                         project: dict = Depends(load_project_owner)):
     """
     Удаление проекта по его ID.
     """
-    await check_permissions(token, SERVICE_NAME, project_id=project_id)
-
-    # Проверяем корректность формата project_id
-    try:
-        obj_id = ObjectId(project_id)
-    except ValueError:
-        raise HTTPException(status_code=400, detail="Неверный формат project_id")
-
-    # Получаем проект из базы данных
-    project = await projects_data_collection.find_one({"_id": obj_id})
-    if not project:
-        raise HTTPException(status_code=404, detail="Проект не найден")
+    await check_permissions(token, SERVICE_NAME, project_id=project_id, entity=project)
+    obj_id = project["_id"]
 
     # Получаем ID мероприятия из поля assigned_event_id
     event_id = project.get("assigned_event_id")
     if event_id:
         # Удаляем проект из участников мероприятия
-        result = await events_data_collection.update_one(
-            {"_id": ObjectId(event_id)},
-            {"$pull": {"event_participants": {"projects_id": project_id}}}
-        )
-        if result.modified_count == 0:
+        if not await remove_event_project(project_id, event_id):
             raise HTTPException(status_code=404, detail="Участник с указанным projects_id не найден в мероприятии")
 
     # Удаляем проект
     delete_result = await projects_data_collection.delete_one({"_id": obj_id})
     if delete_result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Проект не найден для удаления")
+    count_cache.invalidate(projects_data_collection)
 
     return {"detail": "Проект успешно удалён"}
 
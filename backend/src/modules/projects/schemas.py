@@ -240,4 +240,61 @@ class ProjectData(BaseModel):
     project_name: str
     region: str
     contacts: ContactInfo
-    project_data_tabs: Dict[str, Any]
\ No newline at end of file
+    project_data_tabs: Dict[str, Any]
+
+
+# Сохраненный файл заявки (файлы хранятся по хешу содержимого)
+class UploadedFile(BaseModel):
+    file_path: str  # Путь к файлу в хранилище
+    file_hash: str  # SHA-256 содержимого
+    size: int  # Размер файла в байтах
+
+
+# Состояние задачи импорта проекта из файла
+class ImportJobState(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+# Длительность этапов задачи импорта в миллисекундах
+class ImportJobTimings(BaseModel):
+    queued_ms: Optional[float] = None  # Ожидание в очереди
+    parse_ms: Optional[float] = None  # Разбор и валидация файла
+    insert_ms: Optional[float] = None  # Сохранение проекта
+    total_ms: Optional[float] = None  # Общее время от постановки в очередь
+
+# Модель задачи импорта проекта из файла
+class ImportJob(BaseModel):
+    job_id: str  # ID задачи
+    state: ImportJobState  # Состояние задачи
+    file_name: Optional[str] = None  # Имя загруженного файла
+    file_size: Optional[int] = None  # Размер сохраненного файла в байтах
+    project_template: Optional[str] = None  # Шаблон проекта
+    author_id: Optional[str] = None  # ID автора
+    project_id: Optional[str] = None  # ID созданного проекта
+    attempts: int = 0  # Количество попыток обработки
+    error: Optional[str] = None  # Описание ошибки
+    created_at: Optional[datetime] = None  # Дата постановки в очередь
+    started_at: Optional[datetime] = None  # Дата начала обработки
+    finished_at: Optional[datetime] = None  # Дата завершения обработки
+    timings: ImportJobTimings = ImportJobTimings()  # Длительность этапов
+
+
+# Результат импорта одного файла из архива
+class BulkImportFileResult(BaseModel):
+    file_name: str  # Имя файла в архиве
+    status: str  # "created", "failed" или "skipped"
+    project_id: Optional[str] = None  # ID созданного проекта
+    error: Optional[str] = None  # Описание ошибки
+    parse_ms: Optional[float] = None  # Длительность разбора файла
+
+# Отчет о пакетном импорте проектов из архива
+class BulkImportReport(BaseModel):
+    total: int  # Количество DOCX файлов в архиве
+    created: int  # Количество созданных проектов
+    failed: int  # Количество файлов с ошибками
+    assigned_event_id: Optional[str] = None  # Мероприятие, в которое добавлены проекты
+    duration_ms: float  # Общая длительность импорта
+    documents_per_second: float  # Пропускная способность
+    files: List[BulkImportFileResult] = []  # Результаты по каждому файлу
@@ -1,9 +1,12 @@
 # src/modules/projects/utils.py
 
 from fastapi import UploadFile, File, Query
-import os, shutil
+import os
+import hashlib
 import uuid
-from typing import List, Optional, Any, Dict, Union
+import aiofiles
+import aiofiles.os
+from typing import IO, List, Optional, Any, Dict, Union
 from bson import ObjectId
 from datetime import datetime
 from fastapi import APIRouter, HTTPException, UploadFile, File, Query, Depends, status
@@ -21,10 +24,11 @@ from src.modules.projects.schemas import (
     Results,
     MediaResource,
     AdditionalFiles,
+    UploadedFile,
 )
 import logging
-import json
-from src.modules.projects.projects import convert_docx_to_json
+from src.modules.projects.parser_pool import parse_docx_file
+from src.config import settings
 
 
 # Путь для сохранения загружаемых файлов
@@ -35,6 +39,7 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 # Импортируем данные проекта
 from src.modules.projects.project_data import tab_calendar_plan, expenses, cofinancing, project_info
 from src.database import projects_data_collection
+from src.search import search_fields
 
 
 
@@ -66,6 +71,7 @@ async def create_empty_project(token: dict, project_template: str) -> ProjectFIC
     )
 
     project_dict = new_project.dict()
+    project_dict.update(search_fields(projects_data_collection.name, project_dict))
     await assign_ids(project_dict)  # Назначаем уникальные ID
 
     return project_dict
@@ -133,12 +139,11 @@ def process_project_data(project_data: ProjectData) -> Dict[str, Any]:
 
 
 # Асинхронная функция для создания проекта из файла
-async def create_project_from_file(token: dict, project_template: str, file_path: str) -> ProjectFICPerson:
+async def create_project_from_file(token: dict, project_template: str, file_path: str,
+                                   file_hash: Optional[str] = None) -> ProjectFICPerson:
 
-    new_project_file_path_json = await convert_docx_to_json(file_path)
-
-    # Считываем данные из JSON файла
-    project_data = await read_json(new_project_file_path_json)
+    # Разбор выполняется в пуле, чтобы не блокировать цикл событий
+    project_data = await parse_docx_file(file_path, file_hash)
 
     # Создаем экземпляр ProjectData
     project_data_instance = ProjectData(**project_data)
@@ -165,40 +170,128 @@ async def create_project_from_file(token: dict, project_template: str, file_path
     )
 
     project_dict = new_project.dict()
+    project_dict.update(search_fields(projects_data_collection.name, project_dict))
 
     return project_dict
 
 
-# Функция для чтения данных из JSON файла
-async def read_json(file_path: str) -> Dict[str, Any]:
+# Размер блока при потоковой записи файлов
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+
+# DOCX - это ZIP архив, он начинается с сигнатуры локального заголовка ZIP
+DOCX_MAGIC = b"PK\x03\x04"
+
+
+def blob_path(file_hash: str, extension: str = ".docx") -> str:
+    # Файлы раскладываются по подкаталогам по первым символам хеша
+    return os.path.join(UPLOAD_DIR, file_hash[:2], f"{file_hash}{extension}")
+
+
+def temp_upload_path() -> str:
+    return os.path.join(UPLOAD_DIR, f"{uuid.uuid4().hex}.part")
+
+
+def file_too_large(max_size: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Размер файла превышает {max_size // (1024 * 1024)} МБ"
+    )
+
+
+def check_upload_chunk(chunk: bytes, size: int, max_size: int):
+    """
+    Проверяет очередной фрагмент DOCX файла; size - размер прочитанного вместе с фрагментом.
+    Первый фрагмент должен начинаться с сигнатуры ZIP, размер не должен превышать max_size.
+    """
+    if size == len(chunk) and not chunk.startswith(DOCX_MAGIC):
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Файл не является документом DOCX"
+        )
+    if size > max_size:
+        raise file_too_large(max_size)
+
+
+class BlobWriter:
+    """
+    Сохранение DOCX файла в хранилище по хешу содержимого (одинаковые файлы хранятся один раз).
+
+    Фрагменты пишутся во временный файл temp_path, update() проверяет каждый
+    фрагмент и считает sha256 и размер. finish() переносит файл на место по хешу,
+    discard() удаляет временный файл, если сохранение прервано.
+    """
+
+    def __init__(self, max_size: Optional[int] = None, extension: str = ".docx"):
+        self.max_size = max_size or settings.upload_max_size
+        self.extension = extension
+        self.temp_path = temp_upload_path()
+        self.size = 0
+        self._digest = hashlib.sha256()
+
+    def update(self, chunk: bytes) -> bytes:
+        self.size += len(chunk)
+        check_upload_chunk(chunk, self.size, self.max_size)
+        self._digest.update(chunk)
+        return chunk
+
+    def finish(self) -> UploadedFile:
+        if self.size == 0:
+            raise HTTPException(status_code=400, detail="Загружен пустой файл")
+
+        file_hash = self._digest.hexdigest()
+        file_location = blob_path(file_hash, self.extension)
+
+        if os.path.exists(file_location):
+            os.unlink(self.temp_path)
+        else:
+            os.makedirs(os.path.dirname(file_location), exist_ok=True)
+            os.replace(self.temp_path, file_location)
+
+        return UploadedFile(file_path=file_location, file_hash=file_hash, size=self.size)
+
+    def discard(self):
+        try:
+            os.unlink(self.temp_path)
+        except FileNotFoundError:
+            pass
+
+
+# Сохраняет DOCX из потока в хранилище (распаковка архивов в пуле потоков)
+def store_blob(source: IO[bytes], max_size: Optional[int] = None, extension: str = ".docx") -> UploadedFile:
+    blob = BlobWriter(max_size, extension)
     try:
-        with open(file_path, 'r', encoding='utf-8') as json_file:
-            data = json.load(json_file)
-        logging.info(f"Данные успешно считаны из JSON файла '{file_path}'.")
-        return data
-    except Exception as e:
-        logging.error(f"Ошибка при чтении JSON файла '{file_path}': {e}")
+        with open(blob.temp_path, "wb") as buffer:
+            while chunk := source.read(UPLOAD_CHUNK_SIZE):
+                buffer.write(blob.update(chunk))
+        return blob.finish()
+    except BaseException:
+        blob.discard()
         raise
 
 
 # Вспомогательная функция для сохранения загружаемых файлов
-async def save_upload_file(upload_file: UploadFile) -> str:
-    # Определяем начальное расположение файла
-    file_location = os.path.join(UPLOAD_DIR, upload_file.filename)
+async def save_upload_file(upload_file: UploadFile, max_size: Optional[int] = None) -> UploadedFile:
+    """
+    Потоково сохраняет загружаемый DOCX файл, не блокируя цикл событий.
+    Файл не по формату или больше max_size отклоняется, как только это становится известно.
+    """
+    blob = BlobWriter(max_size)
 
-    # Проверяем, существует ли файл с таким именем, и добавляем уникальный суффикс, если это необходимо
-    if os.path.exists(file_location):
-        base, extension = os.path.splitext(upload_file.filename)
-        counter = 1
-        while os.path.exists(file_location):
-            file_location = os.path.join(UPLOAD_DIR, f"{base}_{counter}{extension}")
-            counter += 1
+    # Размер известен заранее, если клиент передал его в заголовках части
+    if upload_file.size is not None and upload_file.size > blob.max_size:
+        raise file_too_large(blob.max_size)
 
-    # Сохраняем файл
-    with open(file_location, "wb") as buffer:
-        shutil.copyfileobj(upload_file.file, buffer)
+    try:
+        async with aiofiles.open(blob.temp_path, "wb") as buffer:
+            while chunk := await upload_file.read(UPLOAD_CHUNK_SIZE):
+                await buffer.write(blob.update(chunk))
+        stored = await aiofiles.os.wrap(blob.finish)()
+    except BaseException:
+        await aiofiles.os.wrap(blob.discard)()
+        raise
 
-    return file_location
+    logging.info(f"Файл '{upload_file.filename}' сохранен: {stored.size} байт, sha256 {stored.file_hash}")
+    return stored
 
 async def assign_ids(obj: Union[Dict[str, Any], List[Any]]):
     """
@@ -214,6 +307,36 @@ async def assign_ids(obj: Union[Dict[str, Any], List[Any]]):
         for item in obj:
             await assign_ids(item)
 
+# Поля проекта, из которых строится ProjectFICPersonSummary. Списки проектов читают
+# только их, без project_data_tabs (календарный план, расходы, медиа, команда)
+SUMMARY_PROJECTION = {
+    "_id": 1,
+    "assigned_event_id": 1,
+    "create_date": 1,
+    "update_date": 1,
+    "project_name": 1,
+    "author_id": 1,
+    "author_name": 1,
+    "project_template": 1,
+    "reviews": 1,
+}
+
+
+def project_to_summary(project: dict) -> ProjectFICPersonSummary:
+    """Краткие данные проекта из документа, прочитанного с SUMMARY_PROJECTION."""
+    return ProjectFICPersonSummary(
+        project_id=str(project['_id']),
+        assigned_event_id=project.get('assigned_event_id'),
+        creation_date=project.get('create_date'),
+        update_date=project.get('update_date'),
+        project_name=project.get('project_name'),
+        author_id=project.get('author_id'),
+        author_name=project.get('author_name'),
+        project_template=project.get('project_template'),
+        reviews=project.get('reviews')
+    )
+
+
 async def convert_project_to_summary(project: dict) -> ProjectFICPersonSummary:
     # Проверка на наличие необходимых полей
     required_fields = ['_id', 'create_date', 'update_date', 'project_name', 'author_id', 'author_name', 'project_template', 'reviews']
@@ -221,15 +344,6 @@ async def convert_project_to_summary(project: dict) -> ProjectFICPersonSummary:
         if field not in project:
             raise ValueError(f"Отсутствует обязательное поле: {field}")
 
-    return ProjectFICPersonSummary(
-        project_id=str(project['_id']),
-        creation_date=project['create_date'],
-        update_date=project['update_date'],
-        project_name=project['project_name'],
-        author_id=project['author_id'],
-        author_name=project['author_name'],
-        project_template=project['project_template'],
-        reviews=project['reviews']
-    )
+    return project_to_summary(project)
 
 
@@ -2,15 +2,21 @@ from fastapi import APIRouter, HTTPException, Depends, Response
 from typing import List, Optional
 from src.modules.reviews.schemas import Review, ReviewCreate, ReviewUpdate, CriteriaEvaluation
 from src.modules.auth.utils import create_jwt, decode_jwt
-from src.utils import check_permissions
+from src.utils import check_permissions, EntityLoader
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from src.database import projects_data_collection, reviews_data_collection, profile_data_collection
 
 router = APIRouter()
 
 SERVICE_NAME = "reviews_service"
 
+# Проверка загружается один раз за запрос и используется и для проверки прав, и обработчиком
+load_review = EntityLoader(reviews_data_collection, "review_id", "Review not found")
+load_review_owner = EntityLoader(reviews_data_collection, "review_id", "Review not found", fields=["project_id"])
+
 def calculate_total_score(criteria: CriteriaEvaluation) -> int:
     """
     Функция для вычисления общей суммы баллов по критериям.
@@ -60,8 +66,12 @@ async def create_review(review: ReviewCreate, token: dict = Depends(decode_jwt))
         "expert_comment": review.expert_comment
     }
 
-    # Вставка новой проверки в коллекцию
-    result = await reviews_data_collection.insert_one(review_data)
+    # Вставка новой проверки в коллекцию; уникальный индекс (project_id, reviewer_id)
+    # отклоняет вторую проверку, отправленную одновременно с первой
+    try:
+        result = await reviews_data_collection.insert_one(review_data)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=400, detail="Рецензент уже отправил рецензию на этот проект.")
 
     # Вычисление общей суммы баллов по критериям
     total_score = calculate_total_score(review.criteria_evaluation)
@@ -133,32 +143,27 @@ async def get_reviews_by_expert_and_project( project_id: str, token: dict = Depe
 
 # Эндпоинт для получения информации о конкретной проверке по ID
 @router.get("/reviews/{review_id}", response_model=Review)
-async def get_review(review_id: str, token: dict = Depends(decode_jwt)):
+async def get_review(review_id: str, token: dict = Depends(decode_jwt), review: dict = Depends(load_review)):
     """
     Получение информации о проверке по её ID.
     """
 
-    await check_permissions(token, SERVICE_NAME, review_id=review_id)
+    await check_permissions(token, SERVICE_NAME, review_id=review_id, entity=review)
 
-    review = await reviews_data_collection.find_one({"_id": ObjectId(review_id)})
-    if not review:
-        raise HTTPException(status_code=404, detail="Review not found")
+    review["review_id"] = str(review["_id"])
     return Review(**review)
 
 
 # Эндпоинт для обновления проверки по ID
 @router.put("/reviews/{review_id}", response_model=Review)
-async def update_review(review_id: str, review: ReviewUpdate, token: dict = Depends(decode_jwt)):
+async def update_review(review_id: str, review: ReviewUpdate, token: dict = Depends(decode_jwt),
+                        existing_review: dict = Depends(load_review_owner)):
     """
     Обновление проверки по её ID.
     """
 
-    # Шаг 1: Найти проверку по review_id
-    await check_permissions(token, SERVICE_NAME, review_id=review_id)
-
-    existing_review = await reviews_data_collection.find_one({"_id": ObjectId(review_id)})
-    if not existing_review:
-        raise HTTPException(status_code=404, detail="Review not found")
+    # Шаг 1: Проверка загружена EntityLoader
+    await check_permissions(token, SERVICE_NAME, review_id=review_id, entity=existing_review)
 
     # Шаг 2: Извлечь project_id из найденной проверки
     project_id = existing_review.get("project_id")
@@ -169,12 +174,14 @@ async def update_review(review_id: str, review: ReviewUpdate, token: dict = Depe
     update_data = {k: v for k, v in review.dict().items() if v is not None}
     update_data["update_date"] = datetime.utcnow()
 
-    result = await reviews_data_collection.update_one(
-        {"_id": ObjectId(review_id)},
-        {"$set": update_data}
+    # update_date меняется всегда, поэтому документ после обновления найден только для удаленной проверки
+    updated_review = await reviews_data_collection.find_one_and_update(
+        {"_id": existing_review["_id"]},
+        {"$set": update_data},
+        return_document=ReturnDocument.AFTER
     )
 
-    if result.modified_count == 0:
+    if updated_review is None:
         raise HTTPException(status_code=400, detail="Review not found or no changes made")
 
     # Шаг 3: Вычисление общей суммы баллов по критериям
@@ -189,7 +196,6 @@ async def update_review(review_id: str, review: ReviewUpdate, token: dict = Depe
         }}
     )
 
-    updated_review = await reviews_data_collection.find_one({"_id": ObjectId(review_id)})
     updated_review["review_id"] = str(updated_review["_id"])  # Добавляем review_id
 
     return Review(**updated_review)
@@ -197,15 +203,13 @@ async def update_review(review_id: str, review: ReviewUpdate, token: dict = Depe
 
 # Эндпоинт для удаления проверки по ID
 @router.delete("/reviews/{review_id}")
-async def delete_review(review_id: str, token: dict = Depends(decode_jwt)):
+async def delete_review(review_id: str, token: dict = Depends(decode_jwt),
+                        existing_review: dict = Depends(load_review_owner)):
     """
     Удаление проверки по её ID из всех связанных таблиц.
     """
-    await check_permissions(token, SERVICE_NAME, review_id=review_id)
-    # Шаг 1: Найти проверку по review_id
-    existing_review = await reviews_data_collection.find_one({"_id": ObjectId(review_id)})
-    if not existing_review:
-        raise HTTPException(status_code=404, detail="Review not found")
+    # Шаг 1: Проверка загружена EntityLoader
+    await check_permissions(token, SERVICE_NAME, review_id=review_id, entity=existing_review)
 
     # Шаг 2: Извлечь project_id из найденной проверки
     project_id = existing_review.get("project_id")
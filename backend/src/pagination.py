@@ -0,0 +1,215 @@
+# src/pagination.py
+import base64
+import time
+from collections import OrderedDict, defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from bson import json_util
+from fastapi import HTTPException, Response
+from pymongo import ASCENDING, DESCENDING
+
+from src.config import settings
+from src.metrics import register_metrics
+from src.search import SCORE_FIELD, SearchQuery
+
+# Заголовок ответа с курсором следующей страницы
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+# Заголовки общего количества документов
+TOTAL_COUNT_HEADER = "X-Total-Count"
+APPROXIMATE_COUNT_HEADER = "X-Total-Count-Approximate"
+
+Sort = Sequence[Tuple[str, int]]
+
+
+def encode_cursor(document: Dict[str, Any], sort: Sort) -> str:
+    """Непрозрачный курсор: значения ключа сортировки последнего документа страницы."""
+    values = {field: document.get(field) for field, _ in sort}
+    return base64.urlsafe_b64encode(json_util.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort: Sort) -> Dict[str, Any]:
+    try:
+        values = json_util.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except Exception:
+        raise HTTPException(status_code=400, detail="Неверный курсор страницы")
+    if not isinstance(values, dict) or any(field not in values for field, _ in sort):
+        raise HTTPException(status_code=400, detail="Неверный курсор страницы")
+    return values
+
+
+def keyset_filter(query: Dict[str, Any], sort: Sort, values: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Условие "после курсора" для составного ключа сортировки:
+    (a > va) или (a == va и b > vb) ... с учетом направления каждого поля.
+    """
+    branches = []
+    for position, (field, direction) in enumerate(sort):
+        branch = {previous: values[previous] for previous, _ in sort[:position]}
+        branch[field] = {"$gt" if direction == ASCENDING else "$lt": values[field]}
+        branches.append(branch)
+    after = branches[0] if len(branches) == 1 else {"$or": branches}
+    return {"$and": [query, after]} if query else after
+
+
+def page_pipeline(query: Dict[str, Any], sort: Sort, limit: int, page: int, cursor: Optional[str],
+                  projection: Optional[Dict[str, Any]], search: Optional[SearchQuery]):
+    """
+    Стадии агрегации для страницы: отбор документов (с оценкой релевантности
+    при активном поиске) и выбор страницы. Возвращает обе части и итоговую сортировку.
+    """
+    match_stages: List[Dict[str, Any]] = [{"$match": query}]
+    if search is not None and search.active:
+        sort = [(SCORE_FIELD, DESCENDING)] + list(sort)
+        match_stages.append({"$addFields": {SCORE_FIELD: search.score()}})
+        if projection:
+            projection = {**projection, SCORE_FIELD: 1}
+
+    page_stages: List[Dict[str, Any]] = []
+    if cursor:
+        page_stages.append({"$match": keyset_filter({}, sort, decode_cursor(cursor, sort))})
+    page_stages.append({"$sort": dict(sort)})
+    if not cursor:
+        page_stages.append({"$skip": (page - 1) * limit})
+    page_stages.append({"$limit": limit})
+    if projection:
+        page_stages.append({"$project": projection})
+    return match_stages, page_stages, sort
+
+
+async def find_page(collection, query: Dict[str, Any], sort: Sort, limit: int, page: int = 1,
+                    cursor: Optional[str] = None, projection: Optional[Dict[str, Any]] = None,
+                    response: Optional[Response] = None, search: Optional[SearchQuery] = None) -> List[Dict[str, Any]]:
+    """
+    Страница документов по устойчивому ключу сортировки (должен заканчиваться на _id).
+
+    С курсором страница выбирается по индексу от значения ключа, без skip; без курсора
+    работает прежняя пагинация page/limit с той же сортировкой. Курсор следующей
+    страницы записывается в заголовок X-Next-Cursor, если страница заполнена целиком.
+
+    Если передан активный поисковый запрос, документы сначала упорядочиваются
+    по релевантности, а затем по ключу сортировки.
+    """
+    if search is not None and search.active:
+        match_stages, page_stages, sort = page_pipeline(query, sort, limit, page, cursor, projection, search)
+        documents = await collection.aggregate(match_stages + page_stages).to_list(length=limit)
+    elif cursor:
+        documents = await collection.find(keyset_filter(query, sort, decode_cursor(cursor, sort)), projection) \
+            .sort(list(sort)).limit(limit).to_list(length=limit)
+    else:
+        documents = await collection.find(query, projection) \
+            .sort(list(sort)).skip((page - 1) * limit).limit(limit).to_list(length=limit)
+
+    if response is not None and len(documents) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(documents[-1], sort)
+    return documents
+
+
+async def find_page_with_total(collection, query: Dict[str, Any], sort: Sort, limit: int, page: int = 1,
+                               cursor: Optional[str] = None, projection: Optional[Dict[str, Any]] = None,
+                               response: Optional[Response] = None,
+                               search: Optional[SearchQuery] = None) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Страница и точное общее количество одним запросом через $facet.
+
+    Подходит для фильтров, зависящих от пользователя, которые нет смысла кешировать
+    в count_cache. Фильтр должен быть избирательным: стадии внутри $facet
+    не используют индексы, сортируется уже отобранное подмножество.
+    """
+    match_stages, page_stages, sort = page_pipeline(query, sort, limit, page, cursor, projection, search)
+    pipeline = match_stages + [{"$facet": {"items": page_stages, "total": [{"$count": "count"}]}}]
+    result = await collection.aggregate(pipeline).to_list(length=1)
+
+    documents = result[0]["items"] if result else []
+    total = result[0]["total"][0]["count"] if result and result[0]["total"] else 0
+    if response is not None:
+        response.headers[TOTAL_COUNT_HEADER] = str(total)
+        if len(documents) == limit:
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(documents[-1], sort)
+    return documents, total
+
+
+class CountCache:
+    """
+    Кеш общего количества документов для заголовка X-Total-Count.
+
+    Ключ - полное имя коллекции, нормализованный фильтр (JSON с упорядоченными
+    ключами) и режим подсчета. Запись живет ttl секунд; запись в коллекцию
+    увеличивает ее поколение, и все прежние подсчеты по ней перестают читаться.
+    Поколения локальны для воркера, поэтому изменения из других воркеров видны
+    не позже чем через ttl.
+
+    Без фильтра используется estimated_document_count по метаданным коллекции.
+    В приблизительном режиме подсчет останавливается на approximate_limit
+    документах, и результат является нижней границей.
+    """
+
+    def __init__(self, ttl: float, cache_size: int, approximate_limit: int):
+        self.ttl = ttl
+        self.cache_size = cache_size
+        self.approximate_limit = approximate_limit
+
+        self._cache: "OrderedDict[Tuple[str, int, str, bool], Tuple[int, bool, float]]" = OrderedDict()
+        self._generations: Dict[str, int] = defaultdict(int)
+        self._counters = {"hits": 0, "misses": 0, "estimated": 0, "capped": 0, "invalidations": 0}
+
+    def invalidate(self, collection):
+        self._generations[collection.full_name] += 1
+        self._counters["invalidations"] += 1
+
+    async def _count(self, collection, query: Dict[str, Any], approximate: bool) -> Tuple[int, bool]:
+        if not query:
+            self._counters["estimated"] += 1
+            return await collection.estimated_document_count(), False
+        if approximate:
+            total = await collection.count_documents(query, limit=self.approximate_limit)
+            capped = total >= self.approximate_limit
+            if capped:
+                self._counters["capped"] += 1
+            return total, capped
+        return await collection.count_documents(query), False
+
+    async def count(self, collection, query: Dict[str, Any], approximate: bool = False) -> Tuple[int, bool]:
+        """Возвращает количество документов и признак того, что подсчет остановлен на пределе."""
+        name = collection.full_name
+        key = (name, self._generations[name], json_util.dumps(query, sort_keys=True), approximate)
+        entry = self._cache.get(key)
+        if entry is not None and entry[2] > time.monotonic():
+            self._cache.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry[0], entry[1]
+        self._counters["misses"] += 1
+
+        generation = self._generations[name]
+        total, capped = await self._count(collection, query, approximate)
+        # Запись, прошедшая во время подсчета, делает результат устаревшим
+        if self.cache_size > 0 and generation == self._generations[name]:
+            self._cache[key] = (total, capped, time.monotonic() + self.ttl)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return total, capped
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            "cached": len(self._cache),
+            **self._counters,
+            "hit_ratio": self._counters["hits"] / lookups if lookups else None,
+        }
+
+
+count_cache = CountCache(
+    ttl=settings.count_cache_ttl,
+    cache_size=settings.count_cache_size,
+    approximate_limit=settings.count_approximate_limit,
+)
+register_metrics("count_cache", count_cache.stats)
+
+
+async def set_total_count(response: Response, collection, query: Dict[str, Any], approximate: bool = False) -> int:
+    """Записывает общее количество документов по фильтру в заголовок X-Total-Count."""
+    total, capped = await count_cache.count(collection, query, approximate)
+    response.headers[TOTAL_COUNT_HEADER] = str(total)
+    if capped:
+        response.headers[APPROXIMATE_COUNT_HEADER] = "true"
+    return total
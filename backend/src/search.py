@@ -0,0 +1,182 @@
+# src/search.py
+"""
+Поиск по названиям и именам: проекты, мероприятия и пользователи.
+
+Для каждого поля поиска в документе хранится массив токенов search_tokens.<ключ>:
+префиксы нормализованных слов (регистр свернут, ё заменена на е) и сами слова
+с меткой "=" для оценки релевантности. Массивы покрыты multikey индексами из
+реестра INDEXES, поэтому фильтр по словам запроса выбирается по индексу вместо
+сканирования коллекции регулярным выражением.
+
+Поиск идет по началу слов, а не по произвольной подстроке: "прог" находит
+"Программирование", "грамм" - нет. Слово запроса длиннее MAX_PREFIX сравнивается
+по первым MAX_PREFIX символам, поэтому неполное длинное слово тоже находится.
+
+Токены пересчитываются при записи документов (search_fields, search_update).
+При старте приложения токены заполняются у документов, где их еще нет;
+пересчитать токены всех документов можно командой:
+    python -m src.search --rebuild
+"""
+import argparse
+import asyncio
+import re
+from typing import Any, Dict, List, Optional
+
+from pymongo import UpdateOne
+
+from src.database import ensure_indexes, events_data_collection, profile_data_collection, projects_data_collection
+
+# Поля поиска по коллекциям: путь поля в документе -> ключ в search_tokens
+SEARCH_FIELDS: Dict[str, Dict[str, str]] = {
+    "projects_data": {"project_name": "project_name", "author_name": "author_name"},
+    "events_data": {"event_full_title": "event_full_title", "event_venue": "event_venue"},
+    "profile_data": {"full_name": "full_name", "external_service_accounts.yandex": "yandex"},
+}
+
+SEARCH_TOKENS_FIELD = "search_tokens"
+# Вычисляемое поле релевантности в выдаче поиска
+SCORE_FIELD = "_search_score"
+
+# Длина самого длинного сохраняемого префикса; более длинные слова запроса
+# сравниваются по первым MAX_PREFIX символам и уточняются оценкой релевантности
+MAX_PREFIX = 12
+# Ограничения на размер документа и запроса
+MAX_WORDS = 32
+MAX_QUERY_WORDS = 8
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def normalize_words(text: Optional[str]) -> List[str]:
+    """Слова текста в нижнем регистре с заменой ё на е."""
+    if not text:
+        return []
+    return _WORD_RE.findall(str(text).casefold().replace("ё", "е"))
+
+
+def prefix_token(word: str) -> str:
+    """Токен фильтра для слова запроса: само слово или его префикс длины MAX_PREFIX."""
+    return word[:MAX_PREFIX]
+
+
+def text_tokens(text: Optional[str]) -> List[str]:
+    tokens = set()
+    for word in normalize_words(text)[:MAX_WORDS]:
+        tokens.update(word[:length] for length in range(1, min(len(word), MAX_PREFIX) + 1))
+        tokens.add("=" + word)
+    return sorted(tokens)
+
+
+def _get_path(document: Dict[str, Any], path: str) -> Any:
+    value: Any = document
+    for part in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(part)
+    return value
+
+
+def search_fields(collection_name: str, document: Dict[str, Any]) -> Dict[str, Any]:
+    """Поле search_tokens для нового документа коллекции."""
+    return {SEARCH_TOKENS_FIELD: {
+        key: text_tokens(_get_path(document, path))
+        for path, key in SEARCH_FIELDS[collection_name].items()
+    }}
+
+
+def search_update(collection_name: str, set_fields: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Операции $set для токенов полей, которые меняет обновление.
+    set_fields - словарь $set с точечными или вложенными путями.
+    """
+    update = {}
+    for path, key in SEARCH_FIELDS[collection_name].items():
+        if path in set_fields:
+            value = set_fields[path]
+        else:
+            head, _, rest = path.partition(".")
+            if head not in set_fields or not rest or not isinstance(set_fields[head], dict):
+                continue
+            value = _get_path(set_fields[head], rest)
+        update[f"{SEARCH_TOKENS_FIELD}.{key}"] = text_tokens(value)
+    return update
+
+
+class SearchQuery:
+    """
+    Разбор поисковых строк списка в условие фильтра и выражение релевантности.
+
+    Каждое слово строки должно совпасть с началом какого-либо слова поля;
+    у слов длиннее MAX_PREFIX сравниваются первые MAX_PREFIX символов.
+    Релевантность - число слов запроса, совпавших со словом поля целиком.
+    """
+
+    def __init__(self, collection_name: str):
+        self.fields = SEARCH_FIELDS[collection_name]
+        self._terms: Dict[str, List[str]] = {}
+
+    def add(self, path: str, text: Optional[str]) -> "SearchQuery":
+        words = normalize_words(text)[:MAX_QUERY_WORDS]
+        if words:
+            self._terms[self.fields[path]] = words
+        return self
+
+    @property
+    def active(self) -> bool:
+        return bool(self._terms)
+
+    def filter(self) -> Dict[str, Any]:
+        return {
+            f"{SEARCH_TOKENS_FIELD}.{key}": {"$all": sorted({prefix_token(word) for word in words})}
+            for key, words in self._terms.items()
+        }
+
+    def score(self) -> Dict[str, Any]:
+        return {"$add": [
+            {"$size": {"$setIntersection": [
+                ["=" + word for word in words],
+                {"$ifNull": [f"${SEARCH_TOKENS_FIELD}.{key}", []]},
+            ]}}
+            for key, words in self._terms.items()
+        ]}
+
+
+async def fill_search_tokens(only_missing: bool = True, batch_size: int = 500) -> Dict[str, int]:
+    """Записывает токены документам коллекций поиска; возвращает число обновленных по коллекциям."""
+    query = {SEARCH_TOKENS_FIELD: {"$exists": False}} if only_missing else {}
+    result = {}
+    for collection in (projects_data_collection, events_data_collection, profile_data_collection):
+        projection = {path: 1 for path in SEARCH_FIELDS[collection.name]}
+        operations, updated = [], 0
+        async for document in collection.find(query, projection):
+            operations.append(UpdateOne({"_id": document["_id"]},
+                                        {"$set": search_fields(collection.name, document)}))
+            if len(operations) == batch_size:
+                await collection.bulk_write(operations, ordered=False)
+                updated += len(operations)
+                operations = []
+        if operations:
+            await collection.bulk_write(operations, ordered=False)
+            updated += len(operations)
+        result[collection.full_name] = updated
+    return result
+
+
+async def rebuild():
+    await ensure_indexes()
+    for name, updated in (await fill_search_tokens(only_missing=False)).items():
+        print(f"{name}: обновлено документов: {updated}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Поисковые токены документов")
+    parser.add_argument("--rebuild", action="store_true", help="Пересчитать токены всех документов")
+    args = parser.parse_args()
+    if args.rebuild:
+        asyncio.run(rebuild())
+    else:
+        parser.print_help()
+
+
+if __name__ == "__main__":
+    main()
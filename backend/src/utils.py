@@ -1,11 +1,20 @@
 # src/utils.py
+import asyncio
+import hashlib
+import json
 import logging
-from fastapi import HTTPException, status
-from typing import Dict, List, Optional
+import time
+from fastapi import HTTPException, Request, status
+from typing import Any, Dict, FrozenSet, Iterable, Optional
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import OperationFailure
+from src.config import settings
+from src.metrics import register_metrics
 from src.modules.profile.schemas import RoleEnum
 from src.database import (
     user_roles_collection,
+    cache_versions_collection,
     projects_data_collection,
     events_data_collection,
     reviews_data_collection
@@ -15,17 +24,248 @@ from src.database import (
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Биты разрешений сервисов для масок в токене. Список только дополняется в конце:
+# номер бита не должен меняться, пока живы выданные токены
+PERMISSIONS = (
+    "crud_my_profile_data",
+    "crud_any_profile_data",
+    "crud_my_projects",
+    "crud_any_projects",
+    "crud_my_events",
+    "crud_any_events",
+    "crud_my_reviews",
+    "crud_any_reviews",
+)
+PERMISSION_BITS: Dict[str, int] = {name: 1 << bit for bit, name in enumerate(PERMISSIONS)}
+
+
+def permissions_mask(permissions: Iterable[str]) -> int:
+    mask = 0
+    for permission in permissions:
+        mask |= PERMISSION_BITS.get(permission, 0)
+    return mask
+
+
+def roles_version(roles: Dict[str, FrozenSet[str]]) -> str:
+    """Версия таблицы ролей, вычисляемая по содержимому: одинакова во всех воркерах."""
+    content = json.dumps(sorted((name, sorted(perms)) for name, perms in roles.items()), ensure_ascii=False)
+    return hashlib.sha1(content.encode()).hexdigest()[:12]
+
+
+class RolePermissionsCache:
+    """
+    Кеш таблицы ролей в памяти процесса: для каждой роли frozenset разрешений
+    всех сервисов и битовая маска по PERMISSION_BITS.
+
+    Таблица загружается целиком одним запросом и живет ttl секунд. Изменения ролей
+    распространяются между воркерами через change stream коллекции ролей, а если
+    MongoDB его не поддерживает (не replica set) - опросом счетчика версии, который
+    увеличивает bump_version после правки ролей.
+    """
+
+    VERSION_ID = "user_roles"
+
+    def __init__(self, ttl: float, poll_interval: float):
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self._roles: Dict[str, FrozenSet[str]] = {}
+        self._masks: Dict[str, int] = {}
+        self.version: Optional[str] = None
+        self._expires_at = 0.0
+        # Увеличивается при каждой инвалидации, чтобы не сохранить результат загрузки,
+        # начатой до изменения ролей
+        self._generation = 0
+        self._counter_version: Optional[int] = None
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0, "token_masks": 0, "stale_tokens": 0}
+
+    def is_fresh(self) -> bool:
+        return self._expires_at > time.monotonic()
+
+    async def refresh(self):
+        async with self._lock:
+            if self.is_fresh():
+                return
+            self._counters["misses"] += 1
+            generation = self._generation
+            roles: Dict[str, FrozenSet[str]] = {}
+            async for role in user_roles_collection.find({}, {"name": 1, "permissions": 1}):
+                # Извлекаем все разрешения из всех сервисов
+                roles[role["name"]] = frozenset(perm for perms in role["permissions"].values() for perm in perms)
+            self._roles = roles
+            self._masks = {name: permissions_mask(perms) for name, perms in roles.items()}
+            self.version = roles_version(roles)
+            # Загрузка, пересекшаяся с инвалидацией, используется один раз и не кешируется
+            self._expires_at = time.monotonic() + self.ttl if generation == self._generation else 0.0
+
+    async def _ensure_fresh(self):
+        if self.is_fresh():
+            self._counters["hits"] += 1
+        else:
+            await self.refresh()
+
+    async def get(self, role_name: str) -> FrozenSet[str]:
+        await self._ensure_fresh()
+        return self._roles.get(role_name, frozenset())
+
+    async def get_mask(self, role_name: str) -> int:
+        await self._ensure_fresh()
+        return self._masks.get(role_name, 0)
+
+    async def token_mask(self, token: Dict) -> int:
+        """
+        Маска разрешений из токена, если она выдана по текущей версии таблицы ролей.
+        Устаревшая или отсутствующая маска пересчитывается по кешу.
+        """
+        await self._ensure_fresh()
+        mask = token.get("perm_mask")
+        if mask is not None and token.get("perm_version") == self.version:
+            self._counters["token_masks"] += 1
+            return mask
+        self._counters["stale_tokens"] += 1
+        return self._masks.get(RoleEnum(token.get("role")).value, 0)
+
+    def token_claims(self, role_name: str) -> Dict[str, Any]:
+        """Маска и версия ролей для create_jwt (пусто, пока таблица ролей не загружена)."""
+        if self.version is None:
+            return {}
+        return {"perm_mask": self._masks.get(role_name, 0), "perm_version": self.version}
+
+    def invalidate(self):
+        """Сбрасывает кеш; следующая проверка прав перечитает таблицу ролей."""
+        self._generation += 1
+        self._counters["invalidations"] += 1
+        self._expires_at = 0.0
+
+    async def bump_version(self):
+        """Сообщает всем воркерам об изменении ролей и сбрасывает локальный кеш."""
+        result = await cache_versions_collection.find_one_and_update(
+            {"_id": self.VERSION_ID},
+            {"$inc": {"version": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        self._counter_version = result["version"]
+        self.invalidate()
+
+    async def start(self):
+        try:
+            # Маски компилируются при старте, чтобы первые токены уже их содержали
+            await self.refresh()
+        except Exception as e:
+            logger.warning(f"Не удалось загрузить таблицу ролей при старте: {e}")
+        self._task = asyncio.create_task(self._watch_loop(), name="role-permissions-watcher")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _watch_loop(self):
+        while True:
+            try:
+                await self._watch_changes()
+            except asyncio.CancelledError:
+                raise
+            except OperationFailure as e:
+                # Standalone MongoDB не поддерживает change streams
+                logger.info("Change stream ролей недоступен (%s), используется счетчик версии", e)
+                await self._poll_version()
+            except Exception:
+                logger.exception("Ошибка отслеживания изменений ролей")
+                self.invalidate()
+                await asyncio.sleep(self.poll_interval)
+
+    async def _watch_changes(self):
+        async with user_roles_collection.watch() as stream:
+            # Изменения, пропущенные до открытия потока, не должны дожить до TTL
+            self.invalidate()
+            async for _change in stream:
+                self.invalidate()
+
+    async def _poll_version(self):
+        while True:
+            try:
+                document = await cache_versions_collection.find_one({"_id": self.VERSION_ID})
+                version = document["version"] if document else 0
+                if version != self._counter_version:
+                    if self._counter_version is not None:
+                        self.invalidate()
+                    self._counter_version = version
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Не удалось проверить версию ролей: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["misses"]
+        return {
+            "roles": len(self._roles),
+            "version": self.version,
+            "counter_version": self._counter_version,
+            **self._counters,
+            "hit_ratio": self._counters["hits"] / lookups if lookups else None,
+        }
+
+
+role_permissions_cache = RolePermissionsCache(
+    ttl=settings.role_permissions_ttl,
+    poll_interval=settings.role_permissions_poll_interval,
+)
+
+register_metrics("role_permissions_cache", role_permissions_cache.stats)
+
+
+# Роли, которым разрешены операции высокого уровня
+OPERATION_ROLES = {
+    "high-level_operation": frozenset({RoleEnum.ADMIN, RoleEnum.MODERATOR}),
+    "high-level_event_operation": frozenset({RoleEnum.ADMIN, RoleEnum.MODERATOR, RoleEnum.EVENT_MANAGER}),
+    "high-level_review_operation": frozenset({RoleEnum.ADMIN, RoleEnum.MODERATOR, RoleEnum.EVENT_MANAGER, RoleEnum.EXPERT})
+}
+
+# Поля владельца объекта, которые читает check_entity_permissions
+OWNER_PROJECTION = {"author_id": 1, "creator_event.creator_event_user_id": 1, "reviewer_id": 1}
+
+
+class EntityLoader:
+    """
+    Зависимость FastAPI, загружающая документ по идентификатору из пути запроса.
+
+    FastAPI вызывает одну и ту же зависимость один раз за запрос, поэтому документ
+    читается из MongoDB однократно и передается и в check_permissions (entity=...),
+    и в обработчик. fields - дополнительные поля проекции к полям владельца;
+    None загружает документ целиком.
+    """
+
+    def __init__(self, collection, id_param: str, not_found_message: str,
+                 fields: Optional[Iterable[str]] = None):
+        self.collection = collection
+        self.id_param = id_param
+        self.not_found_message = not_found_message
+        self.projection = None if fields is None else {**OWNER_PROJECTION, **{field: 1 for field in fields}}
+
+    async def __call__(self, request: Request) -> Dict:
+        entity_id = request.path_params[self.id_param]
+        if not ObjectId.is_valid(entity_id):
+            raise HTTPException(status_code=400, detail=f"Неверный формат {self.id_param}")
+
+        entity = await self.collection.find_one({"_id": ObjectId(entity_id)}, self.projection)
+        if not entity:
+            raise HTTPException(status_code=404, detail=self.not_found_message)
+        return entity
+
+
 # Функция для проверки прав доступа
-async def get_role_permissions(role_name: str) -> List[str]:
-    role = await user_roles_collection.find_one({"name": role_name})
-    if role:
-        # Извлекаем все разрешения из всех сервисов
-        return [perm for perms in role["permissions"].values() for perm in perms]
-    return []
+async def get_role_permissions(role_name: str) -> FrozenSet[str]:
+    return await role_permissions_cache.get(role_name)
 
 async def check_permissions(token: Dict, SERVICE_NAME: Optional[str] = None, operation_type: Optional[str] = None,
                             user_id: Optional[str] = None, project_id: Optional[str] = None,
-                            event_id: Optional[str] = None, review_id: Optional[str] = None):
+                            event_id: Optional[str] = None, review_id: Optional[str] = None,
+                            entity: Optional[Dict] = None):
 
     # Проверка на авторизацию
     if not token.get("user_id"):
@@ -37,31 +277,18 @@ async def check_permissions(token: Dict, SERVICE_NAME: Optional[str] = None, ope
     user_role = RoleEnum(token.get("role"))
 
     # Проверка на тип операции
-    operation_roles = {
-        "high-level_operation": {RoleEnum.ADMIN, RoleEnum.MODERATOR},
-        "high-level_event_operation": {RoleEnum.ADMIN, RoleEnum.MODERATOR, RoleEnum.EVENT_MANAGER},
-        "high-level_review_operation": {RoleEnum.ADMIN, RoleEnum.MODERATOR, RoleEnum.EVENT_MANAGER, RoleEnum.EXPERT}
-    }
-
-    if operation_type in operation_roles and user_role in operation_roles[operation_type]:
+    if operation_type in OPERATION_ROLES and user_role in OPERATION_ROLES[operation_type]:
         return {"status": "success", "message": "Пользователь имеет права."}
 
-    if operation_type in operation_roles:
+    if operation_type in OPERATION_ROLES:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Пользователь не имеет прав."
         )
 
-    services = {
-        "profile_service": profile_service,
-        "projects_service": projects_service,
-        "events_service": events_service,
-        "reviews_service": reviews_service
-    }
-
     if SERVICE_NAME:
         # Попытка получить функцию сервиса из словаря
-        service_function = services.get(SERVICE_NAME)
+        service_function = SERVICES.get(SERVICE_NAME)
 
         if service_function:
             # Вызов функции сервиса с учетом необязательных параметров
@@ -70,26 +297,30 @@ async def check_permissions(token: Dict, SERVICE_NAME: Optional[str] = None, ope
                 user_id=user_id,
                 project_id=project_id,
                 event_id=event_id,
-                review_id=review_id
+                review_id=review_id,
+                entity=entity
             )
         else:
             # Логирование ошибки, если сервис не найден
             logger.error("Неизвестный сервис: %s", SERVICE_NAME)
             return None
 
-async def check_entity_permissions(entity_id: Optional[str], collection, token_user_id: str, user_permissions: List[str],
-                                   my_permission: str, any_permission: str, not_found_message: str):
+async def check_entity_permissions(entity_id: Optional[str], collection, token_user_id: str, user_mask: int,
+                                   my_permission: str, any_permission: str, not_found_message: str,
+                                   entity: Optional[Dict] = None):
     if entity_id:
-        entity = await collection.find_one({"_id": ObjectId(entity_id)})
+        # Документ, уже загруженный EntityLoader, повторно не читается
+        if entity is None:
+            entity = await collection.find_one({"_id": ObjectId(entity_id)}, OWNER_PROJECTION)
         if not entity:
             raise HTTPException(status_code=404, detail=not_found_message)
 
         entity_owner_id = entity.get("author_id") or entity.get("creator_event", {}).get("creator_event_user_id") or entity.get("reviewer_id")
 
         if entity_owner_id == token_user_id:
-            if my_permission in user_permissions:
+            if user_mask & PERMISSION_BITS[my_permission]:
                 return {"status": "success", "message": "Доступ разрешен для своего объекта."}
-        elif any_permission in user_permissions:
+        elif user_mask & PERMISSION_BITS[any_permission]:
             return {"status": "success", "message": "Доступ разрешен для других объектов."}
 
     raise HTTPException(
@@ -100,31 +331,41 @@ async def check_entity_permissions(entity_id: Optional[str], collection, token_u
 async def profile_service(token: Dict, user_id: Optional[str] = None, **kwargs):
     return await generic_service(token, user_id, "crud_my_profile_data", "crud_any_profile_data")
 
-async def projects_service(token: Dict, user_id: Optional[str] = None, project_id: Optional[str] = None, **kwargs):
-    return await generic_service(token, user_id, "crud_my_projects", "crud_any_projects", project_id, projects_data_collection, "Проект не найден")
+async def projects_service(token: Dict, user_id: Optional[str] = None, project_id: Optional[str] = None,
+                           entity: Optional[Dict] = None, **kwargs):
+    return await generic_service(token, user_id, "crud_my_projects", "crud_any_projects", project_id, projects_data_collection, "Проект не найден", entity)
 
-async def events_service(token: Dict, user_id: Optional[str] = None, event_id: Optional[str] = None, **kwargs):
-    return await generic_service(token, user_id, "crud_my_events", "crud_any_events", event_id, events_data_collection, "Мероприятие не найдено")
+async def events_service(token: Dict, user_id: Optional[str] = None, event_id: Optional[str] = None,
+                         entity: Optional[Dict] = None, **kwargs):
+    return await generic_service(token, user_id, "crud_my_events", "crud_any_events", event_id, events_data_collection, "Мероприятие не найдено", entity)
 
-async def reviews_service(token: Dict, user_id: Optional[str] = None, review_id: Optional[str] = None, **kwargs):
-    return await generic_service(token, user_id, "crud_my_reviews", "crud_any_reviews", review_id, reviews_data_collection, "Проверка не найдена")
+async def reviews_service(token: Dict, user_id: Optional[str] = None, review_id: Optional[str] = None,
+                          entity: Optional[Dict] = None, **kwargs):
+    return await generic_service(token, user_id, "crud_my_reviews", "crud_any_reviews", review_id, reviews_data_collection, "Проверка не найдена", entity)
 
 async def generic_service(token: Dict, user_id: Optional[str], my_permission: str, any_permission: str,
-                          entity_id: Optional[str] = None, collection=None, not_found_message: str = ""):
-    user_role = RoleEnum(token.get("role"))
+                          entity_id: Optional[str] = None, collection=None, not_found_message: str = "",
+                          entity: Optional[Dict] = None):
     token_user_id = token.get("user_id")
-    user_permissions = await get_role_permissions(user_role.value)
+    user_mask = await role_permissions_cache.token_mask(token)
 
     if user_id and token_user_id == user_id:
-        if my_permission in user_permissions:
+        if user_mask & PERMISSION_BITS[my_permission]:
             return {"status": "success", "message": "Доступ разрешен для своего объекта."}
-    elif any_permission in user_permissions:
+    elif user_mask & PERMISSION_BITS[any_permission]:
         return {"status": "success", "message": "Доступ разрешен для других объектов."}
 
     if entity_id and collection is not None:
-        return await check_entity_permissions(entity_id, collection, token_user_id, user_permissions, my_permission, any_permission, not_found_message)
+        return await check_entity_permissions(entity_id, collection, token_user_id, user_mask, my_permission, any_permission, not_found_message, entity)
 
     raise HTTPException(
         status_code=status.HTTP_403_FORBIDDEN,
         detail="Недостаточно прав для выполнения действия."
     )
+
+SERVICES = {
+    "profile_service": profile_service,
+    "projects_service": projects_service,
+    "events_service": events_service,
+    "reviews_service": reviews_service
+}
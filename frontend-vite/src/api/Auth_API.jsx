@@ -2,9 +2,11 @@ import axios from 'axios';
 
 const API_URL = import.meta.env.VITE_API_URL;
 
-export const exchangeTokenForUserInfo = async (token) => {
+export const exchangeTokenForUserInfo = async (token, expiresIn) => {
     try {
-        const response = await axios.post(`${API_URL}/auth/yandex`, { token }, { withCredentials: true }); // Убедитесь, что куки передаются
+        // expires_in ограничивает время кеширования данных пользователя по токену на сервере
+        const expires_in = parseInt(expiresIn, 10) || undefined;
+        const response = await axios.post(`${API_URL}/auth/yandex`, { token, expires_in }, { withCredentials: true }); // Убедитесь, что куки передаются
         return response.data; // Возвращаем данные, включая сообщение о состоянии
     } catch (err) {
         console.error('Ошибка обмена токена:', err.response ? err.response.data : err.message);
@@ -18,6 +18,40 @@ export const fetchEventData = async (eventId) => {
   }
 };
 
+// Роли текущего пользователя на мероприятии и его поданные проекты
+export const fetchMyEventMembership = async (eventId) => {
+  try {
+    const response = await axios.get(`${API_URL}/events/${eventId}/members/me`, {
+      withCredentials: true, // Добавляем флаг withCredentials
+    });
+    return response.data;
+  } catch (error) {
+    console.error("Ошибка при получении ролей на мероприятии:", error.response?.data || error.message);
+    throw error;
+  }
+};
+
+// Страница участников мероприятия
+export const fetchEventParticipants = async (eventId, page = 1, limit = 50) => {
+  try {
+    const response = await axios.get(`${API_URL}/events/${eventId}/participants`, {
+      params: { page, limit },
+      withCredentials: true, // Добавляем флаг withCredentials
+    });
+    return {
+      participants: response.data,
+      totalCount: parseInt(response.headers["x-total-count"], 10) || 0,
+    };
+  } catch (error) {
+    // Мероприятие без участников отвечает 404
+    if (error.response?.status === 404) {
+      return { participants: [], totalCount: 0 };
+    }
+    console.error("Ошибка при получении участников мероприятия:", error.response?.data || error.message);
+    throw error;
+  }
+};
+
 // Функция для создания мероприятия
 export const submitEvent = async (eventDetails) => {
   try {
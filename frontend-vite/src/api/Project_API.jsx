@@ -25,16 +25,34 @@ export const createEmptyProject = async (templateType) => {
   await handleRequest('post', `${API_URL}/projects/create-empty?project_template=${encodeURIComponent(templateType)}`);
 };
 
-// Функция для создания проекта из файла
-export const createProjectFromFile = async (file, templateType) => {
+// Функция для получения состояния задачи импорта
+export const fetchImportJob = async (jobId) => {
+  return await handleRequest('get', `${API_URL}/projects/import-jobs/${jobId}`);
+};
+
+// Функция для создания проекта из файла (ожидает завершения задачи импорта)
+export const createProjectFromFile = async (file, templateType, pollInterval = 1000) => {
   const formData = new FormData();
   formData.append('input_file', file);
 
-  await handleRequest('post', `${API_URL}/projects/create-from-file?project_template=${encodeURIComponent(templateType)}`, formData, {
+  let job = await handleRequest('post', `${API_URL}/projects/create-from-file?project_template=${encodeURIComponent(templateType)}`, formData, {
     headers: {
       'Content-Type': 'multipart/form-data',
     },
   });
+
+  while (job.state === 'queued' || job.state === 'running') {
+    await new Promise((resolve) => setTimeout(resolve, pollInterval));
+    job = await fetchImportJob(job.job_id);
+  }
+
+  if (job.state === 'failed') {
+    const error = new Error(job.error || 'Ошибка при импорте проекта');
+    error.response = { data: { message: job.error } };
+    throw error;
+  }
+
+  return job;
 };
 
 // Функция для получения данных о проекте
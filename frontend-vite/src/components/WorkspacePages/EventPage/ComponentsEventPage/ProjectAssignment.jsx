@@ -16,7 +16,7 @@ import {
 import { AuthContext } from "../../../ComponentsApp/AuthProvider";
 import {
   fetchUserProjects,
-  fetchEventData,
+  fetchMyEventMembership,
   fetchUserDetails,
   updateEventProject,
   deleteEventProject,
@@ -40,7 +40,7 @@ const ProjectAssignment = ({ eventId, onParticipantsUpdate }) => {
     try {
       const projectsData = await fetchUserProjects("eventSection", eventId);
       setAvailableProjects(projectsData);
-      const eventData = await fetchEventData(eventId);
+      const memberships = await fetchMyEventMembership(eventId);
 
       let user_id;
       try {
@@ -51,15 +51,16 @@ const ProjectAssignment = ({ eventId, onParticipantsUpdate }) => {
         user_id = null;
       }
 
-      const participant = eventData.event_participants.find(
-        (participant) => participant.user_id === userId
+      const participant = memberships.find(
+        (membership) => membership.role === "participant"
       );
 
-      if (participant) {
+      if (participant && participant.projects.length > 0) {
+        const registeredProject = participant.projects[0];
         const projectDetails = projectsData.find(
-          (proj) => proj.project_id === participant.projects_id
+          (proj) => proj.project_id === registeredProject.project_id
         );
-        setUserProject(projectDetails || null);
+        setUserProject(projectDetails || registeredProject);
       } else {
         setUserProject(null);
       }
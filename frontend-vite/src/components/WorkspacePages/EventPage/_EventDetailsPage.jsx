@@ -29,21 +29,43 @@ import CheckCircleIcon from "@mui/icons-material/CheckCircle";
 import PersonAddIcon from "@mui/icons-material/PersonAdd";
 
 import ProjectAssignment from "./ComponentsEventPage/ProjectAssignment";
-import {fetchEventData } from "../../../api/Event_API";
+import { fetchEventData, fetchEventParticipants } from "../../../api/Event_API";
+
+// Сколько участников показывается на странице мероприятия
+const PARTICIPANTS_LIMIT = 50;
 
 const EventDetailsPage = () => {
   const { eventId } = useParams();
   const [event, setEvent] = useState(null);
+  const [participants, setParticipants] = useState([]);
+  const [participantsTotal, setParticipantsTotal] = useState(0);
   const [loading, setLoading] = useState(true);
   const [feedback, setFeedback] = useState("");
   const [rating, setRating] = useState(0);
 
+  // Участники отдаются постранично отдельным эндпоинтом
+  const loadParticipants = async () => {
+    try {
+      const { participants: firstPage, totalCount } = await fetchEventParticipants(
+        eventId,
+        1,
+        PARTICIPANTS_LIMIT
+      );
+      setParticipants(firstPage);
+      setParticipantsTotal(totalCount);
+    } catch (error) {
+      setParticipants([]);
+      setParticipantsTotal(0);
+    }
+  };
+
   useEffect(() => {
     const loadEvent = async () => {
       setLoading(true);
       const eventData = await fetchEventData(eventId);
       if (eventData) {
         setEvent(eventData);
+        await loadParticipants();
       }
       setLoading(false);
     };
@@ -56,6 +78,7 @@ const EventDetailsPage = () => {
     if (updatedEvent) {
       setEvent(updatedEvent);
     }
+    await loadParticipants();
   };
 
   if (loading) {
@@ -370,18 +393,27 @@ const EventDetailsPage = () => {
             >
               Участники мероприятия
             </Typography>
-            {event.event_participants && event.event_participants.length > 0 ? (
+            {participants.length > 0 ? (
               <Stack direction="row" spacing={2} sx={{ mt: 2 }}>
-                {event.event_participants.map((participant) => (
+                {participants.map((participant) => (
                   <Chip
                     key={participant.user_id}
-                    label={participant.user_full_name}
+                    label={participant.full_name || "Не указано"}
                     icon={<PersonIcon />}
                     sx={{
                       borderRadius: "8px",
                     }}
                   />
                 ))}
+                {participantsTotal > participants.length && (
+                  <Chip
+                    label={`и еще ${participantsTotal - participants.length}`}
+                    variant="outlined"
+                    sx={{
+                      borderRadius: "8px",
+                    }}
+                  />
+                )}
               </Stack>
             ) : (
               <Typography sx={{ mt: 2, color: "#888" }}>
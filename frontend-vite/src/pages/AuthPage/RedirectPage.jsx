@@ -4,9 +4,9 @@ import { exchangeTokenForUserInfo } from '../../api/Auth_API';
 
 const RedirectPage = () => {
 
-  const processToken = useCallback(async (token) => {
+  const processToken = useCallback(async (token, expiresIn) => {
     try {
-      const response = await exchangeTokenForUserInfo(token);
+      const response = await exchangeTokenForUserInfo(token, expiresIn);
       console.log('Ответ сервера:', response);
 
       if (window.opener) {
@@ -34,7 +34,7 @@ const RedirectPage = () => {
 
       if (token) {
         console.log('Токен найден:', token);
-        processToken(token);
+        processToken(token, hashParams.get('expires_in'));
       } else {
         console.error('Токен не найден в URL.');
         if (window.opener) {